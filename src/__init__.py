@@ -0,0 +1,12 @@
+"""
+Generic puzzle solver. Puzzle classes are loaded on first access.
+"""
+from .registry import PUZZLE_TYPES, puzzle_class
+
+
+def __getattr__(name):
+    for type_name, (_, class_name) in PUZZLE_TYPES.items():
+        if class_name == name:
+            return puzzle_class(type_name)
+    raise AttributeError("module {!r} has no attribute {!r}".format(
+        __name__, name))
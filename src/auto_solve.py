@@ -0,0 +1,409 @@
+"""
+Automatic choice of search strategy.
+
+auto_solve looks at the type and size of a puzzle (n for a sudoku, n * m
+for a sliding puzzle, the number of pegs for peg solitaire, the word
+length for a word ladder) and at a local table of past runs, then either
+runs the strategy that has done best on puzzles like it, or races the two
+most promising strategies in separate processes and keeps whichever
+finishes first. Finished runs are added to the table only when the
+caller asks for it.
+"""
+import json
+import multiprocessing
+import os
+import queue
+import tempfile
+from time import monotonic
+
+from . import mn_batch
+from .budget import BudgetExceeded, SearchBudget, SearchStats
+from .footprint import traced_peak
+from .registry import PUZZLE_TYPES
+from .solution import Solution
+from .strategies import STRATEGIES
+from .word_dictionary import DATASET_DIRECTORY
+
+# environment variable that overrides the location of the benchmark table
+BENCHMARK_ENVIRONMENT_VARIABLE = "PUZZLE_SOLVER_BENCHMARKS"
+BENCHMARK_PATH = os.environ.get(
+    BENCHMARK_ENVIRONMENT_VARIABLE,
+    os.path.join(DATASET_DIRECTORY, "benchmarks.json"))
+
+# solved runs of a strategy on one type and size before it is trusted
+# enough to run alone
+MIN_RUNS = 3
+
+# sliding puzzles up to this many cells are solved quickly by bfs
+SMALL_MN = 6
+# sliding puzzles up to this many cells fit the numpy batch search
+BATCH_MN = 16
+# sudokus from this size on are solved in compact form
+COMPACT_SUDOKU = 9
+
+
+def puzzle_kind(puzzle):
+    """
+    Return the registered type name of puzzle, or None if its class is not
+    registered.
+
+    @type puzzle: Puzzle
+    @rtype: str | None
+
+    >>> from .registry import puzzle_class
+    >>> puzzle_kind(puzzle_class("mn")((("*", "1"),), (("1", "*"),)))
+    'mn'
+    """
+    cls = type(puzzle)
+    for name, (module, class_name) in PUZZLE_TYPES.items():
+        if cls.__module__ == module and cls.__name__ == class_name:
+            return name
+    return None
+
+
+def default_strategies(kind, size):
+    """
+    Return the strategies to try for a puzzle of type kind and size, best
+    first, when there are no benchmarks to go by.
+
+    Filling in cells or removing pegs never revisits a configuration and
+    every solution has the same length, so depth-first search goes
+    straight down; peg positions are reached by many orders of the same
+    jumps, so positions proven dead are remembered, and the endgame search
+    tries compact positions first and stops at a winnable endgame.
+    Sliding puzzles need the shortest path among many cycles, where
+    iterative deepening with the Manhattan distance keeps memory flat,
+    and with numpy up to 16 cells are searched a whole layer at a time;
+    with several blanks and tile costs the cheapest solution is wanted
+    instead, which A* finds. Word ladders are shallow enough for
+    breadth-first search; ladders with weighted edits need the cheapest
+    one, guided by the edit distance.
+
+    @type kind: str | None
+    @type size: int
+    @rtype: list[str]
+
+    >>> default_strategies("mn", 6), default_strategies("mn", 25)
+    (['bfs', 'ida'], ['ida', 'anytime'])
+    """
+    if kind in ("sudoku", "compact_sudoku"):
+        return ["dfs", "bfs"]
+    if kind == "peg":
+        return ["endgame", "memo"]
+    if kind == "mn":
+        if size <= SMALL_MN:
+            return ["bfs", "ida"]
+        if size <= BATCH_MN and mn_batch.np is not None:
+            return ["batch", "ida"]
+        return ["ida", "anytime"]
+    if kind == "mn_multi":
+        return ["astar", "ucs"]
+    if kind == "word_ladder":
+        return ["bfs", "ida"]
+    if kind == "edit_ladder":
+        return ["astar", "ucs"]
+    return ["bfs", "dfs"]
+
+
+class BenchmarkTable:
+    """
+    Past runs of each strategy on puzzles of each type and size: how many
+    runs finished, how many of them solved the puzzle and the total time
+    they took, optionally kept in a JSON file.
+    """
+
+    def __init__(self, path=None):
+        """
+        Create a new BenchmarkTable self, loaded from the JSON file at path
+        if it exists. Without a path the table is only kept in memory.
+
+        @type self: BenchmarkTable
+        @type path: str | None
+        @rtype: None
+        """
+        self.path = path
+        # "kind/size" -> strategy -> {"runs", "solved", "elapsed"}
+        self._entries = {}
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                self._entries = json.load(f)
+
+    def record(self, kind, size, strategy, elapsed, solved,
+               peak_memory=None):
+        """
+        Add a finished run of strategy on a puzzle of type kind and size,
+        which took elapsed seconds and solved the puzzle or not. If the
+        peak_memory of the run in bytes was traced, the largest one
+        recorded is kept as well.
+
+        @type self: BenchmarkTable
+        @type kind: str
+        @type size: int
+        @type strategy: str
+        @type elapsed: float
+        @type solved: bool
+        @type peak_memory: int | None
+        @rtype: None
+
+        >>> table = BenchmarkTable()
+        >>> table.record("mn", 9, "ida", 0.5, True, 2048)
+        >>> table.record("mn", 9, "ida", 0.25, True)
+        >>> table.entry("mn", 9, "ida")["peak_memory"]
+        2048
+        """
+        runs = self._entries.setdefault("{}/{}".format(kind, size), {})
+        entry = runs.setdefault(strategy,
+                                {"runs": 0, "solved": 0, "elapsed": 0.0})
+        entry["runs"] += 1
+        entry["solved"] += int(solved)
+        entry["elapsed"] += elapsed
+        if peak_memory is not None:
+            entry["peak_memory"] = max(entry.get("peak_memory", 0),
+                                       peak_memory)
+
+    def entry(self, kind, size, strategy):
+        """
+        Return the totals recorded for strategy on puzzles of type kind
+        and size, or None if it was never run on them.
+
+        @type self: BenchmarkTable
+        @type kind: str
+        @type size: int
+        @type strategy: str
+        @rtype: dict | None
+        """
+        return self._entries.get("{}/{}".format(kind, size), {}).get(
+            strategy)
+
+    def rank(self, kind, size, candidates):
+        """
+        Return candidates, strategies in order of preference, reordered by
+        the benchmarks for puzzles of type kind and size, with any other
+        strategy recorded for them added. Strategies that solved puzzles
+        come first, by time spent per solved puzzle, then strategies never
+        run in their original order, then those that never solved one.
+
+        @type self: BenchmarkTable
+        @type kind: str
+        @type size: int
+        @type candidates: list[str]
+        @rtype: list[str]
+
+        >>> table = BenchmarkTable()
+        >>> table.record("mn", 9, "anytime", 0.5, True)
+        >>> table.record("mn", 9, "bfs", 2.0, False)
+        >>> table.rank("mn", 9, ["ida", "bfs"])
+        ['anytime', 'ida', 'bfs']
+        """
+        recorded = self._entries.get("{}/{}".format(kind, size), {})
+        strategies = list(candidates) + sorted(
+            [s for s in recorded if s not in candidates and s in STRATEGIES])
+
+        def key(strategy):
+            entry = recorded.get(strategy)
+            if entry is None:
+                return 1, strategies.index(strategy)
+            if entry["solved"] == 0:
+                return 2, strategies.index(strategy)
+            return 0, entry["elapsed"] / entry["solved"]
+        return sorted(strategies, key=key)
+
+    def save(self, path=None):
+        """
+        Write BenchmarkTable self as JSON to path, or to the path it was
+        loaded from.
+
+        @type self: BenchmarkTable
+        @type path: str | None
+        @rtype: None
+        """
+        path = self.path if path is None else path
+        if path is None:
+            return
+        # write a temporary file beside path first, so a crash never leaves
+        # half a table and concurrent savers never share a temporary file
+        with tempfile.NamedTemporaryFile(
+                "w", dir=os.path.dirname(path) or ".", suffix=".tmp",
+                delete=False) as f:
+            temporary = f.name
+            try:
+                json.dump(self._entries, f, indent=1, sort_keys=True)
+            except BaseException:
+                f.close()
+                os.remove(temporary)
+                raise
+        os.replace(temporary, path)
+
+
+def choose_strategies(puzzle, table=None):
+    """
+    Return the strategies for puzzle in order of preference, from the
+    rules for its type and size and the benchmarks in BenchmarkTable table.
+
+    @type puzzle: Puzzle
+    @type table: BenchmarkTable | None
+    @rtype: list[str]
+    """
+    kind, size = puzzle_kind(puzzle), puzzle.size()
+    candidates = default_strategies(kind, size)
+    if table is None:
+        return candidates
+    return table.rank(kind, size, candidates)
+
+
+def prepare(puzzle):
+    """
+    Return the puzzle to search in place of puzzle: the same puzzle, or an
+    equivalent one that is cheaper to search and whose moves apply to
+    puzzle as well. Large sudokus are searched as CompactSudokuPuzzles,
+    which check for dead ends with bitmasks.
+
+    @type puzzle: Puzzle
+    @rtype: Puzzle
+    """
+    if (puzzle_kind(puzzle) == "sudoku" and
+            puzzle.size() >= COMPACT_SUDOKU):
+        from .compact_sudoku import CompactSudokuPuzzle
+        return CompactSudokuPuzzle.from_puzzle(puzzle)
+    return puzzle
+
+
+def auto_solve(puzzle, budget=None, race=None, table=None, record=None,
+               trace_memory=False):
+    """
+    Return the Solution for puzzle found by the strategy expected to be
+    fastest, None if puzzle has no solution, or BudgetExceeded if
+    SearchBudget budget runs out first.
+
+    If race is true, or if race is None and table holds fewer than
+    MIN_RUNS solved runs of the preferred strategy on puzzles like this
+    one, the two preferred strategies run in separate processes, each
+    with the limits of budget, and the first solution found is kept; the
+    other search is stopped. Otherwise the preferred strategy runs in this
+    process with budget itself.
+
+    table is the BenchmarkTable to choose from, by default the one at
+    BENCHMARK_PATH. If record is true, or if record is None and table was
+    given, the runs that finish are added to it and it is saved, with
+    their peak memory if trace_memory is true; the default table is only
+    read unless record is true. Tracing slows the searches down.
+
+    @type puzzle: Puzzle
+    @type budget: SearchBudget | None
+    @type race: bool | None
+    @type table: BenchmarkTable | None
+    @type record: bool | None
+    @type trace_memory: bool
+    @rtype: Solution | BudgetExceeded | None
+
+    >>> from .registry import puzzle_class
+    >>> MNPuzzle = puzzle_class("mn")
+    >>> start_grid = (("1", "3", "4"), ("2", "5", "*"))
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> table = BenchmarkTable()
+    >>> solution = auto_solve(MNPuzzle(start_grid, target_grid), table=table)
+    >>> len(solution), solution.final().is_solved()
+    (16, True)
+    >>> solution = auto_solve(MNPuzzle(start_grid, target_grid), race=False,
+    ...                       table=table)
+    >>> len(solution)
+    16
+    >>> solution = auto_solve(MNPuzzle(start_grid, target_grid), race=False,
+    ...                       table=table, trace_memory=True)
+    >>> table.entry("mn", 6, "bfs")["peak_memory"] > 0
+    True
+    """
+    if record is None:
+        record = table is not None
+    if table is None:
+        table = BenchmarkTable(BENCHMARK_PATH)
+    kind, size = puzzle_kind(puzzle), puzzle.size()
+    strategies = choose_strategies(puzzle, table)
+    if race is None:
+        entry = table.entry(kind, size, strategies[0])
+        race = ((entry is None or entry["solved"] < MIN_RUNS) and
+                len(strategies) > 1 and (os.cpu_count() or 1) > 1)
+
+    searched = prepare(puzzle)
+    if race:
+        limits = {} if budget is None else {
+            "deadline": budget.deadline, "max_nodes": budget.max_nodes,
+            "max_memory": budget.max_memory}
+        runs, result = _race(searched, strategies[:2], limits, trace_memory)
+    else:
+        run = _run(searched, strategies[0], budget, trace_memory)
+        runs, result = [run], run[2]
+
+    if record and kind is not None:
+        for strategy, elapsed, outcome, peak in runs:
+            if not isinstance(outcome, BudgetExceeded):
+                table.record(kind, size, strategy, elapsed,
+                             isinstance(outcome, tuple), peak)
+        table.save()
+    if isinstance(result, tuple):
+        return Solution(puzzle, result)
+    return result
+
+
+def _run(puzzle, strategy, budget, trace_memory):
+    # (strategy, elapsed, moves or failure, peak memory or None)
+    started = monotonic()
+    if trace_memory:
+        result, peak = traced_peak(STRATEGIES[strategy], puzzle, budget)
+    else:
+        result, peak = STRATEGIES[strategy](puzzle, budget), None
+    if isinstance(result, Solution):
+        result = result.moves
+    return strategy, monotonic() - started, result, peak
+
+
+def _race_job(puzzle, strategy, limits, trace_memory, results):
+    # runs in a child process: report the moves found, or the failure
+    results.put(_run(puzzle, strategy, SearchBudget(**limits),
+                     trace_memory))
+
+
+def _race(puzzle, strategies, limits, trace_memory=False):
+    # run strategies in parallel until one finds a solution or all stop;
+    # return the finished runs, as for _run, and the moves or failure to
+    # report
+    context = multiprocessing.get_context()
+    results = context.Queue()
+    processes = [context.Process(target=_race_job, daemon=True,
+                                 args=(puzzle, strategy, limits,
+                                       trace_memory, results))
+                 for strategy in strategies]
+    for process in processes:
+        process.start()
+    runs = []
+    try:
+        while len(runs) < len(processes):
+            try:
+                run = results.get(timeout=0.1)
+            except queue.Empty:
+                if not any([p.is_alive() for p in processes]):
+                    # a search died without reporting, e.g. out of memory;
+                    # one last look for a result sent just before exiting
+                    try:
+                        runs.append(results.get(timeout=0.1))
+                        continue
+                    except queue.Empty:
+                        break
+                continue
+            runs.append(run)
+            strategy, _, result, _ = run
+            # a complete search that finds nothing proves there is nothing
+            if isinstance(result, tuple) or (
+                    result is None and STRATEGIES[strategy].complete):
+                return runs, result
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        results.close()
+    # no solution: only budget failures or incomplete searches left
+    if len(runs) == 0:
+        return runs, BudgetExceeded("max_memory", SearchStats())
+    failures = [r for _, _, r, _ in runs if r is not None]
+    return runs, failures[0] if len(failures) > 0 else None
@@ -0,0 +1,277 @@
+"""
+Time, node and memory budgets and cooperative cancellation for searches.
+"""
+import mmap
+import sys
+import threading
+import tracemalloc
+from time import monotonic
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class CancellationToken:
+    """
+    A flag that another thread can set to stop a running search.
+    """
+
+    def __init__(self):
+        """
+        Create a new, not yet cancelled CancellationToken self.
+
+        @type self: CancellationToken
+        @rtype: None
+        """
+        self._event = threading.Event()
+
+    def cancel(self):
+        """
+        Request cancellation of every search using CancellationToken self.
+
+        @type self: CancellationToken
+        @rtype: None
+        """
+        self._event.set()
+
+    def is_cancelled(self):
+        """
+        Return whether cancellation was requested.
+
+        @type self: CancellationToken
+        @rtype: bool
+        """
+        return self._event.is_set()
+
+
+class SearchStats:
+    """
+    Counters collected while a search runs.
+    """
+
+    def __init__(self):
+        """
+        Create new SearchStats self with all counters at zero.
+
+        @type self: SearchStats
+        @rtype: None
+        """
+        self.expanded, self.peak_frontier, self.visited = 0, 0, 0
+        self.elapsed = 0.0
+
+    def as_dict(self):
+        """
+        Return the counters of SearchStats self as a dict.
+
+        @type self: SearchStats
+        @rtype: dict
+        """
+        return {"expanded": self.expanded,
+                "peak_frontier": self.peak_frontier,
+                "visited": self.visited,
+                "elapsed": self.elapsed}
+
+    def __str__(self):
+        """
+        Return a human-readable string representation of SearchStats self.
+
+        >>> print(SearchStats())
+        expanded=0 peak_frontier=0 visited=0 elapsed=0.000s
+        """
+        return ("expanded={} peak_frontier={} visited={} "
+                "elapsed={:.3f}s".format(self.expanded, self.peak_frontier,
+                                         self.visited, self.elapsed))
+
+
+class SearchBudget:
+    """
+    Limits on a single search: a deadline in seconds, a maximum number of
+    expanded nodes, a maximum growth of the memory in use in bytes since
+    the search started and an external CancellationToken. Any limit may
+    be None. The budget also collects the SearchStats of the search it is
+    passed to.
+    """
+
+    def __init__(self, deadline=None, max_nodes=None, max_memory=None,
+                 token=None, check_interval=256):
+        """
+        Create a new SearchBudget self.
+
+        The clock, memory use and token are only consulted every
+        check_interval nodes to keep the overhead per node low.
+
+        @type self: SearchBudget
+        @type deadline: float | None
+        @type max_nodes: int | None
+        @type max_memory: int | None
+        @type token: CancellationToken | None
+        @type check_interval: int
+        @rtype: None
+        """
+        self.deadline, self.max_nodes = deadline, max_nodes
+        self.max_memory, self.token = max_memory, token
+        self.check_interval = check_interval
+        self.stats = SearchStats()
+        self._started = None
+        self._memory_at_start = 0
+        # whether a search has started and not finished
+        self._running = False
+
+    def start(self):
+        """
+        Start a search under SearchBudget self: restart its clock and its
+        SearchStats, and note the memory in use if it has a max_memory.
+        The limits apply to each search on its own, so one budget may
+        serve several searches in turn. While a search is running, until
+        it finishes or runs out of budget, starting another one, such as
+        a search run as its first phase, continues the running one.
+
+        @type self: SearchBudget
+        @rtype: None
+
+        >>> from .registry import puzzle_class
+        >>> from .puzzle_tools import breadth_first_solution
+        >>> grid = (("1", "2"), ("3", "*"))
+        >>> puzzle = puzzle_class("mn")((("*", "2"), ("1", "3")), grid)
+        >>> budget = SearchBudget(max_nodes=5)
+        >>> len(breadth_first_solution(puzzle, budget))
+        2
+        >>> first = budget.stats
+        >>> len(breadth_first_solution(puzzle, budget))
+        2
+        >>> first.expanded, budget.stats.expanded, first is budget.stats
+        (5, 5, False)
+        """
+        if self._running:
+            return
+        self._running = True
+        self._started = monotonic()
+        self.stats = SearchStats()
+        if self.max_memory is not None:
+            self._memory_at_start = memory_in_use()
+
+    def charge(self, frontier, visited, nodes=1):
+        """
+        Record that nodes more nodes are about to be expanded, with
+        frontier nodes waiting and visited states recorded, and return
+        the reason the budget is exceeded, or None if the search may
+        continue. Nodes that would go over max_nodes are not recorded, so
+        a search charging each node before its goal test processes
+        exactly max_nodes nodes.
+
+        @type self: SearchBudget
+        @type frontier: int
+        @type visited: int
+        @type nodes: int
+        @rtype: str | None
+
+        >>> budget = SearchBudget(max_nodes=2)
+        >>> budget.start()
+        >>> budget.charge(1, 1) is None, budget.charge(3, 2) is None
+        (True, True)
+        >>> budget.charge(2, 3)
+        'max_nodes'
+        >>> budget.stats.expanded, budget.stats.peak_frontier
+        (2, 3)
+        >>> token = CancellationToken()
+        >>> budget = SearchBudget(token=token, check_interval=1)
+        >>> budget.start()
+        >>> token.cancel()
+        >>> budget.charge(0, 0)
+        'cancelled'
+        """
+        stats = self.stats
+        before = stats.expanded
+        stats.expanded += nodes
+        stats.visited = visited
+        if frontier > stats.peak_frontier:
+            stats.peak_frontier = frontier
+        if self.max_nodes is not None and stats.expanded > self.max_nodes:
+            stats.expanded = before
+            return self._exceeded("max_nodes")
+        if (stats.expanded // self.check_interval ==
+                before // self.check_interval):
+            return None
+        stats.elapsed = monotonic() - self._started
+        if self.token is not None and self.token.is_cancelled():
+            return self._exceeded("cancelled")
+        if self.deadline is not None and stats.elapsed >= self.deadline:
+            return self._exceeded("deadline")
+        if (self.max_memory is not None and
+                memory_in_use() - self._memory_at_start >= self.max_memory):
+            return self._exceeded("max_memory")
+        return None
+
+    def finish(self):
+        """
+        Bring the elapsed time in the stats of SearchBudget self up to
+        date, at the end of a search.
+
+        @type self: SearchBudget
+        @rtype: None
+        """
+        self.stats.elapsed = monotonic() - self._started
+        self._running = False
+
+    def _exceeded(self, reason):
+        self.finish()
+        return reason
+
+
+class BudgetExceeded:
+    """
+    Result of a search stopped by its SearchBudget before finding a
+    solution or exhausting the search space. It is falsy, like a search
+    that found nothing, but carries the reason and the partial stats.
+    """
+
+    def __init__(self, reason, stats):
+        """
+        Create a new BudgetExceeded self.
+
+        @type self: BudgetExceeded
+        @type reason: str
+        @type stats: SearchStats
+        @rtype: None
+        """
+        self.reason, self.stats = reason, stats
+
+    def __bool__(self):
+        return False
+
+    def __str__(self):
+        """
+        Return a human-readable string representation of BudgetExceeded self.
+
+        >>> str(BudgetExceeded("deadline", SearchStats())).split(":")[0]
+        'budget exceeded (deadline)'
+        """
+        return "budget exceeded ({}): {}".format(self.reason, self.stats)
+
+
+def memory_in_use():
+    """
+    Return the memory used by this process in bytes: the traced size when
+    tracemalloc is tracing, otherwise the current resident set size where
+    /proc/self/statm gives it, otherwise the peak resident set size, which
+    never goes down.
+
+    @rtype: int
+
+    >>> memory_in_use() > 0
+    True
+    """
+    if tracemalloc.is_tracing():
+        return tracemalloc.get_traced_memory()[0]
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * mmap.PAGESIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if sys.platform == "darwin" else peak * 1024
@@ -0,0 +1,223 @@
+"""
+Breadth-first and depth-first search that can be checkpointed to disk and
+resumed after the process is restarted.
+
+Every generated node is recorded as the index of its parent and the move
+leading to it, so the frontier is saved as a list of node indices and its
+puzzles are rebuilt on resume by replaying moves from the start puzzle.
+Checkpoints are gzip-compressed pickles, written atomically.
+"""
+import gzip
+import os
+import pickle
+from array import array
+from collections import deque
+from time import monotonic
+
+from .budget import BudgetExceeded
+from .solution import Solution
+
+_VERSION = 1
+
+
+class SearchCheckpoint:
+    """
+    The state of a resumable search: start puzzle, parent links and moves
+    of every generated node, frontier node indices and visited states.
+    """
+
+    def __init__(self, start, strategy):
+        """
+        Create the initial SearchCheckpoint self of a search from Puzzle
+        start using strategy "bfs" or "dfs".
+
+        @type self: SearchCheckpoint
+        @type start: Puzzle
+        @type strategy: str
+        @rtype: None
+        """
+        self.start, self.strategy = start, strategy
+        # node 0 is the start puzzle; it has no parent and no move
+        self.parents, self.moves = array("q", [-1]), [None]
+        self.frontier, self.visited = [0], set()
+        self.expanded = 0
+
+    def path_moves(self, node):
+        """
+        Return the moves from the start puzzle to node.
+
+        @type self: SearchCheckpoint
+        @type node: int
+        @rtype: list[str | tuple]
+        """
+        moves = []
+        while self.parents[node] >= 0:
+            moves.append(self.moves[node])
+            node = self.parents[node]
+        moves.reverse()
+        return moves
+
+    def puzzle(self, node):
+        """
+        Return the puzzle of node, replayed from the start puzzle.
+
+        @type self: SearchCheckpoint
+        @type node: int
+        @rtype: Puzzle
+        """
+        puzzle = self.start
+        for move in self.path_moves(node):
+            puzzle = puzzle.apply_move(move)
+        return puzzle
+
+    def save(self, path):
+        """
+        Write SearchCheckpoint self to path, replacing any earlier
+        checkpoint only once the new one is complete.
+
+        @type self: SearchCheckpoint
+        @type path: str
+        @rtype: None
+        """
+        temporary = path + ".tmp"
+        with gzip.open(temporary, "wb", compresslevel=1) as f:
+            pickle.dump((_VERSION, self), f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, path)
+
+    @staticmethod
+    def load(path):
+        """
+        Return the SearchCheckpoint saved at path.
+
+        @type path: str
+        @rtype: SearchCheckpoint
+        """
+        with gzip.open(path, "rb") as f:
+            version, checkpoint = pickle.load(f)
+        if version != _VERSION:
+            raise ValueError("unsupported checkpoint version {}".format(
+                version))
+        return checkpoint
+
+
+def resumable_solve(puzzle, path, strategy="bfs", every_nodes=100000,
+                    every_seconds=None, budget=None):
+    """
+    Return the Solution found by searching from puzzle with strategy
+    ("bfs" or "dfs"), None if there is none, or BudgetExceeded if
+    SearchBudget budget runs out first.
+
+    The search state is saved to path every every_nodes expanded nodes
+    and, if given, every every_seconds seconds, and when the budget runs
+    out. If path already holds a checkpoint of a search from the same
+    puzzle and strategy, the search resumes from it. The checkpoint is
+    removed once the search finishes.
+
+    @type puzzle: Puzzle
+    @type path: str
+    @type strategy: str
+    @type every_nodes: int
+    @type every_seconds: float | None
+    @type budget: SearchBudget | None
+    @rtype: Solution | BudgetExceeded | None
+
+    >>> import tempfile
+    >>> from .budget import SearchBudget
+    >>> from .registry import puzzle_class
+    >>> MNPuzzle = puzzle_class("mn")
+    >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> puzzle = MNPuzzle(start_grid, target_grid)
+    >>> path = os.path.join(tempfile.mkdtemp(), "search.ckpt")
+    >>> resumable_solve(puzzle, path, budget=SearchBudget(max_nodes=3)).reason
+    'max_nodes'
+    >>> SearchCheckpoint.load(path).expanded
+    3
+    >>> resumable_solve(puzzle, path).moves
+    ('D', 'R', 'R')
+    >>> os.path.exists(path)
+    False
+    >>> WordLadderPuzzle = puzzle_class("word_ladder")
+    >>> ladder = WordLadderPuzzle("cat", "dog", {"cat", "cot", "cog", "dog"})
+    >>> resumable_solve(ladder, path, budget=SearchBudget(max_nodes=1)).reason
+    'max_nodes'
+    >>> resumable_solve(WordLadderPuzzle("cat", "dog", {"cat", "dog"}), path)
+    ... # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    ValueError: ... is a checkpoint of another search
+    >>> len(resumable_solve(ladder, path))
+    3
+    """
+    if strategy not in ("bfs", "dfs"):
+        raise ValueError("unknown strategy: {}".format(strategy))
+    if os.path.exists(path):
+        checkpoint = SearchCheckpoint.load(path)
+        # puzzles compare their whole context, such as the dictionary of
+        # a word ladder, not just what they print
+        if checkpoint.strategy != strategy or checkpoint.start != puzzle:
+            raise ValueError("{} is a checkpoint of another search".format(
+                path))
+    else:
+        checkpoint = SearchCheckpoint(puzzle, strategy)
+
+    parents, moves = checkpoint.parents, checkpoint.moves
+    visited = checkpoint.visited
+    frontier = deque([(node, checkpoint.puzzle(node))
+                      for node in checkpoint.frontier])
+    pop = frontier.popleft if strategy == "bfs" else frontier.pop
+    if budget is not None:
+        budget.start()
+    last_saved, saved_at = checkpoint.expanded, monotonic()
+
+    def save():
+        checkpoint.frontier = [node for node, _ in frontier]
+        checkpoint.save(path)
+
+    while len(frontier) > 0:
+        node, curr_puzzle = pop()
+        curr_puzzle_str = str(curr_puzzle)
+        if curr_puzzle_str in visited:
+            continue
+
+        if budget is not None:
+            reason = budget.charge(len(frontier), len(visited))
+            if reason is not None:
+                # put the node back where it came from, unexpanded
+                if strategy == "bfs":
+                    frontier.appendleft((node, curr_puzzle))
+                else:
+                    frontier.append((node, curr_puzzle))
+                save()
+                return BudgetExceeded(reason, budget.stats)
+
+        visited.add(curr_puzzle_str)
+        checkpoint.expanded += 1
+
+        if curr_puzzle.is_solved():
+            _remove(path, budget)
+            return Solution(checkpoint.start, checkpoint.path_moves(node))
+
+        if not curr_puzzle.fail_fast():
+            for ext in curr_puzzle.extensions():
+                if str(ext) not in visited:
+                    parents.append(node)
+                    moves.append(curr_puzzle.move_to(ext))
+                    frontier.append((len(parents) - 1, ext))
+
+        if (checkpoint.expanded - last_saved >= every_nodes or
+                (every_seconds is not None and
+                 monotonic() - saved_at >= every_seconds)):
+            save()
+            last_saved, saved_at = checkpoint.expanded, monotonic()
+
+    _remove(path, budget)
+    return None
+
+
+def _remove(path, budget):
+    # the search is over: a later call starts afresh
+    if os.path.exists(path):
+        os.remove(path)
+    if budget is not None:
+        budget.finish()
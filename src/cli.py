@@ -0,0 +1,199 @@
+"""
+Command-line solver: reads puzzles of one type from a file or stdin, one
+per line in the formats of puzzle_io, solves them with the chosen strategy
+and budgets, and prints one line per puzzle with its timing and node
+counts, optionally as JSON lines.
+
+    python -m src mn puzzles.txt --strategy ida --deadline 5
+    python -m src sudoku - --workers 4 --json < sudokus.txt
+    python -m src peg boards.txt --profile
+    python -m src word_ladder pairs.txt --trace-memory
+"""
+import argparse
+import cProfile
+import io
+import pstats
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from .puzzle_io import PARSERS, solve_line, write_result
+from .strategies import STRATEGIES
+
+# strategy used for each puzzle type when none is given, bfs for the rest:
+# edit ladders weigh their edits, so the cheapest ladder is wanted
+DEFAULT_STRATEGIES = {"edit_ladder": "astar"}
+
+
+def format_record(record):
+    """
+    Return the one-line summary of result record.
+
+    @type record: dict
+    @rtype: str
+
+    >>> print(format_record({"line": 4, "moves": ["D"], "solved": True,
+    ...                      "elapsed": 0.5, "expanded": 2,
+    ...                      "peak_frontier": 1}))
+    4: solved in 1 moves, 0.500s, 2 nodes expanded, peak frontier 1
+    >>> print(format_record({"line": 5, "solved": False, "elapsed": 0.5,
+    ...                      "expanded": 2, "peak_frontier": 1,
+    ...                      "peak_memory": 3 << 20}))
+    5: no solution, 0.500s, 2 nodes expanded, peak frontier 1, peak memory 3.0 MiB
+    """
+    if "error" in record:
+        return "{}: error: {}".format(record["line"], record["error"])
+    if record["solved"]:
+        outcome = "solved in {} moves".format(len(record["moves"]))
+    else:
+        outcome = "stopped ({})".format(record["reason"]) \
+            if "reason" in record else "no solution"
+    summary = "{}: {}, {:.3f}s, {} nodes expanded, peak frontier {}".format(
+        record["line"], outcome, record["elapsed"], record["expanded"],
+        record["peak_frontier"])
+    if "peak_memory" in record:
+        summary += ", peak memory {:.1f} MiB".format(
+            record["peak_memory"] / (1 << 20))
+    return summary
+
+
+def iter_records(lines, kind, strategy, limits, workers=1,
+                 trace_memory=False):
+    """
+    Yield the result record of every non-blank line of lines, in input
+    order. With more than one worker the puzzles are solved in a process
+    pool, with at most twice as many lines read ahead as there are
+    workers.
+
+    @type lines: Iterable[str]
+    @type kind: str
+    @type strategy: str
+    @type limits: dict
+    @type workers: int
+    @type trace_memory: bool
+    @rtype: generator[dict]
+    """
+    numbered = ((number, line.strip()) for number, line
+                in enumerate(lines, 1) if len(line.strip()) > 0)
+    if workers <= 1:
+        for number, line in numbered:
+            yield solve_line(kind, strategy, limits, number, line,
+                             trace_memory)
+        return
+
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for number, line in numbered:
+            pending.append(executor.submit(solve_line, kind, strategy,
+                                           limits, number, line,
+                                           trace_memory))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while len(pending) > 0:
+            yield pending.popleft().result()
+
+
+def build_parser():
+    """
+    Return the parser of the command-line arguments.
+
+    @rtype: argparse.ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m src",
+        description="Solve puzzles read one per line from a file.")
+    parser.add_argument("puzzle", choices=sorted(PARSERS),
+                        help="type of the puzzles")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="input file, - for stdin (default)")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES),
+                        help="search strategy (default astar for "
+                             "edit_ladder, bfs otherwise)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of worker processes (default 1)")
+    parser.add_argument("--deadline", type=float,
+                        help="seconds allowed per puzzle")
+    parser.add_argument("--max-nodes", type=int,
+                        help="nodes each search may expand")
+    parser.add_argument("--max-memory", type=int,
+                        help="bytes of memory each search may use")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="report the peak memory of each search, "
+                             "traced with tracemalloc (slower)")
+    parser.add_argument("--json", action="store_true",
+                        help="print results as JSON lines")
+    parser.add_argument("--profile", nargs="?", const="-", metavar="FILE",
+                        help="profile the run and print the hottest "
+                             "functions, or save the stats to FILE")
+    return parser
+
+
+def main(argv=None, stdin=None, stdout=None):
+    """
+    Run the command-line solver with arguments argv and return the exit
+    status: 0 if every puzzle was solved, 1 otherwise.
+
+    @type argv: list[str] | None
+    @type stdin: io.TextIOBase | None
+    @type stdout: io.TextIOBase | None
+    @rtype: int
+
+    >>> import io
+    >>> main(["mn", "--strategy", "ida"], io.StringIO("*2/13 12/3*\\n"))
+    ... # doctest: +ELLIPSIS
+    1: solved in 2 moves, ...s, 2 nodes expanded, peak frontier 2
+    0
+    """
+    args = build_parser().parse_args(argv)
+    if args.strategy is None:
+        args.strategy = DEFAULT_STRATEGIES.get(args.puzzle, "bfs")
+    stdin = sys.stdin if stdin is None else stdin
+    stdout = sys.stdout if stdout is None else stdout
+    if args.profile is not None and args.workers > 1:
+        print("--profile only covers this process; using one worker",
+              file=sys.stderr)
+        args.workers = 1
+    limits = {"deadline": args.deadline, "max_nodes": args.max_nodes,
+              "max_memory": args.max_memory}
+
+    def run(lines):
+        failed = 0
+        for record in iter_records(lines, args.puzzle, args.strategy,
+                                   limits, args.workers, args.trace_memory):
+            if not record.get("solved"):
+                failed += 1
+            if args.json:
+                write_result(stdout, record)
+            else:
+                print(format_record(record), file=stdout, flush=True)
+        return failed
+
+    lines = stdin if args.input == "-" else open(args.input)
+    try:
+        if args.profile is None:
+            failed = run(lines)
+        else:
+            profile = cProfile.Profile()
+            failed = profile.runcall(run, lines)
+            _report_profile(profile, args.profile)
+    finally:
+        if lines is not stdin:
+            lines.close()
+    return 0 if failed == 0 else 1
+
+
+def _report_profile(profile, path):
+    # the functions with the most time spent in them, or all stats saved
+    # to path for pstats or a viewer
+    if path != "-":
+        profile.dump_stats(path)
+        print("profile written to {}".format(path), file=sys.stderr)
+        return
+    out = io.StringIO()
+    stats = pstats.Stats(profile, stream=out)
+    stats.sort_stats("tottime").print_stats(25)
+    print(out.getvalue(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
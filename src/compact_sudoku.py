@@ -0,0 +1,317 @@
+"""
+Compact representation of sudoku puzzles for large searches.
+
+A CompactSudokuPuzzle holds only a reference to the SudokuLayout shared by
+every puzzle of its size and alphabet, and a bytes object with one symbol
+index per cell, so a state costs about n * n bytes instead of a list of
+n * n strings.
+"""
+from functools import lru_cache
+
+from .puzzle import Puzzle
+from .sudoku_puzzle import SudokuPuzzle, unit_table
+
+
+class SudokuLayout:
+    """
+    Immutable description of an nxn sudoku shared by all puzzles with the
+    same size and symbols: the alphabet, where index 0 stands for an empty
+    cell, and the unit tables.
+    """
+
+    __slots__ = ("n", "alphabet", "index", "places", "units", "peers",
+                 "full", "_table", "_template")
+
+    def __init__(self, n, symbol_set):
+        """
+        Create a new SudokuLayout self for nxn puzzles over symbol_set.
+
+        Use sudoku_layout to get the shared layout instead.
+
+        @type self: SudokuLayout
+        @type n: int
+        @type symbol_set: set[str] | frozenset[str]
+        @rtype: None
+        """
+        assert len(symbol_set) == n
+        self.n = n
+        self.alphabet = "*" + "".join(sorted(symbol_set))
+        self.index = {s: i for i, s in enumerate(self.alphabet)}
+        table = unit_table(n)
+        self.places, self.units = table[0], table[1] + table[2] + table[3]
+        # the other cells in the row, column and subsquare of every cell
+        self.peers = tuple(
+            tuple(sorted(set(table[1][row] + table[2][column] +
+                             table[3][subsquare]) - {i}))
+            for i, (row, column, subsquare) in enumerate(self.places))
+        self.full = (1 << n) - 1
+        # cells decoded as latin-1 and translated give the symbols, which
+        # fill in the template of the SudokuPuzzle string layout
+        self._table = {i: s for i, s in enumerate(self.alphabet)}
+        r = round(n ** (1 / 2))
+        rows = ["|".join(["{}" * r] * r)] * n
+        for row in range(n - r, 0, -r):
+            rows.insert(row, "-" * (n + r - 1))
+        self._template = "\n".join(rows)
+
+    def format(self, cells):
+        """
+        Return the string representation of symbol indices cells, as
+        for SudokuPuzzle.
+
+        @type self: SudokuLayout
+        @type cells: bytes
+        @rtype: str
+        """
+        return self._template.format(
+            *cells.decode("latin-1").translate(self._table))
+
+
+@lru_cache(maxsize=None)
+def _layout(n, symbols):
+    return SudokuLayout(n, symbols)
+
+
+def sudoku_layout(n, symbol_set):
+    """
+    Return the SudokuLayout shared by all nxn puzzles over symbol_set.
+
+    @type n: int
+    @type symbol_set: set[str] | frozenset[str]
+    @rtype: SudokuLayout
+
+    >>> layout = sudoku_layout(4, {"A", "B", "C", "D"})
+    >>> layout is sudoku_layout(4, {"D", "C", "B", "A"})
+    True
+    >>> layout.alphabet
+    '*ABCD'
+    """
+    return _layout(n, frozenset(symbol_set))
+
+
+class CompactSudokuPuzzle(Puzzle):
+    """
+    A sudoku puzzle stored as one byte per cell, 0 for an empty cell and
+    i for the i-th symbol of its layout's alphabet.
+    """
+
+    __slots__ = ("_layout", "_cells")
+
+    # every extension fills in one more cell
+    ACYCLIC = True
+
+    def __init__(self, layout, cells):
+        """
+        Create a new CompactSudokuPuzzle self with SudokuLayout layout and
+        symbol indices cells.
+
+        @type self: CompactSudokuPuzzle
+        @type layout: SudokuLayout
+        @type cells: bytes
+        @rtype: None
+        """
+        assert len(cells) == layout.n ** 2
+        self._layout, self._cells = layout, cells
+
+    @staticmethod
+    def from_puzzle(puzzle):
+        """
+        Return the CompactSudokuPuzzle equivalent to SudokuPuzzle puzzle.
+
+        @type puzzle: SudokuPuzzle
+        @rtype: CompactSudokuPuzzle
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["C", "D", "A", "B"]
+        >>> grid += ["B", "A", "D", "C"]
+        >>> grid += ["D", "C", "B", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> c = CompactSudokuPuzzle.from_puzzle(s)
+        >>> c.to_puzzle() == s
+        True
+        >>> str(c) == str(s)
+        True
+        """
+        layout = sudoku_layout(puzzle._n, puzzle._symbol_set)
+        index = layout.index
+        return CompactSudokuPuzzle(
+            layout, bytes([index[s] for s in puzzle._symbols]))
+
+    def to_puzzle(self):
+        """
+        Return the SudokuPuzzle equivalent to CompactSudokuPuzzle self.
+
+        @type self: CompactSudokuPuzzle
+        @rtype: SudokuPuzzle
+        """
+        layout = self._layout
+        return SudokuPuzzle(layout.n, [layout.alphabet[i]
+                                       for i in self._cells],
+                            set(layout.alphabet[1:]))
+
+    def __eq__(self, other):
+        """
+        Return whether CompactSudokuPuzzle self is equivalent to other.
+
+        @type self: CompactSudokuPuzzle
+        @type other: CompactSudokuPuzzle | Any
+        @rtype: bool
+        """
+        return (type(other) == type(self) and
+                self._layout is other._layout and
+                self._cells == other._cells)
+
+    def __hash__(self):
+        return hash(self._cells)
+
+    def __str__(self):
+        """
+        Return a human-readable string representation of
+        CompactSudokuPuzzle self, as for SudokuPuzzle.
+
+        >>> layout = sudoku_layout(4, {"A", "B", "C", "D"})
+        >>> print(CompactSudokuPuzzle(layout, bytes(range(5)) * 3 + bytes(1)))
+        *A|BC
+        D*|AB
+        -----
+        CD|*A
+        BC|D*
+        """
+        return self._layout.format(self._cells)
+
+    def is_solved(self):
+        """
+        Return whether CompactSudokuPuzzle self is solved.
+
+        @type self: CompactSudokuPuzzle
+        @rtype: bool
+
+        >>> layout = sudoku_layout(4, {"1", "2", "3", "4"})
+        >>> CompactSudokuPuzzle(layout, bytes.fromhex(
+        ...     "01020304" "03040102" "02010403" "04030201")).is_solved()
+        True
+        >>> CompactSudokuPuzzle(layout, bytes.fromhex(
+        ...     "01020304" "03040102" "02010403" "04030102")).is_solved()
+        False
+        """
+        cells, layout = self._cells, self._layout
+        if 0 in cells:
+            return False
+        for unit in layout.units:
+            mask = 0
+            for i in unit:
+                mask |= 1 << cells[i]
+            if mask >> 1 != layout.full:
+                return False
+        return True
+
+    def extensions(self):
+        """
+        Return list of extensions of CompactSudokuPuzzle self: every
+        symbol allowed in its first empty cell.
+
+        @type self: CompactSudokuPuzzle
+        @rtype: list[CompactSudokuPuzzle]
+
+        >>> layout = sudoku_layout(4, {"1", "2", "3", "4"})
+        >>> c = CompactSudokuPuzzle(layout, bytes.fromhex(
+        ...     "01020304" "03040102" "00000000" "00000000"))
+        >>> [e.move_to(x) for e in [c] for x in c.extensions()]
+        [(8, '2'), (8, '4')]
+        """
+        cells, layout = self._cells, self._layout
+        i = cells.find(0)
+        if i < 0:
+            return []
+        used = 0
+        for j in layout.peers[i]:
+            used |= 1 << cells[j]
+        head, tail = cells[:i], cells[i + 1:]
+        return [CompactSudokuPuzzle(layout, head + bytes((v,)) + tail)
+                for v in range(1, layout.n + 1) if not used >> v & 1]
+
+    def fail_fast(self):
+        """
+        Return True if some empty cell of CompactSudokuPuzzle self has no
+        symbol left that its row, column and subsquare do not already use.
+
+        @type self: CompactSudokuPuzzle
+        @rtype: bool
+
+        >>> layout = sudoku_layout(4, {"A", "B", "C", "D"})
+        >>> grid = ["A", "B", "D", "*"]
+        >>> grid += ["C", "D", "A", "B"]
+        >>> grid += ["B", "A", "D", "C"]
+        >>> grid += ["D", "C", "B", "A"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> CompactSudokuPuzzle.from_puzzle(s).fail_fast()
+        True
+        """
+        cells, layout = self._cells, self._layout
+        n = layout.n
+        rows, columns, subsquares = [0] * n, [0] * n, [0] * n
+        empty = []
+        for value, place in zip(cells, layout.places):
+            if value == 0:
+                empty.append(place)
+            else:
+                bit = 1 << value
+                row, column, subsquare = place
+                rows[row] |= bit
+                columns[column] |= bit
+                subsquares[subsquare] |= bit
+
+        # bit 0 stands for empty cells and is never set
+        full = layout.full << 1
+        for row, column, subsquare in empty:
+            if rows[row] | columns[column] | subsquares[subsquare] == full:
+                return True
+        return False
+
+    def size(self):
+        """
+        Return n for CompactSudokuPuzzle self of n rows and n columns.
+
+        @type self: CompactSudokuPuzzle
+        @rtype: int
+        """
+        return self._layout.n
+
+    def move_to(self, other):
+        """
+        Return (position, symbol) for the cell filled in to turn
+        CompactSudokuPuzzle self into its extension other.
+
+        @type self: CompactSudokuPuzzle
+        @type other: CompactSudokuPuzzle
+        @rtype: tuple(int, str)
+        """
+        for i, (a, b) in enumerate(zip(self._cells, other._cells)):
+            if a != b:
+                return i, self._layout.alphabet[b]
+        return None
+
+    def apply_move(self, move):
+        """
+        Return the extension of CompactSudokuPuzzle self with symbol
+        move[1] at position move[0].
+
+        @type self: CompactSudokuPuzzle
+        @type move: tuple(int, str)
+        @rtype: CompactSudokuPuzzle
+
+        >>> layout = sudoku_layout(4, {"1", "2", "3", "4"})
+        >>> c = CompactSudokuPuzzle(layout, bytes(16))
+        >>> c.apply_move((5, "3"))._cells[5]
+        3
+        """
+        i, symbol = move
+        cells = self._cells
+        return CompactSudokuPuzzle(
+            self._layout,
+            cells[:i] + bytes((self._layout.index[symbol],)) + cells[i + 1:])
+
+
+if __name__ == "__main__":
+    import doctest
+    doctest.testmod()
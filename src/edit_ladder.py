@@ -0,0 +1,361 @@
+"""
+Word ladders whose steps are single edits: a letter substituted, inserted
+or deleted, so that ladders may connect words of different lengths.
+
+Neighbours are found with a deletion index in the style of symmetric-
+delete spelling correction: every word is filed under each string left by
+deleting one of its letters. Two words one edit apart then meet under a
+shared key, or one is a key of the other, so all neighbours of a word are
+found with about as many dictionary lookups as it has letters, instead of
+trying every letter of the alphabet at every position.
+"""
+from collections import OrderedDict
+
+from .puzzle import Puzzle
+
+# cost of each kind of edit unless others are given
+DEFAULT_COSTS = {"substitute": 1, "insert": 1, "delete": 1}
+# words whose neighbours a DeletionIndex remembers
+MAX_NEIGHBOURS = 65536
+# word sets whose DeletionIndex deletion_index keeps
+MAX_INDEXES = 4
+
+
+class DeletionIndex:
+    """
+    A dictionary of words with, for each word length, the words filed
+    under every string left by deleting one of their letters. The index
+    of a length is built the first time it is needed.
+    """
+
+    def __init__(self, words):
+        """
+        Create a new DeletionIndex self over the words in words.
+
+        @type self: DeletionIndex
+        @type words: Iterable[str]
+        @rtype: None
+        """
+        # word length -> set of words
+        self._words = {}
+        for word in words:
+            self._words.setdefault(len(word), set()).add(word)
+        # word length -> deletion -> list of (deleted position, word)
+        self._deletions = {}
+        # word -> list of (move, neighbour), filled in as asked for; the
+        # oldest is forgotten once MAX_NEIGHBOURS words are remembered
+        self._neighbours = {}
+
+    def __contains__(self, word):
+        return word in self._words.get(len(word), ())
+
+    def __eq__(self, other):
+        """
+        Return whether DeletionIndex self holds the same words as other.
+
+        @type self: DeletionIndex
+        @type other: DeletionIndex | Any
+        @rtype: bool
+
+        >>> DeletionIndex(["cat", "at"]) == DeletionIndex(["at", "cat"])
+        True
+        """
+        return (type(other) == type(self) and
+                (self is other or self._words == other._words))
+
+    __hash__ = None
+
+    def _deletions_of(self, length):
+        # the deletion index of the words of length, built on first use
+        if length not in self._deletions:
+            index = {}
+            for word in self._words.get(length, ()):
+                for i in range(length):
+                    index.setdefault(word[:i] + word[i + 1:], []).append(
+                        (i, word))
+            self._deletions[length] = index
+        return self._deletions[length]
+
+    def neighbours(self, word):
+        """
+        Return (move, neighbour) for every word of DeletionIndex self one
+        edit away from word, where move is ("substitute", position,
+        letter), ("insert", position, letter) or ("delete", position).
+
+        @type self: DeletionIndex
+        @type word: str
+        @rtype: list[tuple(tuple, str)]
+
+        >>> index = DeletionIndex(["cat", "cot", "at", "cart", "dog"])
+        >>> for move, neighbour in index.neighbours("cat"):
+        ...     print(move, neighbour)
+        ('delete', 0) at
+        ('substitute', 1, 'o') cot
+        ('insert', 2, 'r') cart
+        """
+        if word in self._neighbours:
+            return self._neighbours[word]
+        length, found = len(word), {}
+        shorter = self._words.get(length - 1, ())
+        same_length = self._deletions_of(length)
+        for i in range(length):
+            deleted = word[:i] + word[i + 1:]
+            # word minus a letter is a word
+            if deleted in shorter and deleted not in found:
+                found[deleted] = ("delete", i)
+            # a word with the same letters except at position i
+            for j, other in same_length.get(deleted, ()):
+                if j == i and other != word and other not in found:
+                    found[other] = ("substitute", i, other[i])
+        # a word that is word plus a letter
+        for j, other in self._deletions_of(length + 1).get(word, ()):
+            if other not in found:
+                found[other] = ("insert", j, other[j])
+        result = [(move, other) for other, move in found.items()]
+        if len(self._neighbours) >= MAX_NEIGHBOURS:
+            del self._neighbours[next(iter(self._neighbours))]
+        self._neighbours[word] = result
+        return result
+
+
+# id of a word set -> (word set, its DeletionIndex), least recently used
+# first
+_indexes = OrderedDict()
+
+
+def deletion_index(words):
+    """
+    Return the DeletionIndex of the word set words, built the first time
+    and shared by later calls with the same word set object, such as the
+    dictionaries returned by load_dictionary. Only the indexes of the
+    MAX_INDEXES word sets used last are kept.
+
+    @type words: set[str] | WordBucket
+    @rtype: DeletionIndex
+
+    >>> words = {"cat", "cot"}
+    >>> deletion_index(words) is deletion_index(words)
+    True
+    """
+    entry = _indexes.pop(id(words), None)
+    if entry is None or entry[0] is not words:
+        entry = (words, DeletionIndex(words))
+    _indexes[id(words)] = entry
+    while len(_indexes) > MAX_INDEXES:
+        _indexes.popitem(last=False)
+    return entry[1]
+
+
+def edit_distance(a, b):
+    """
+    Return the least number of letters substituted, inserted or deleted to
+    turn a into b.
+
+    @type a: str
+    @type b: str
+    @rtype: int
+
+    >>> edit_distance("cost", "coast"), edit_distance("kitten", "sitting")
+    (1, 3)
+    """
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1,
+                               previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+class EditLadderPuzzle(Puzzle):
+    """
+    A word ladder where each step substitutes, inserts or deletes one
+    letter, at a cost depending on the kind of edit.
+    """
+
+    def __init__(self, from_word, to_word, words, costs=None):
+        """
+        Create a new EditLadderPuzzle self stepping from from_word to
+        to_word through words, a DeletionIndex or a word set whose shared
+        index is used, where each kind of edit costs costs[kind], or 1 for
+        kinds not in costs.
+
+        @type self: EditLadderPuzzle
+        @type from_word: str
+        @type to_word: str
+        @type words: DeletionIndex | set[str]
+        @type costs: dict[str, int | float] | None
+        @rtype: None
+        """
+        self._from_word, self._to_word = from_word, to_word
+        self._index = words if isinstance(words, DeletionIndex) \
+            else deletion_index(words)
+        self._costs = DEFAULT_COSTS if costs is None else dict(
+            DEFAULT_COSTS, **costs)
+
+    def __eq__(self, other):
+        """
+        Return whether EditLadderPuzzle self is equivalent to other.
+
+        @type self: EditLadderPuzzle
+        @type other: EditLadderPuzzle | Any
+        @rtype: bool
+
+        >>> index = DeletionIndex(["cat", "cot"])
+        >>> EditLadderPuzzle("cat", "cot", index) == EditLadderPuzzle(
+        ...     "cat", "cot", index)
+        True
+        """
+        return (type(other) == type(self) and
+                self._from_word == other._from_word and
+                self._to_word == other._to_word and
+                (self._index is other._index or
+                 self._index == other._index) and
+                self._costs == other._costs)
+
+    def __hash__(self):
+        return hash((self._from_word, self._to_word))
+
+    def __str__(self):
+        """
+        Return a human-readable string representation of EditLadderPuzzle
+        self.
+
+        >>> print(EditLadderPuzzle("cat", "cart", DeletionIndex([])))
+        cat -> cart
+        """
+        return self._from_word + " -> " + self._to_word
+
+    def _step(self, word):
+        # the extension of self at word
+        ext = EditLadderPuzzle.__new__(EditLadderPuzzle)
+        ext._from_word, ext._to_word = word, self._to_word
+        ext._index, ext._costs = self._index, self._costs
+        return ext
+
+    def extensions(self):
+        """
+        Return list of extensions of EditLadderPuzzle self: the words one
+        edit away from from_word.
+
+        @type self: EditLadderPuzzle
+        @rtype: list[EditLadderPuzzle]
+
+        >>> index = DeletionIndex(["cat", "cot", "at", "cart"])
+        >>> sorted([str(e) for e in
+        ...         EditLadderPuzzle("cat", "cart", index).extensions()])
+        ['at -> cart', 'cart -> cart', 'cot -> cart']
+        """
+        return [self._step(word) for _, word
+                in self._index.neighbours(self._from_word)]
+
+    def successors(self, history=()):
+        """
+        Return the extensions of EditLadderPuzzle self as (edit, extension)
+        pairs.
+
+        @type self: EditLadderPuzzle
+        @type history: Sequence[tuple]
+        @rtype: list[tuple(tuple, EditLadderPuzzle)]
+        """
+        return [(move, self._step(word)) for move, word
+                in self._index.neighbours(self._from_word)]
+
+    def is_solved(self):
+        """
+        Return whether from_word of EditLadderPuzzle self is to_word.
+
+        @type self: EditLadderPuzzle
+        @rtype: bool
+        """
+        return self._from_word == self._to_word
+
+    def heuristic(self):
+        """
+        Return the edit distance from from_word to to_word of
+        EditLadderPuzzle self times the cost of the cheapest edit, a lower
+        bound of the cost left.
+
+        @type self: EditLadderPuzzle
+        @rtype: int | float
+
+        >>> EditLadderPuzzle("cat", "cart", DeletionIndex([]),
+        ...                  {"insert": 3}).heuristic()
+        1
+        """
+        return (edit_distance(self._from_word, self._to_word) *
+                min(self._costs.values()))
+
+    def move_cost(self, move):
+        """
+        Return the cost of the kind of edit move.
+
+        @type self: EditLadderPuzzle
+        @type move: tuple
+        @rtype: int | float
+        """
+        return self._costs[move[0]]
+
+    def size(self):
+        """
+        Return the length of from_word of EditLadderPuzzle self.
+
+        @type self: EditLadderPuzzle
+        @rtype: int
+        """
+        return len(self._from_word)
+
+    def move_to(self, other):
+        """
+        Return the edit turning EditLadderPuzzle self into its extension
+        other.
+
+        @type self: EditLadderPuzzle
+        @type other: EditLadderPuzzle
+        @rtype: tuple
+        """
+        for move, word in self._index.neighbours(self._from_word):
+            if word == other._from_word:
+                return move
+        return None
+
+    def apply_move(self, move):
+        """
+        Return the extension of EditLadderPuzzle self reached by the edit
+        move.
+
+        @type self: EditLadderPuzzle
+        @type move: tuple
+        @rtype: EditLadderPuzzle
+
+        >>> index = DeletionIndex(["cat", "cart"])
+        >>> print(EditLadderPuzzle("cat", "cart", index).apply_move(
+        ...     ("insert", 2, "r")))
+        cart -> cart
+        """
+        word = self._from_word
+        if move[0] == "substitute":
+            word = word[:move[1]] + move[2] + word[move[1] + 1:]
+        elif move[0] == "insert":
+            word = word[:move[1]] + move[2] + word[move[1]:]
+        elif move[0] == "delete":
+            word = word[:move[1]] + word[move[1] + 1:]
+        else:
+            raise ValueError("illegal move: {}".format(move))
+        return self._step(word)
+
+
+if __name__ == "__main__":
+    import doctest
+    from time import time
+
+    from .puzzle_tools import astar_solution
+    from .word_dictionary import load_dictionary
+    doctest.testmod()
+
+    start = time()
+    solution = astar_solution(
+        EditLadderPuzzle("cat", "horse", load_dictionary()))
+    print("Solved cat -> horse in {} seconds:\n{}".format(
+        time() - start, solution))
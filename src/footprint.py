@@ -0,0 +1,199 @@
+"""
+Memory footprint of puzzle states and of searches.
+
+deep_size follows references from an object through containers, instance
+dictionaries and slots and adds up the sizes of everything it reaches, so
+the cost of one more state can be measured before sizing a job. Context
+shared by all states of a puzzle, such as a dictionary of words or a
+target grid, is left out of the cost per state. traced_peak runs a
+function under tracemalloc and reports the peak memory it allocated.
+"""
+import sys
+import tracemalloc
+import types
+
+from .puzzle_tools import PuzzleNode
+
+# objects never counted: they belong to the program, not to any state
+_SKIPPED = (type, types.ModuleType, types.FunctionType,
+            types.BuiltinFunctionType, types.MethodType)
+# objects with no references worth following
+_ATOMIC = (str, bytes, bytearray, int, float, complex, bool, range,
+           memoryview)
+
+# bytes a set needs per entry for its hash table, besides the entry itself
+SET_ENTRY_SIZE = sys.getsizeof(set(range(1 << 12))) // (1 << 12)
+
+
+def _references(obj):
+    # the objects obj refers to that make up its value
+    if isinstance(obj, _ATOMIC):
+        return []
+    if isinstance(obj, dict):
+        return list(obj.keys()) + list(obj.values())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return list(obj)
+    refs = []
+    if hasattr(obj, "__dict__"):
+        refs.append(obj.__dict__)
+    for cls in type(obj).__mro__:
+        slots = cls.__dict__.get("__slots__", ())
+        for name in [slots] if isinstance(slots, str) else slots:
+            if name != "__dict__" and hasattr(obj, name):
+                refs.append(getattr(obj, name))
+    return refs
+
+
+def reachable(obj):
+    """
+    Return the ids of obj and of every object reachable from it, as
+    counted by deep_size.
+
+    @type obj: Any
+    @rtype: set[int]
+    """
+    seen, stack = set(), [obj]
+    while len(stack) > 0:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SKIPPED):
+            continue
+        seen.add(id(item))
+        stack.extend(_references(item))
+    return seen
+
+
+def deep_size(obj, exclude=()):
+    """
+    Return the size in bytes of obj and of every object reachable from it,
+    each counted once, leaving out the objects whose ids are in exclude.
+
+    @type obj: Any
+    @type exclude: set[int] | tuple
+    @rtype: int
+
+    >>> cells = ("ab", "cd")
+    >>> deep_size(cells) == (sys.getsizeof(cells) + sys.getsizeof("ab") +
+    ...                      sys.getsizeof("cd"))
+    True
+    >>> deep_size([cells, cells]) == sys.getsizeof([1, 2]) + deep_size(cells)
+    True
+    >>> deep_size([cells], reachable(cells)) == sys.getsizeof([1])
+    True
+    """
+    seen, stack, total = set(exclude), [obj], 0
+    while len(stack) > 0:
+        item = stack.pop()
+        if id(item) in seen or isinstance(item, _SKIPPED):
+            continue
+        seen.add(id(item))
+        total += sys.getsizeof(item)
+        stack.extend(_references(item))
+    return total
+
+
+def state_size(puzzle):
+    """
+    Return the mean number of bytes each extension of puzzle takes beyond
+    what it shares with puzzle: the cost of one more state in a search.
+    Return the deep size of puzzle itself if it has no extensions.
+
+    @type puzzle: Puzzle
+    @rtype: int
+
+    >>> from .registry import puzzle_class
+    >>> WordLadderPuzzle = puzzle_class("word_ladder")
+    >>> words = set(["cost", "cast", "case", "vase"] * 100 +
+    ...             [str(i) for i in range(1000)])
+    >>> wlp = WordLadderPuzzle("cost", "vase", words)
+    >>> state_size(wlp) < deep_size(words) // 10
+    True
+    """
+    extensions = puzzle.extensions()
+    if len(extensions) == 0:
+        return deep_size(puzzle)
+    shared = reachable(puzzle)
+    return sum([deep_size(ext, shared) for ext in extensions]) // len(
+        extensions)
+
+
+def footprint(puzzle):
+    """
+    Return the bytes taken by puzzle and by the structures a search builds
+    around the states reached from it:
+
+        puzzle         puzzle with everything it refers to
+        state          one more state, as for state_size
+        node           a PuzzleNode holding a state, without the state
+        visited_entry  one entry of a visited set keyed by str(state)
+
+    @type puzzle: Puzzle
+    @rtype: dict[str, int]
+
+    >>> from .registry import puzzle_class
+    >>> grid = (("1", "2", "3"), ("4", "*", "5"))
+    >>> sizes = footprint(puzzle_class("mn")(grid, grid))
+    >>> sorted(sizes)
+    ['node', 'puzzle', 'state', 'visited_entry']
+    >>> 0 < sizes["state"] < sizes["puzzle"]
+    True
+    """
+    extensions = puzzle.extensions()
+    state = extensions[0] if len(extensions) > 0 else puzzle
+    parent = PuzzleNode(puzzle)
+    node = PuzzleNode(state, None, parent)
+    return {"puzzle": deep_size(puzzle),
+            "state": state_size(puzzle),
+            "node": deep_size(node, reachable(state) | reachable(parent)),
+            "visited_entry": sys.getsizeof(str(state)) + SET_ENTRY_SIZE}
+
+
+def traced_peak(function, *args, **kwargs):
+    """
+    Return (result, peak) for the call function(*args, **kwargs), where
+    peak is the most memory in bytes allocated during the call beyond
+    what was allocated when it started, as traced by tracemalloc.
+
+    tracemalloc slows allocation down, so timings taken during the call
+    are not comparable with untraced ones. If tracemalloc is already
+    tracing, its peak is reset.
+
+    @type function: Callable
+    @rtype: tuple(Any, int)
+
+    >>> result, peak = traced_peak(lambda n: len([0] * n), 100000)
+    >>> result, peak >= 800000
+    (100000, True)
+    """
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline = tracemalloc.get_traced_memory()[0]
+    try:
+        result = function(*args, **kwargs)
+        peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        if started:
+            tracemalloc.stop()
+    return result, max(peak, 0)
+
+
+if __name__ == "__main__":
+    from .compact_sudoku import CompactSudokuPuzzle
+    from .puzzle_io import PARSERS
+
+    # the footprint of a typical puzzle of each type
+    examples = {
+        "sudoku": "53..7....6..195....98....6.8...6...34..8.3..17...2..."
+                  "6.6....28....419..5....8..79",
+        "mn": "1234/5678/9abc/def* 1234/5678/9abc/def*",
+        "peg": "##***##/##***##/*******/***.***/*******/##***##/##***##",
+        "word_ladder": "cost save"}
+    puzzles = {kind: PARSERS[kind](line) for kind, line in examples.items()}
+    puzzles["compact_sudoku"] = CompactSudokuPuzzle.from_puzzle(
+        puzzles["sudoku"])
+    print("{:14} {:>8} {:>8} {:>8} {:>14}".format(
+        "puzzle", "puzzle", "state", "node", "visited entry"))
+    for kind, puzzle in puzzles.items():
+        print("{:14} {puzzle:>8} {state:>8} {node:>8} {visited_entry:>14}"
+              .format(kind, **footprint(puzzle)))
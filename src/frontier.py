@@ -0,0 +1,262 @@
+"""
+Frontiers: the collections of nodes waiting to be expanded by a search.
+
+Every frontier has the same interface, push(item, priority) and pop(),
+so a search can be run with a different expansion order by passing a
+different frontier. Each reports its current size with len() and the
+largest size it reached as peak.
+"""
+import heapq
+from collections import deque
+from itertools import count
+
+
+class Frontier:
+    """
+    Items waiting to be expanded, removed in an order that depends on the
+    kind of frontier.
+    """
+
+    def __init__(self):
+        """
+        Create a new, empty Frontier self.
+
+        @type self: Frontier
+        @rtype: None
+        """
+        self.peak = 0
+
+    def push(self, item, priority=0):
+        """
+        Add item to Frontier self, with priority where the frontier
+        orders items by priority.
+
+        This is an abstract method that must be implemented in a
+        subclass.
+
+        @type self: Frontier
+        @type item: Any
+        @type priority: int | float | tuple
+        @rtype: None
+        """
+        raise NotImplementedError
+
+    def pop(self):
+        """
+        Remove and return the next item of Frontier self. Raise IndexError
+        if it is empty.
+
+        This is an abstract method that must be implemented in a
+        subclass.
+
+        @type self: Frontier
+        @rtype: Any
+        """
+        raise NotImplementedError
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def __iter__(self):
+        """
+        Yield the items of Frontier self, in no particular order.
+
+        This is an abstract method that must be implemented in a
+        subclass.
+
+        @type self: Frontier
+        @rtype: generator[Any]
+        """
+        raise NotImplementedError
+
+    def _grown(self):
+        # record the size after a push
+        if len(self) > self.peak:
+            self.peak = len(self)
+
+
+class StackFrontier(Frontier):
+    """
+    Last in, first out, for depth-first search. Priorities are ignored.
+    """
+
+    def __init__(self):
+        """
+        Create a new, empty StackFrontier self.
+
+        @type self: StackFrontier
+        @rtype: None
+
+        >>> frontier = StackFrontier()
+        >>> for item in "abc":
+        ...     frontier.push(item)
+        >>> frontier.pop(), len(frontier), frontier.peak
+        ('c', 2, 3)
+        """
+        Frontier.__init__(self)
+        self._items = []
+
+    def push(self, item, priority=0):
+        self._items.append(item)
+        self._grown()
+
+    def pop(self):
+        if len(self._items) == 0:
+            raise IndexError("pop from an empty frontier")
+        return self._items.pop()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class FifoFrontier(Frontier):
+    """
+    First in, first out, for breadth-first search. Priorities are ignored.
+    """
+
+    def __init__(self):
+        """
+        Create a new, empty FifoFrontier self.
+
+        @type self: FifoFrontier
+        @rtype: None
+
+        >>> frontier = FifoFrontier()
+        >>> for item in "abc":
+        ...     frontier.push(item)
+        >>> frontier.pop(), len(frontier), frontier.peak
+        ('a', 2, 3)
+        """
+        Frontier.__init__(self)
+        self._items = deque()
+
+    def push(self, item, priority=0):
+        self._items.append(item)
+        self._grown()
+
+    def pop(self):
+        if len(self._items) == 0:
+            raise IndexError("pop from an empty frontier")
+        return self._items.popleft()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __iter__(self):
+        return iter(self._items)
+
+
+class HeapFrontier(Frontier):
+    """
+    Lowest priority first, kept in a binary heap. Items with equal
+    priorities come out in the order they were pushed, and are never
+    compared themselves.
+    """
+
+    def __init__(self):
+        """
+        Create a new, empty HeapFrontier self.
+
+        @type self: HeapFrontier
+        @rtype: None
+
+        >>> frontier = HeapFrontier()
+        >>> for item, priority in [("a", 2.5), ("b", 1), ("c", 1)]:
+        ...     frontier.push(item, priority)
+        >>> frontier.pop(), frontier.pop(), frontier.peak
+        ('b', 'c', 3)
+        """
+        Frontier.__init__(self)
+        self._heap, self._tie = [], count()
+
+    def push(self, item, priority=0):
+        heapq.heappush(self._heap, (priority, next(self._tie), item))
+        self._grown()
+
+    def pop(self):
+        if len(self._heap) == 0:
+            raise IndexError("pop from an empty frontier")
+        return heapq.heappop(self._heap)[2]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __iter__(self):
+        return (item for _, _, item in self._heap)
+
+
+class BucketFrontier(Frontier):
+    """
+    Lowest priority first, for small non-negative integer priorities such
+    as move counts plus an integer heuristic: one list of items per
+    priority, so push and pop take constant time instead of the
+    logarithmic time of a heap. Among items with equal priorities the last
+    pushed comes out first, which favours the deepest nodes.
+    """
+
+    def __init__(self):
+        """
+        Create a new, empty BucketFrontier self.
+
+        @type self: BucketFrontier
+        @rtype: None
+
+        >>> frontier = BucketFrontier()
+        >>> for item, priority in [("a", 3), ("b", 1), ("c", 1), ("d", 0)]:
+        ...     frontier.push(item, priority)
+        >>> [frontier.pop() for _ in range(4)]
+        ['d', 'c', 'b', 'a']
+        >>> frontier.push("e", -1)
+        Traceback (most recent call last):
+        ...
+        ValueError: priority must be a non-negative integer: -1
+        """
+        Frontier.__init__(self)
+        # _buckets[p] holds the items of priority p; every bucket below
+        # _lowest is empty
+        self._buckets, self._lowest, self._size = [], 0, 0
+
+    def push(self, item, priority=0):
+        if priority < 0 or priority != int(priority):
+            raise ValueError(
+                "priority must be a non-negative integer: {}".format(
+                    priority))
+        priority = int(priority)
+        while len(self._buckets) <= priority:
+            self._buckets.append([])
+        self._buckets[priority].append(item)
+        if priority < self._lowest:
+            self._lowest = priority
+        self._size += 1
+        self._grown()
+
+    def pop(self):
+        if self._size == 0:
+            raise IndexError("pop from an empty frontier")
+        while len(self._buckets[self._lowest]) == 0:
+            self._lowest += 1
+        self._size -= 1
+        return self._buckets[self._lowest].pop()
+
+    def lowest_priority(self):
+        """
+        Return the lowest priority of an item in BucketFrontier self, or
+        None if it is empty.
+
+        @type self: BucketFrontier
+        @rtype: int | None
+        """
+        if self._size == 0:
+            return None
+        while len(self._buckets[self._lowest]) == 0:
+            self._lowest += 1
+        return self._lowest
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self):
+        return (item for bucket in self._buckets for item in bucket)
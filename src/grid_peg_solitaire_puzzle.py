@@ -1,8 +1,11 @@
+from functools import lru_cache
+
 from .puzzle import Puzzle
 from .mn_puzzle import is_valid_location
-from .puzzle_tools import depth_first_solve
+from .peg_endgame import build_endgame_database
+from .puzzle_tools import memoized_depth_first_solution
+from .solution import Solution
 from time import time
-import doctest
 
 
 class GridPegSolitairePuzzle(Puzzle):
@@ -11,15 +14,22 @@ class GridPegSolitairePuzzle(Puzzle):
     unsolved, or even unsolvable.
     """
 
-    def __init__(self, marker, marker_set):
+    # every extension removes one peg
+    ACYCLIC = True
+
+    def __init__(self, marker, marker_set, endgame=None):
         """
         Create a new GridPegSolitairePuzzle self with
         marker indicating pegs, spaces, and unused
         and marker_set indicating allowed markers.
 
+        An EndgameDatabase endgame for the board, if given, is consulted
+        by fail_fast and passed on to every extension.
+
         @type marker: list[list[str]]
         @type marker_set: set[str]
                           "#" for unused, "*" for peg, "." for empty
+        @type endgame: EndgameDatabase | None
         """
         assert isinstance(marker, list)
         assert len(marker) > 0
@@ -27,6 +37,9 @@ class GridPegSolitairePuzzle(Puzzle):
         assert all([all(x in marker_set for x in row) for row in marker])
         assert all([x == "*" or x == "." or x == "#" for x in marker_set])
         self._marker, self._marker_set = marker, marker_set
+        self._endgame = endgame
+        # the markers of all rows as one string, for equality and hashing
+        self._key = "".join(["".join(row) for row in marker])
 
     def __eq__(self, other):
         """
@@ -61,8 +74,13 @@ class GridPegSolitairePuzzle(Puzzle):
         """
 
         return (type(other) == type(self) and
-                self._marker == other._marker and
-                self._marker_set == other._marker_set)
+                len(self._marker[0]) == len(other._marker[0]) and
+                self._key == other._key and
+                (self._marker_set is other._marker_set or
+                 self._marker_set == other._marker_set))
+
+    def __hash__(self):
+        return hash(self._key)
 
     def __str__(self):
         """
@@ -143,15 +161,15 @@ class GridPegSolitairePuzzle(Puzzle):
 
             max_rows, max_columns = len(self._marker), len(self._marker[0])
 
-            #  copy two dimensional array (can also use copy, deepcopy)
-            grid_c = [row[:] for row in self._marker]
-
             # calculate position of peg that will be jumped over and eliminated
             over = int((start[0] + empty[0])/2), int((start[1] + empty[1])/2)
 
             if is_valid_location(start, max_rows, max_columns) \
                     and has_peg(start) and has_peg(over):
 
+                #  copy two dimensional array, only for legal jumps
+                grid_c = [row[:] for row in self._marker]
+
                 # perform peg jump into empty space
                 grid_c[start[0]][start[1]] = "."
                 grid_c[empty[0]][empty[1]] = "*"
@@ -160,11 +178,12 @@ class GridPegSolitairePuzzle(Puzzle):
                 grid_c[over[0]][over[1]] = "."
 
                 # return valid extension
-                return GridPegSolitairePuzzle(grid_c, self._marker_set)
+                return GridPegSolitairePuzzle(grid_c, self._marker_set,
+                                              self._endgame)
             else:
                 return None
 
-        extensions = []
+        extensions, seen = [], set()
 
         # positions of all empty spaces .
         for item in find_all(self._marker, "."):
@@ -184,11 +203,60 @@ class GridPegSolitairePuzzle(Puzzle):
             # valid extension otherwise None
             for sol in potential_jumps:
                 gpsp = jump(sol, space)
-                if gpsp is not None and gpsp not in extensions:
+                if gpsp is not None and gpsp not in seen:
+                    seen.add(gpsp)
                     extensions.append(gpsp)
 
         return extensions
 
+    def fail_fast(self):
+        """
+        Return True if the endgame database of GridPegSolitairePuzzle self
+        shows it cannot be reduced to a single peg. Without a database, or
+        with more pegs than it covers, return False.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: bool
+
+        >>> from .peg_endgame import build_endgame_database
+        >>> db = build_endgame_database(["....", "...."], 3)
+        >>> grid = [["*", ".", "*", "."], [".", ".", ".", "."]]
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}, db).fail_fast()
+        True
+        >>> GridPegSolitairePuzzle(grid, {"*", ".", "#"}).fail_fast()
+        False
+        """
+        return (self._endgame is not None and
+                self._endgame.lookup(self._marker) is False)
+
+    def canonical_key(self):
+        """
+        Return the board shape of GridPegSolitairePuzzle self and the
+        smallest of its board strings under the rotations and reflections
+        that map the shape onto itself. Symmetric positions win or lose
+        alike; boards of different shapes never share a key.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: str
+
+        >>> a = GridPegSolitairePuzzle([["*", "*", "."]], {"*", ".", "#"})
+        >>> b = GridPegSolitairePuzzle([[".", "*", "*"]], {"*", ".", "#"})
+        >>> a.canonical_key() == b.canonical_key()
+        True
+        >>> GridPegSolitairePuzzle([["*", "*"], [".", "."], [".", "."]],
+        ...                        {"*", ".", "#"}).canonical_key()
+        '3x2:**....'
+        >>> GridPegSolitairePuzzle([["*", "*", "."], [".", ".", "."]],
+        ...                        {"*", ".", "#"}).canonical_key()
+        '2x3:**....'
+        """
+        key = self._key
+        rows, columns = len(self._marker), len(self._marker[0])
+        return "{}x{}:{}".format(rows, columns, min(
+            ["".join([key[i] for i in permutation])
+             for permutation in board_symmetries(
+                 rows, columns, key.replace("*", "."))]))
+
     def is_solved(self):
         """
         # A configuration is solved when there is exactly one "*" left
@@ -217,6 +285,147 @@ class GridPegSolitairePuzzle(Puzzle):
         indices = find_all(self._marker, "*")
         return len(indices) == 1
 
+    def size(self):
+        """
+        Return the number of pegs of GridPegSolitairePuzzle self.
+
+        @type self: GridPegSolitairePuzzle
+        @rtype: int
+
+        >>> GridPegSolitairePuzzle([["*", "*", "."]], {"*", ".", "#"}).size()
+        2
+        """
+        return self._key.count("*")
+
+    def move_to(self, other):
+        """
+        Return the jump (start, over, end) that turns GridPegSolitairePuzzle
+        self into its extension other: the peg at start jumps over the peg
+        at over, which is removed, and lands on end.
+
+        @type self: GridPegSolitairePuzzle
+        @type other: GridPegSolitairePuzzle
+        @rtype: tuple(tuple(int, int), tuple(int, int), tuple(int, int))
+
+        >>> grid = [[".", "*", "*", "#"]]
+        >>> gpsp = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> ext = GridPegSolitairePuzzle([["*", ".", ".", "#"]],
+        ...                              {"*", ".", "#"})
+        >>> gpsp.move_to(ext)
+        ((0, 2), (0, 1), (0, 0))
+        """
+        emptied = [(r, c) for (r, c) in find_all(self._marker, "*")
+                   if other._marker[r][c] == "."]
+        end = [(r, c) for (r, c) in find_all(other._marker, "*")
+               if self._marker[r][c] == "."][0]
+        over = [p for p in emptied
+                if abs(p[0] - end[0]) + abs(p[1] - end[1]) == 1][0]
+        start = [p for p in emptied if p != over][0]
+        return start, over, end
+
+    def apply_move(self, move):
+        """
+        Return the extension of GridPegSolitairePuzzle self after the jump
+        move = (start, over, end).
+
+        @type self: GridPegSolitairePuzzle
+        @type move: tuple(tuple(int, int), tuple(int, int), tuple(int, int))
+        @rtype: GridPegSolitairePuzzle
+
+        >>> grid = [[".", "*", "*", "#"]]
+        >>> gpsp = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+        >>> print(gpsp.apply_move(((0, 2), (0, 1), (0, 0))))
+        *..#
+        """
+        start, over, end = move
+        grid_c = [row[:] for row in self._marker]
+        grid_c[start[0]][start[1]] = "."
+        grid_c[over[0]][over[1]] = "."
+        grid_c[end[0]][end[1]] = "*"
+        return GridPegSolitairePuzzle(grid_c, self._marker_set,
+                                      self._endgame)
+
+
+def endgame_solution(puzzle, budget=None, dead=None):
+    """
+    Return the Solution for GridPegSolitairePuzzle puzzle found by
+    EndgameDatabase.solve with the endgame database of puzzle, or with one
+    of single pegs if puzzle has none for its board; None if there is no
+    solution, or BudgetExceeded if SearchBudget budget runs out first.
+    The set dead holds the peg bitmasks of positions proven lost, as for
+    EndgameDatabase.solve.
+
+    @type puzzle: GridPegSolitairePuzzle
+    @type budget: SearchBudget | None
+    @type dead: set[int] | None
+    @rtype: Solution | BudgetExceeded | None
+
+    The 33-hole English board, with an endgame database of up to 6 pegs:
+
+    >>> english = ["##***##", "##***##", "*******", "***.***",
+    ...            "*******", "##***##", "##***##"]
+    >>> db = build_endgame_database(english, 6)
+    >>> puzzle = GridPegSolitairePuzzle([list(row) for row in english],
+    ...                                 {"*", ".", "#"}, db)
+    >>> solution = endgame_solution(puzzle)
+    >>> len(solution.moves), solution.final().is_solved()
+    (31, True)
+    """
+    if not isinstance(puzzle, GridPegSolitairePuzzle):
+        raise ValueError("endgame search needs a peg solitaire puzzle, "
+                         "not {}".format(type(puzzle).__name__))
+    db = puzzle._endgame
+    pegs = None if db is None else db.pegs(puzzle._marker)
+    if pegs is None:
+        db = build_endgame_database(
+            ["".join([x if x == "#" else "." for x in row])
+             for row in puzzle._marker], 1)
+        pegs = db.pegs(puzzle._marker)
+    jumps = db.solve(pegs, budget, dead)
+    if not isinstance(jumps, list):
+        return jumps
+    return Solution(puzzle, [tuple([db.holes[i] for i in jump])
+                             for jump in jumps])
+
+
+@lru_cache(maxsize=None)
+def board_symmetries(rows, columns, shape):
+    """
+    Return the rotations and reflections of a board with rows and columns
+    that leave shape, its cells in row-major order with "#" for unused
+    cells, unchanged. Each is a tuple giving, for every cell, the index of
+    the cell it is taken from.
+
+    @type rows: int
+    @type columns: int
+    @type shape: str
+    @rtype: list[tuple[int]]
+
+    >>> len(board_symmetries(3, 3, ".........")), len(board_symmetries(
+    ...     2, 3, "......")), len(board_symmetries(2, 2, "#..."))
+    (8, 4, 2)
+    """
+    last_row, last_column = rows - 1, columns - 1
+    transforms = [lambda r, c: (r, c),
+                  lambda r, c: (r, last_column - c),
+                  lambda r, c: (last_row - r, c),
+                  lambda r, c: (last_row - r, last_column - c)]
+    if rows == columns:
+        transforms += [lambda r, c: (c, r),
+                       lambda r, c: (c, last_row - r),
+                       lambda r, c: (last_column - c, r),
+                       lambda r, c: (last_column - c, last_row - r)]
+    symmetries = []
+    for transform in transforms:
+        permutation = []
+        for r in range(rows):
+            for c in range(columns):
+                source_r, source_c = transform(r, c)
+                permutation.append(source_r * columns + source_c)
+        if all([shape[i] == shape[j] for i, j in enumerate(permutation)]):
+            symmetries.append(tuple(permutation))
+    return symmetries
+
 
 def find_all(grid, elem):
     elements = []
@@ -229,6 +438,7 @@ def find_all(grid, elem):
 
 if __name__ == "__main__":
 
+    import doctest
     doctest.testmod()
 
     grid = [["*", "*", "*", "*", "*"],
@@ -239,8 +449,8 @@ if __name__ == "__main__":
 
     gpsp = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
 
-    start = time.time()
-    solution = depth_first_solve(gpsp)
-    end = time.time()
+    start = time()
+    solution = memoized_depth_first_solution(gpsp)
+    end = time()
     print("Solved 5x5 peg solitaire in {} seconds.".format(end - start))
-    print("Using depth-first: \n{}".format(solution))
+    print("Using memoized depth-first: \n{}".format(solution))
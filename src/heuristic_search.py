@@ -0,0 +1,233 @@
+"""
+Heuristic searches that trade optimality for speed: beam search and
+anytime weighted A*.
+
+Both are guided by Puzzle.heuristic, or by a heuristic function passed in,
+and return a path of PuzzleNodes like breadth_first_solve.
+"""
+import heapq
+
+from .budget import BudgetExceeded
+from .frontier import BucketFrontier, HeapFrontier
+from .puzzle_tools import PuzzleNode, reconstruct_path
+
+
+def beam_search(puzzle, width=100, heuristic=None, budget=None):
+    """
+    Return a path from PuzzleNode(puzzle) to a PuzzleNode containing a
+    solution, found by breadth-first search that keeps only the width
+    configurations with the lowest heuristic value of each layer. Return
+    None if the beam runs empty, which may happen even if puzzle can be
+    solved, or BudgetExceeded if SearchBudget budget runs out first.
+
+    @type puzzle: Puzzle
+    @type width: int
+    @type heuristic: (Puzzle) -> int | None
+    @type budget: SearchBudget | None
+    @rtype: PuzzleNode | BudgetExceeded | None
+
+    >>> from .registry import puzzle_class
+    >>> from .puzzle_tools import iter_moves
+    >>> MNPuzzle = puzzle_class("mn")
+    >>> start_grid = (("1", "3", "4"), ("2", "5", "*"))
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> root = beam_search(MNPuzzle(start_grid, target_grid), width=10)
+    >>> len(list(iter_moves(root))) >= 16
+    True
+    >>> leaf = root
+    >>> while leaf.children:
+    ...     leaf = leaf.children[0]
+    >>> leaf.puzzle.is_solved()
+    True
+    """
+    heuristic = _heuristic(heuristic)
+    root = PuzzleNode(puzzle, None, None)
+    if budget is not None:
+        budget.start()
+    visited = {str(puzzle)}
+    beam = [root]
+    while len(beam) > 0:
+        layer = []
+        for node in beam:
+            if node.puzzle.is_solved():
+                _finish(budget)
+                reconstruct_path(node)
+                return root
+            if node.puzzle.fail_fast():
+                continue
+            for ext in node.puzzle.extensions():
+                key = str(ext)
+                if key not in visited:
+                    visited.add(key)
+                    layer.append((heuristic(ext), len(layer),
+                                  PuzzleNode(ext, None, node)))
+            if budget is not None:
+                reason = budget.charge(len(layer), len(visited))
+                if reason is not None:
+                    return BudgetExceeded(reason, budget.stats)
+        beam = [node for _, _, node in heapq.nsmallest(width, layer)]
+
+    _finish(budget)
+    return None
+
+
+def anytime_weighted_astar(puzzle, weight=2.0, heuristic=None,
+                           budget=None, report=None, beam_width=100,
+                           frontier=None):
+    """
+    Return the shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution found by anytime weighted A* before SearchBudget
+    budget runs out, None if puzzle has no solution, or BudgetExceeded if
+    the budget runs out before any solution is found.
+
+    A first solution comes from beam_search with beam_width, unless
+    beam_width is None. Configurations are then expanded in order of
+    moves so far plus weight times the heuristic, which soon finds better
+    solutions. The search goes on after each one, pruning with the
+    unweighted estimate, and each shorter solution replaces the current
+    one. If it runs to the end the last solution is optimal.
+
+    Whenever the current solution improves, and when the search stops,
+    report(length, bound) is called with the number of moves of the
+    current solution and a lower bound on the number of moves of an
+    optimal one.
+
+    The last solution is optimal, and the lower bounds reported are
+    true, when the search runs to the end and the heuristic never
+    overestimates the number of moves left. The Puzzle.heuristic of
+    MNPuzzle and of WordLadderPuzzle never overestimates. Those of
+    MultiBlankMNPuzzle and EditLadderPuzzle estimate cost rather than
+    moves, so they overestimate when moves cost more than 1, and the
+    last solution may then not be the shortest.
+
+    Configurations wait in the empty Frontier frontier, by default a
+    BucketFrontier when weight is a whole number, which needs a heuristic
+    returning integers, and a HeapFrontier otherwise.
+
+    @type puzzle: Puzzle
+    @type weight: float
+    @type heuristic: (Puzzle) -> int | None
+    @type budget: SearchBudget | None
+    @type report: (int, int) -> None | None
+    @type beam_width: int | None
+    @type frontier: Frontier | None
+    @rtype: PuzzleNode | BudgetExceeded | None
+
+    >>> from .registry import puzzle_class
+    >>> from .puzzle_tools import iter_moves
+    >>> MNPuzzle = puzzle_class("mn")
+    >>> start_grid = (("1", "3", "4"), ("2", "5", "*"))
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> bounds = []
+    >>> root = anytime_weighted_astar(
+    ...     MNPuzzle(start_grid, target_grid),
+    ...     report=lambda length, bound: bounds.append((length, bound)))
+    >>> len(list(iter_moves(root)))
+    16
+    >>> bounds[-1]
+    (16, 16)
+    >>> from .frontier import HeapFrontier
+    >>> root = anytime_weighted_astar(MNPuzzle(start_grid, target_grid),
+    ...                               weight=1.5, frontier=HeapFrontier())
+    >>> len(list(iter_moves(root)))
+    16
+    """
+    heuristic = _heuristic(heuristic)
+    solution, solution_moves = None, None
+    if budget is not None:
+        # the beam search below is the first phase of this search
+        budget.start()
+    if beam_width is not None:
+        first = beam_search(puzzle, beam_width, heuristic, budget)
+        if isinstance(first, BudgetExceeded):
+            return first
+        if first is not None:
+            solution, solution_moves = first, 0
+            while len(solution.children) > 0:
+                solution, solution_moves = (solution.children[0],
+                                            solution_moves + 1)
+
+    root = PuzzleNode(puzzle, None, None)
+    if frontier is None:
+        frontier = (BucketFrontier() if float(weight).is_integer()
+                    else HeapFrontier())
+
+    def priority(moves, estimate):
+        # among equal priorities in a heap, the one estimated closest to
+        # a solution comes first; a bucket queue takes the deepest
+        if isinstance(frontier, BucketFrontier):
+            return moves + weight * estimate
+        return moves + weight * estimate, estimate
+
+    # entries are (estimate, moves so far, node)
+    estimate = heuristic(puzzle)
+    frontier.push((estimate, 0, root), priority(0, estimate))
+    # configuration -> fewest moves it was reached with
+    best_moves = {str(puzzle): 0}
+
+    def bound():
+        # the optimum is at least the lowest unweighted estimate left,
+        # and at most the current solution
+        lowest = min([g + h for h, g, _ in frontier],
+                     default=solution_moves)
+        return min(lowest, solution_moves)
+
+    if solution is not None and report is not None:
+        report(solution_moves, bound())
+    while len(frontier) > 0:
+        estimate, moves, node = frontier.pop()
+        if solution is not None and moves + estimate >= solution_moves:
+            continue
+        if moves > best_moves.get(str(node.puzzle), moves):
+            # reached again with fewer moves since it was queued
+            continue
+        if node.puzzle.is_solved():
+            solution, solution_moves = node, moves
+            if report is not None:
+                report(solution_moves, bound())
+            continue
+        if node.puzzle.fail_fast():
+            continue
+
+        for ext in node.puzzle.extensions():
+            key = str(ext)
+            if moves + 1 < best_moves.get(key, moves + 2):
+                best_moves[key] = moves + 1
+                ext_estimate = heuristic(ext)
+                if (solution is None or
+                        moves + 1 + ext_estimate < solution_moves):
+                    frontier.push(
+                        (ext_estimate, moves + 1, PuzzleNode(ext, None, node)),
+                        priority(moves + 1, ext_estimate))
+
+        if budget is not None:
+            reason = budget.charge(len(frontier), len(best_moves))
+            if reason is not None:
+                if solution is None:
+                    return BudgetExceeded(reason, budget.stats)
+                if report is not None:
+                    report(solution_moves, bound())
+                break
+
+    _finish(budget)
+    if solution is None:
+        return None
+    if report is not None and len(frontier) == 0:
+        report(solution_moves, solution_moves)
+    # the solution may still be the one from the beam search
+    reconstruct_path(solution)
+    while solution.parent is not None:
+        solution = solution.parent
+    return solution
+
+
+def _heuristic(heuristic):
+    # the heuristic function to use: the given one or Puzzle.heuristic
+    if heuristic is None:
+        return lambda puzzle: puzzle.heuristic()
+    return heuristic
+
+
+def _finish(budget):
+    if budget is not None:
+        budget.finish()
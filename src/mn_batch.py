@@ -0,0 +1,327 @@
+"""
+Vectorized, layer-at-a-time search over MNPuzzle boards using NumPy.
+
+A batch of states is a 2-D array with one row per state. Each row lists,
+for every board position, the id of the tile on it, where a tile's id is
+its position in the target grid. Neighbor generation, Manhattan distance
+and goal checks run as array operations over the whole batch, and states
+are deduplicated with np.unique and sorted searches over 64-bit keys
+packing 4 bits per tile, so boards may have at most 16 positions.
+Informed search drops the states of each layer whose Manhattan distance
+puts them beyond the current bound.
+"""
+from .budget import BudgetExceeded
+from .mn_puzzle import DIRECTIONS, MNPuzzle
+from .solution import Solution
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# move index -> direction in which "*" moves
+MOVES = tuple(DIRECTIONS)
+
+
+class BatchBoard:
+    """
+    Lookup tables for vectorized operations on boards of one shape and
+    target configuration.
+    """
+
+    def __init__(self, puzzle):
+        """
+        Create the tables for boards like MNPuzzle puzzle.
+
+        @type self: BatchBoard
+        @type puzzle: MNPuzzle
+        @rtype: None
+        """
+        if np is None:
+            raise ImportError("batch search on MNPuzzle requires numpy")
+        if type(puzzle) is not MNPuzzle:
+            raise ValueError("batch search needs an MNPuzzle, not {}".format(
+                type(puzzle).__name__))
+        self.n, self.m, self.to_grid = puzzle.n, puzzle.m, puzzle.to_grid
+        size = self.n * self.m
+        if size > 16:
+            raise ValueError("batch search supports at most 16 positions")
+        # tile id -> symbol; ids are positions in the target grid
+        self.symbols = [s for row in puzzle.to_grid for s in row]
+        self._ids = dict([(s, i) for i, s in enumerate(self.symbols)])
+        self.blank = self._ids["*"]
+        self.goal = np.arange(size, dtype=np.uint8)
+
+        rows, cols = np.divmod(np.arange(size), self.m)
+        # distance[p, t]: moves for tile t to reach its target from p
+        self._distance = (np.abs(rows[:, np.newaxis] - rows[np.newaxis]) +
+                          np.abs(cols[:, np.newaxis] - cols[np.newaxis]))
+        self._distance[:, self.blank] = 0
+        # target[d, p]: position "*" moves to from p in direction d, or -1
+        self._target = np.full((len(MOVES), size), -1, dtype=np.int64)
+        for d, move in enumerate(MOVES):
+            new_rows = rows + DIRECTIONS[move][0]
+            new_cols = cols + DIRECTIONS[move][1]
+            valid = ((0 <= new_rows) & (new_rows < self.n) &
+                     (0 <= new_cols) & (new_cols < self.m))
+            self._target[d, valid] = (new_rows * self.m + new_cols)[valid]
+
+    def encode(self, puzzle):
+        """
+        Return the tile ids of MNPuzzle puzzle as a 1-D array.
+
+        @type self: BatchBoard
+        @type puzzle: MNPuzzle
+        @rtype: numpy.ndarray
+        """
+        return np.array([self._ids[s] for row in puzzle.from_grid
+                         for s in row], dtype=np.uint8)
+
+    def decode(self, state):
+        """
+        Return the MNPuzzle for the tile ids in state.
+
+        @type self: BatchBoard
+        @type state: numpy.ndarray
+        @rtype: MNPuzzle
+        """
+        symbols = [self.symbols[t] for t in state]
+        grid = tuple(tuple(symbols[r * self.m:(r + 1) * self.m])
+                     for r in range(self.n))
+        return MNPuzzle(grid, self.to_grid)
+
+    def keys(self, states):
+        """
+        Return one uint64 key per row of states, 4 bits per position.
+
+        @type self: BatchBoard
+        @type states: numpy.ndarray
+        @rtype: numpy.ndarray
+        """
+        shifts = np.arange(states.shape[1], dtype=np.uint64) * np.uint64(4)
+        return np.bitwise_or.reduce(states.astype(np.uint64) << shifts,
+                                    axis=1)
+
+    def blanks(self, states):
+        """
+        Return the position of "*" in every row of states.
+
+        @type self: BatchBoard
+        @type states: numpy.ndarray
+        @rtype: numpy.ndarray
+        """
+        return np.argmax(states == self.blank, axis=1)
+
+    def manhattan(self, states):
+        """
+        Return the sum of Manhattan distances of all tiles but "*" to
+        their target positions, for every row of states.
+
+        @type self: BatchBoard
+        @type states: numpy.ndarray
+        @rtype: numpy.ndarray
+
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> board = BatchBoard(MNPuzzle(start_grid, target_grid))
+        >>> states = np.array([board.encode(MNPuzzle(start_grid, target_grid)),
+        ...                    board.goal])
+        >>> board.manhattan(states).tolist()
+        [3, 0]
+        >>> board.is_goal(states).tolist()
+        [False, True]
+        """
+        positions = np.arange(states.shape[1])
+        return self._distance[positions, states].sum(axis=1)
+
+    def is_goal(self, states):
+        """
+        Return whether each row of states is the target configuration.
+
+        @type self: BatchBoard
+        @type states: numpy.ndarray
+        @rtype: numpy.ndarray
+        """
+        return (states == self.goal).all(axis=1)
+
+    def expand(self, states):
+        """
+        Return (children, parents, moves) for all legal moves from every
+        row of states: the child states, the row each was expanded from,
+        and the index in MOVES of the direction "*" moved in.
+
+        @type self: BatchBoard
+        @type states: numpy.ndarray
+        @rtype: tuple(numpy.ndarray, numpy.ndarray, numpy.ndarray)
+
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> board = BatchBoard(MNPuzzle(start_grid, target_grid))
+        >>> state = board.encode(MNPuzzle(start_grid, target_grid))
+        >>> children, parents, moves = board.expand(state[np.newaxis])
+        >>> sorted([MOVES[d] for d in moves])
+        ['D', 'R']
+        """
+        blanks = self.blanks(states)
+        children, parents, moves = [], [], []
+        for d in range(len(MOVES)):
+            targets = self._target[d, blanks]
+            rows = np.nonzero(targets >= 0)[0]
+            child = states[rows]
+            index = np.arange(len(rows))
+            child[index, blanks[rows]] = child[index, targets[rows]]
+            child[index, targets[rows]] = self.blank
+            children.append(child)
+            parents.append(rows)
+            moves.append(np.full(len(rows), d, dtype=np.uint8))
+        return (np.concatenate(children), np.concatenate(parents),
+                np.concatenate(moves))
+
+
+def batch_breadth_first_solve(puzzle, max_depth=None, budget=None):
+    """
+    Return a shortest Solution for MNPuzzle puzzle found by vectorized
+    layer-by-layer breadth-first search, or None if there is none within
+    max_depth moves, or BudgetExceeded if SearchBudget budget runs out
+    first. The budget is charged once per layer.
+
+    @type puzzle: MNPuzzle
+    @type max_depth: int | None
+    @type budget: SearchBudget | None
+    @rtype: Solution | BudgetExceeded | None
+
+    >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> solution = batch_breadth_first_solve(MNPuzzle(start_grid, target_grid))
+    >>> "".join(solution.moves)
+    'DRR'
+    >>> solution.final().is_solved()
+    True
+    """
+    board = BatchBoard(puzzle)
+    if budget is not None:
+        budget.start()
+    result, _ = _layers(board, puzzle, None, max_depth, budget, [0])
+    if not isinstance(result, BudgetExceeded):
+        _finish(budget)
+    return result
+
+
+def batch_iterative_deepening_solve(puzzle, max_depth=None, budget=None):
+    """
+    Return a shortest Solution for MNPuzzle puzzle found by vectorized
+    breadth-first iterative deepening A*, or None if there is none within
+    max_depth moves, or BudgetExceeded if SearchBudget budget runs out
+    first. The budget is charged once per layer.
+
+    Each pass is a layer-by-layer breadth-first search that drops every
+    state whose moves so far plus Manhattan distance exceed a bound, so
+    layers stay far smaller than those of plain breadth-first search. The
+    bound starts at the Manhattan distance of puzzle and rises to the
+    smallest value dropped, so the first solution found is a shortest one.
+
+    @type puzzle: MNPuzzle
+    @type max_depth: int | None
+    @type budget: SearchBudget | None
+    @rtype: Solution | BudgetExceeded | None
+
+    >>> from .budget import SearchBudget
+    >>> start_grid = (("1", "3", "4"), ("2", "5", "*"))
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> puzzle = MNPuzzle(start_grid, target_grid)
+    >>> informed, plain = SearchBudget(), SearchBudget()
+    >>> solution = batch_iterative_deepening_solve(puzzle, budget=informed)
+    >>> len(solution), solution.final().is_solved()
+    (16, True)
+    >>> len(batch_breadth_first_solve(puzzle, budget=plain))
+    16
+    >>> informed.stats.visited < plain.stats.visited
+    True
+    >>> batch_iterative_deepening_solve(puzzle, max_depth=15) is None
+    True
+    """
+    board = BatchBoard(puzzle)
+    if budget is not None:
+        budget.start()
+    bound = int(board.manhattan(board.encode(puzzle)[np.newaxis])[0])
+    visited = [0]
+    while max_depth is None or bound <= max_depth:
+        result, next_bound = _layers(board, puzzle, bound, max_depth,
+                                     budget, visited)
+        if isinstance(result, BudgetExceeded):
+            return result
+        if result is not None or next_bound is None:
+            # solved, or nothing was dropped: every state was searched
+            _finish(budget)
+            return result
+        bound = next_bound
+    _finish(budget)
+    return None
+
+
+def _layers(board, puzzle, bound, max_depth, budget, visited):
+    # breadth-first search from puzzle over the states whose depth plus
+    # Manhattan distance is at most bound, or all states if bound is
+    # None; return the Solution, None or BudgetExceeded, and the smallest
+    # depth plus distance dropped, or None. visited[0] counts the states
+    # of all layers searched so far
+    layer = board.encode(puzzle)[np.newaxis]
+    # every move is undone by its inverse and changes the parity of the
+    # blank position, so a state of the next layer is at the distance of
+    # the previous layer or farther: the previous layer's sorted keys
+    # stand in for the visited set. With a bound a state may also come
+    # back at a greater depth, which costs time but not correctness
+    previous = np.empty(0, dtype=np.uint64)
+    current = board.keys(layer)
+    # per layer: index of each state's parent in the previous layer, move
+    history = []
+    dropped = None
+
+    while len(layer) > 0:
+        visited[0] += len(layer)
+        if budget is not None:
+            reason = budget.charge(len(layer), visited[0], len(layer))
+            if reason is not None:
+                return BudgetExceeded(reason, budget.stats), None
+        goals = np.nonzero(board.is_goal(layer))[0]
+        if len(goals) > 0:
+            return Solution(puzzle, _replay_moves(history, goals[0])), None
+        if max_depth is not None and len(history) >= max_depth:
+            return None, None
+
+        children, parents, moves = board.expand(layer)
+        if bound is not None:
+            estimates = len(history) + 1 + board.manhattan(children)
+            over = estimates > bound
+            if over.any():
+                least = int(estimates[over].min())
+                dropped = least if dropped is None else min(dropped, least)
+                children, parents, moves = (
+                    children[~over], parents[~over], moves[~over])
+        keys, first = np.unique(board.keys(children), return_index=True)
+        found = np.searchsorted(previous, keys)
+        seen = np.zeros(len(keys), dtype=bool)
+        inside = found < len(previous)
+        seen[inside] = previous[found[inside]] == keys[inside]
+
+        previous, current = current, keys[~seen]
+        first = first[~seen]
+        layer = children[first]
+        history.append((parents[first], moves[first]))
+
+    return None, dropped
+
+
+def _finish(budget):
+    if budget is not None:
+        budget.finish()
+
+
+def _replay_moves(history, index):
+    # follow parent indices back through the layers
+    moves = []
+    for parents, layer_moves in reversed(history):
+        moves.append(MOVES[layer_moves[index]])
+        index = parents[index]
+    moves.reverse()
+    return moves
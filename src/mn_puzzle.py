@@ -1,13 +1,29 @@
 from .puzzle import Puzzle
-from .puzzle_tools import breadth_first_solve, depth_first_solve
+from .puzzle_tools import breadth_first_solve, depth_first_solve, write_path
+from functools import lru_cache
 from time import time
-import doctest
+import sys
+
+# moves of the empty space "*": row and column offsets
+DIRECTIONS = {"U": (-1, 0), "D": (1, 0), "L": (0, -1), "R": (0, 1)}
+
+# the move undoing each move
+INVERSE = {"U": "D", "D": "U", "L": "R", "R": "L"}
+
+# six moves of "*" counterclockwise round a 2x2 block give the same
+# configuration as the six clockwise ones (e.g. DRULDR and RDLURD), so
+# successors only keeps the clockwise ones
+CYCLES = frozenset(["DRULDR", "RULDRU", "ULDRUL", "LDRULD"])
 
 
 class MNPuzzle(Puzzle):
     """
     An nxm puzzle, like the 15-puzzle, which may be solved, unsolved,
     or even unsolvable.
+
+    The configuration is kept as a flat tuple of symbols in row-major
+    order, together with the position of "*" and the number of cells that
+    differ from the target, both updated on every move.
     """
 
     def __init__(self, from_grid, to_grid):
@@ -26,7 +42,55 @@ class MNPuzzle(Puzzle):
         assert all([len(r) == len(from_grid[0]) for r in from_grid])
         assert all([len(r) == len(to_grid[0]) for r in to_grid])
         self.n, self.m = len(from_grid), len(from_grid[0])
-        self.from_grid, self.to_grid = from_grid, to_grid
+        self._cells = tuple([s for row in from_grid for s in row])
+        self._target = tuple([s for row in to_grid for s in row])
+        self._blank = self._cells.index("*")
+        self._misplaced = sum([a != b for a, b in
+                               zip(self._cells, self._target)])
+
+    @property
+    def from_grid(self):
+        """
+        The current configuration as a tuple of rows.
+
+        @type self: MNPuzzle
+        @rtype: tuple[tuple[str]]
+
+        >>> mnp = MNPuzzle((("*", "2"), ("1", "3")), (("1", "2"), ("3", "*")))
+        >>> mnp.from_grid
+        (('*', '2'), ('1', '3'))
+        """
+        return _rows(self._cells, self.m)
+
+    @property
+    def to_grid(self):
+        """
+        The solution configuration as a tuple of rows.
+
+        @type self: MNPuzzle
+        @rtype: tuple[tuple[str]]
+        """
+        return _rows(self._target, self.m)
+
+    def _moved(self, symbol, blank=None):
+        # the extension of self where "*", at flat position blank or else
+        # the one blank, swaps with the symbol at flat position symbol
+        cells, target = self._cells, self._target
+        blank = self._blank if blank is None else blank
+        tile = cells[symbol]
+        new_cells = list(cells)
+        new_cells[blank], new_cells[symbol] = tile, "*"
+        # only the two swapped cells can change being misplaced
+        misplaced = (self._misplaced -
+                     (cells[blank] != target[blank]) -
+                     (tile != target[symbol]) +
+                     (tile != target[blank]) +
+                     ("*" != target[symbol]))
+        ext = type(self).__new__(type(self))
+        ext.n, ext.m = self.n, self.m
+        ext._cells, ext._target = tuple(new_cells), target
+        ext._blank, ext._misplaced = symbol, misplaced
+        return ext
 
     def __eq__(self, other):
         """
@@ -48,8 +112,13 @@ class MNPuzzle(Puzzle):
         False
         """
         return (type(self) == type(other) and
-                equal_grids(self.from_grid, other.from_grid) and
-                equal_grids(self.to_grid, other.to_grid))
+                self.m == other.m and
+                self._cells == other._cells and
+                (self._target is other._target or
+                 self._target == other._target))
+
+    def __hash__(self):
+        return hash(self._cells)
 
     def __str__(self):
         """
@@ -64,12 +133,9 @@ class MNPuzzle(Puzzle):
         *23
         145
         """
-        rows = []
-
-        for row in self.from_grid:
-            rows.append("".join(row))
-
-        return "\n".join(rows)
+        cells, m = self._cells, self.m
+        return "\n".join(["".join(cells[i:i + m])
+                          for i in range(0, len(cells), m)])
 
     def extensions(self):
         """
@@ -94,67 +160,321 @@ class MNPuzzle(Puzzle):
         True
         >>> all([s in L1 for s in L2])
         True
+        >>> [e._misplaced == MNPuzzle(e.from_grid, target_grid)._misplaced
+        ...  for e in L1]
+        [True, True]
         """
+        return [self._moved(symbol)
+                for _, symbol in neighbours(self.n, self.m)[self._blank]]
 
-        def swap(empty, symbol):
-            """
+    def is_solved(self):
+        """
+        Return whether Puzzle self is solved. A configuration is solved
+        when from_grid is the same as to_grid
 
-            Pre-condition: specified rows and columns for empty and symbol
-            exist in two dimensional array (tuple of tuples)
+        @type self: Puzzle
+        @rtype: bool
 
-            @type empty: tuple
-            @type symbol: tuple
-            @rtype: MNPuzzle
-            """
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> mnp = MNPuzzle(start_grid, target_grid)
+        >>> mnp.is_solved()
+        False
+        >>> target_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> mnp = MNPuzzle(start_grid, target_grid)
+        >>> mnp.is_solved()
+        True
+        """
+        return self._misplaced == 0
 
-            #  convert to list of lists since tuples are immutable
-            grid = [list(i) for i in self.from_grid]
+    def heuristic(self):
+        """
+        Return the sum over all tiles of MNPuzzle self of their row and
+        column distances to their places in to_grid, a lower bound of the
+        number of moves left.
 
-            # edit: swap empty place (*) and symbol
-            grid[empty[0]][empty[1]] = grid[symbol[0]][symbol[1]]
-            grid[symbol[0]][symbol[1]] = "*"
+        @type self: MNPuzzle
+        @rtype: int
 
-            # convert back to tuple of tuples
-            new_from_grid = tuple(tuple(i) for i in grid)
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> MNPuzzle(start_grid, target_grid).heuristic()
+        3
+        """
+        places, m = _places(self._target), self.m
+        total = 0
+        for i, symbol in enumerate(self._cells):
+            if symbol != "*":
+                j = places[symbol]
+                total += abs(i // m - j // m) + abs(i % m - j % m)
+        return total
+
+    def successors(self, history=()):
+        """
+        Return the extensions of MNPuzzle self as (direction, extension)
+        pairs, leaving out the move that undoes the last move of history
+        and the move that would complete a six-move counterclockwise loop.
 
-            return MNPuzzle(new_from_grid, self.to_grid)
+        @type self: MNPuzzle
+        @type history: Sequence[str]
+        @rtype: list[tuple(str, MNPuzzle)]
 
-        # find emtpy location (only one empty space exists in MNPuzzle)
-        empty = find_first(self.from_grid, "*")
+        >>> start_grid = (("1", "*", "2"), ("3", "4", "5"))
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> mnp = MNPuzzle(start_grid, target_grid)
+        >>> [move for move, _ in mnp.successors()]
+        ['R', 'L', 'D']
+        >>> [move for move, _ in mnp.successors("L")]
+        ['L', 'D']
+        >>> [move for move, _ in mnp.successors("ULDRU")]
+        ['R']
+        """
+        inverse = INVERSE.get(history[-1]) if len(history) > 0 else None
+        tail = "".join(history[-5:]) if len(history) >= 5 else None
+        moves = neighbours(self.n, self.m)[self._blank]
+        return [(direction, self._moved(symbol))
+                for direction, symbol in moves
+                if direction != inverse and
+                (tail is None or tail + direction not in CYCLES)]
+
+    def size(self):
+        """
+        Return the number of cells of MNPuzzle self.
 
-        row, col = empty[0], empty[1]
+        @type self: MNPuzzle
+        @rtype: int
 
-        # candidate swap locations:  left, right, above, below
-        candidates = [(row, col+1), (row, col-1), (row+1, col), (row-1, col)]
+        >>> grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> MNPuzzle(grid, grid).size()
+        6
+        """
+        return self.n * self.m
 
-        valid_swap_locations = [c for c in candidates
-                                if is_valid_location(c, self.n, self.m)]
+    def move_to(self, other):
+        """
+        Return the direction, one of "U", "D", "L" or "R", in which "*"
+        moves to turn MNPuzzle self into its extension other.
 
-        extensions = [swap(empty, symbol) for symbol in valid_swap_locations]
+        @type self: MNPuzzle
+        @type other: MNPuzzle
+        @rtype: str
 
-        return extensions
+        >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> mnp = MNPuzzle(start_grid, target_grid)
+        >>> ext = MNPuzzle((("1", "2", "3"), ("*", "4", "5")), target_grid)
+        >>> mnp.move_to(ext)
+        'D'
+        """
+        for direction, symbol in neighbours(self.n, self.m)[self._blank]:
+            if symbol == other._blank:
+                return direction
+        return None
 
-    def is_solved(self):
+    def apply_move(self, move):
         """
-        Return whether Puzzle self is solved. A configuration is solved
-        when from_grid is the same as to_grid
+        Return the extension of MNPuzzle self where "*" moved in
+        direction move.
 
-        @type self: Puzzle
-        @rtype: bool
+        @type self: MNPuzzle
+        @type move: str
+        @rtype: MNPuzzle
 
         >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
         >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
-        >>> mnp = MNPuzzle(start_grid, target_grid)
-        >>> mnp.is_solved()
-        False
-        >>> target_grid = (("*", "2", "3"), ("1", "4", "5"))
-        >>> mnp = MNPuzzle(start_grid, target_grid)
-        >>> mnp.is_solved()
-        True
+        >>> print(MNPuzzle(start_grid, target_grid).apply_move("R"))
+        2*3
+        145
+        """
+        for direction, symbol in neighbours(self.n, self.m)[self._blank]:
+            if direction == move:
+                return self._moved(symbol)
+        raise ValueError("illegal move: {}".format(move))
+
+
+class MultiBlankMNPuzzle(MNPuzzle):
+    """
+    An nxm sliding puzzle with any number of empty spaces "*", where
+    moving each tile may cost a different amount.
+
+    A move is (position, direction): the "*" at flat position position
+    moves in direction, one of "U", "D", "L" or "R", and the tile there
+    slides the other way, at the cost given for that tile.
+    """
+
+    def __init__(self, from_grid, to_grid, costs=None):
+        """
+        Create a new MultiBlankMNPuzzle self in state from_grid, working
+        towards state to_grid, where moving a tile costs costs[tile], or 1
+        for tiles not in costs.
+
+        @type self: MultiBlankMNPuzzle
+        @type from_grid: tuple[tuple[str]]
+        @type to_grid: tuple[tuple[str]]
+        @type costs: dict[str, int | float] | None
+        @rtype: None
+        """
+        MNPuzzle.__init__(self, from_grid, to_grid)
+        assert sorted(self._cells) == sorted(self._target)
+        self._blanks = tuple([i for i, s in enumerate(self._cells)
+                              if s == "*"])
+        self._costs = {} if costs is None else costs
+
+    def _slid(self, blank, symbol):
+        # the extension of self where the "*" at flat position blank swaps
+        # with the tile at flat position symbol
+        ext = self._moved(symbol, blank)
+        ext._blanks = tuple(sorted([symbol if i == blank else i
+                                    for i in self._blanks]))
+        ext._costs = self._costs
+        return ext
+
+    def extensions(self):
+        """
+        Return list of extensions of MultiBlankMNPuzzle self: one tile
+        next to a "*" slides into it.
+
+        @type self: MultiBlankMNPuzzle
+        @rtype: list[MultiBlankMNPuzzle]
+
+        >>> grid = (("*", "1"), ("*", "2"))
+        >>> [str(e).replace("\\n", "/") for e in
+        ...  MultiBlankMNPuzzle(grid, grid).extensions()]
+        ['1*/*2', '*1/2*']
+        """
+        return [ext for _, ext in self.successors()]
+
+    def successors(self, history=()):
+        """
+        Return the extensions of MultiBlankMNPuzzle self as
+        ((position, direction), extension) pairs.
+
+        @type self: MultiBlankMNPuzzle
+        @type history: Sequence[tuple(int, str)]
+        @rtype: list[tuple(tuple(int, str), MultiBlankMNPuzzle)]
         """
-        # all tuples in start and target grids have to be the same
-        # for MN puzzle to be solved
-        return equal_grids(self.from_grid, self.to_grid)
+        cells, table = self._cells, neighbours(self.n, self.m)
+        return [((blank, direction), self._slid(blank, symbol))
+                for blank in self._blanks
+                for direction, symbol in table[blank]
+                if cells[symbol] != "*"]
+
+    def heuristic(self):
+        """
+        Return the sum over all tiles of MultiBlankMNPuzzle self of their
+        row and column distances to their places in to_grid, each times
+        the cost of moving the tile: a lower bound of the cost left.
+
+        @type self: MultiBlankMNPuzzle
+        @rtype: int | float
+
+        >>> start_grid = (("1", "*"), ("*", "2"))
+        >>> target_grid = (("*", "1"), ("2", "*"))
+        >>> MultiBlankMNPuzzle(start_grid, target_grid, {"1": 5}).heuristic()
+        6
+        """
+        places, m, costs = _places(self._target), self.m, self._costs
+        total = 0
+        for i, symbol in enumerate(self._cells):
+            if symbol != "*":
+                j = places[symbol]
+                total += costs.get(symbol, 1) * (abs(i // m - j // m) +
+                                                 abs(i % m - j % m))
+        return total
+
+    def move_cost(self, move):
+        """
+        Return the cost of the tile that move slides.
+
+        @type self: MultiBlankMNPuzzle
+        @type move: tuple(int, str)
+        @rtype: int | float
+
+        >>> grid = (("*", "1"), ("*", "2"))
+        >>> MultiBlankMNPuzzle(grid, grid, {"2": 3}).move_cost((2, "R"))
+        3
+        """
+        blank, direction = move
+        for d, symbol in neighbours(self.n, self.m)[blank]:
+            if d == direction:
+                return self._costs.get(self._cells[symbol], 1)
+        raise ValueError("illegal move: {}".format(move))
+
+    def move_to(self, other):
+        """
+        Return (position, direction) for the "*" that moves to turn
+        MultiBlankMNPuzzle self into its extension other.
+
+        @type self: MultiBlankMNPuzzle
+        @type other: MultiBlankMNPuzzle
+        @rtype: tuple(int, str)
+
+        >>> grid = (("*", "1"), ("*", "2"))
+        >>> mnp = MultiBlankMNPuzzle(grid, grid)
+        >>> mnp.move_to(mnp.apply_move((2, "R")))
+        (2, 'R')
+        """
+        for blank in self._blanks:
+            if other._cells[blank] != "*":
+                for direction, symbol in neighbours(self.n, self.m)[blank]:
+                    if (other._cells[symbol] == "*" and
+                            self._cells[symbol] != "*"):
+                        return blank, direction
+        return None
+
+    def apply_move(self, move):
+        """
+        Return the extension of MultiBlankMNPuzzle self where the "*" at
+        position move[0] moves in direction move[1].
+
+        @type self: MultiBlankMNPuzzle
+        @type move: tuple(int, str)
+        @rtype: MultiBlankMNPuzzle
+        """
+        blank, direction = move
+        if self._cells[blank] == "*":
+            for d, symbol in neighbours(self.n, self.m)[blank]:
+                if d == direction and self._cells[symbol] != "*":
+                    return self._slid(blank, symbol)
+        raise ValueError("illegal move: {}".format(move))
+
+
+@lru_cache(maxsize=None)
+def neighbours(n, m):
+    """
+    Return, for every flat position of an nxm grid, the moves of "*" from
+    that position as (direction, new flat position) pairs.
+
+    @type n: int
+    @type m: int
+    @rtype: tuple[tuple[tuple(str, int)]]
+
+    >>> neighbours(2, 3)[0]
+    (('R', 1), ('D', 3))
+    """
+    table = []
+    for i in range(n * m):
+        row, col = divmod(i, m)
+        # same order as the original candidates: right, left, below, above
+        moves = []
+        for direction in "RLDU":
+            location = (row + DIRECTIONS[direction][0],
+                        col + DIRECTIONS[direction][1])
+            if is_valid_location(location, n, m):
+                moves.append((direction, location[0] * m + location[1]))
+        table.append(tuple(moves))
+    return tuple(table)
+
+
+@lru_cache(maxsize=64)
+def _places(cells):
+    # symbol -> its flat position in cells
+    return {symbol: i for i, symbol in enumerate(cells)}
+
+
+def _rows(cells, m):
+    # flat cells as a tuple of rows of length m
+    return tuple([cells[i:i + m] for i in range(0, len(cells), m)])
 
 
 def find_first(grid, elem):
@@ -224,6 +544,7 @@ def equal_grids(grid1, grid2):
     return all([a == b for a, b in zip(grid1, grid2)])
 
 if __name__ == "__main__":
+    import doctest
     doctest.testmod()
     target_grid = (("1", "2", "3"), ("4", "5", "*"))
     start_grid = (("*", "2", "3"), ("1", "4", "5"))
@@ -235,5 +556,6 @@ if __name__ == "__main__":
     start = time()
     solution = depth_first_solve((MNPuzzle(start_grid, target_grid)))
     end = time()
-    print("DFS solved: \n\n{} \n\nin {} seconds".format(
-        solution, end - start))
+    # depth-first paths are long, so only print the moves
+    print("DFS solved in {} seconds:\n".format(end - start))
+    write_path(solution, sys.stdout, moves=True)
@@ -0,0 +1,391 @@
+"""
+Endgame database for GridPegSolitairePuzzle boards.
+
+For one board shape, retrograde analysis starts from every position with a
+single peg and applies jumps backwards, one peg at a time, to find every
+winnable position with up to max_pegs pegs. For each peg count k the
+positions are stored as a bitset over all k-subsets of the holes, indexed
+by the combinatorial rank of the peg bitmask, so the database is compact
+and can be memory-mapped from a file.
+
+EndgameDatabase.solve searches forwards from a position until it reaches
+one the database covers, which then decides at once: a lost position is
+dropped, and a winnable one is finished along the database's own
+winnable entries.
+"""
+import mmap
+import struct
+from math import comb
+
+from .budget import BudgetExceeded
+
+# magic, format version, rows, columns, max_pegs
+_HEADER = struct.Struct("<4sHHHH")
+_MAGIC = b"PEGE"
+_VERSION = 1
+
+
+class EndgameDatabase:
+    """
+    Winnable positions with few pegs on one peg solitaire board shape.
+    """
+
+    def __init__(self, shape, max_pegs, bitsets):
+        """
+        Create a new EndgameDatabase self for the board shape, a list of
+        strings with "#" for unused cells, holding for every peg count
+        k = 1 .. max_pegs the bitset bitsets[k - 1].
+
+        @type self: EndgameDatabase
+        @type shape: list[str]
+        @type max_pegs: int
+        @type bitsets: list[bytes | bytearray | memoryview]
+        @rtype: None
+        """
+        self.shape, self.max_pegs = shape, max_pegs
+        self._bitsets = bitsets
+        cells = [(r, c) for r in range(len(shape))
+                 for c in range(len(shape[0]))]
+        # the (row, column) of the hole of each bit of a peg bitmask
+        self.holes = [(r, c) for (r, c) in cells if shape[r][c] != "#"]
+        self._unused = [(r, c) for (r, c) in cells if shape[r][c] == "#"]
+        n = len(self.holes)
+        # binomials[e][i] == comb(e, i)
+        self._binomials = [[comb(e, i) for i in range(max_pegs + 1)]
+                           for e in range(n + 1)]
+        # every jump as the bits of its start, over and end holes, and
+        # as the hole indices themselves
+        self._jumps = [(1 << a, 1 << b, 1 << c, (a, b, c))
+                       for a, b, c in board_jumps(shape)]
+        # neighbours[i]: bitmask of the holes next to hole i
+        index = {hole: i for i, hole in enumerate(self.holes)}
+        self._neighbours = [
+            sum([1 << index[(r + dr, c + dc)]
+                 for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1))
+                 if (r + dr, c + dc) in index])
+            for (r, c) in self.holes]
+
+    def rank(self, pegs):
+        """
+        Return the combinatorial rank of peg bitmask pegs among all
+        bitmasks over the holes with as many pegs.
+
+        @type self: EndgameDatabase
+        @type pegs: int
+        @rtype: int
+        """
+        rank, i, hole = 0, 1, 0
+        while pegs:
+            if pegs & 1:
+                rank += self._binomials[hole][i]
+                i += 1
+            pegs >>= 1
+            hole += 1
+        return rank
+
+    def is_winnable(self, pegs):
+        """
+        Return whether the position with peg bitmask pegs, with bit i set
+        for a peg on the i-th hole in row-major order, can be reduced to a
+        single peg, or None if it has more than max_pegs pegs.
+
+        @type self: EndgameDatabase
+        @type pegs: int
+        @rtype: bool | None
+        """
+        k = bin(pegs).count("1")
+        if k == 0 or k > self.max_pegs:
+            return None
+        index = self.rank(pegs)
+        return bool(self._bitsets[k - 1][index >> 3] >> (index & 7) & 1)
+
+    def lookup(self, marker):
+        """
+        Return whether the position in marker, as held by a
+        GridPegSolitairePuzzle, is winnable, or None if the database
+        does not cover it.
+
+        @type self: EndgameDatabase
+        @type marker: list[list[str]]
+        @rtype: bool | None
+
+        >>> db = build_endgame_database([".....", "#...#"], 3)
+        >>> db.lookup([["*", "*", ".", ".", "."], ["#", ".", ".", ".", "#"]])
+        True
+        >>> db.lookup([["*", ".", "*", ".", "."], ["#", ".", ".", ".", "#"]])
+        False
+        >>> db.lookup([["*", "*", "*", "*", "."], ["#", ".", ".", ".", "#"]])
+        """
+        if sum([row.count("*") for row in marker]) > self.max_pegs:
+            return None
+        pegs = self.pegs(marker)
+        return None if pegs is None else self.is_winnable(pegs)
+
+    def pegs(self, marker):
+        """
+        Return the peg bitmask of the position in marker, as held by a
+        GridPegSolitairePuzzle, or None if marker does not have the board
+        shape of EndgameDatabase self.
+
+        @type self: EndgameDatabase
+        @type marker: list[list[str]]
+        @rtype: int | None
+
+        >>> db = build_endgame_database(["...", "#.#"], 1)
+        >>> db.pegs([["*", ".", "*"], ["#", "*", "#"]])
+        13
+        >>> db.pegs([["*", ".", "*"], [".", "*", "#"]])
+        """
+        if (len(marker) != len(self.shape) or
+                any([len(row) != len(self.shape[0]) for row in marker])):
+            return None
+        if any([marker[r][c] != "#" for (r, c) in self._unused]):
+            return None
+        pegs = 0
+        for i, (r, c) in enumerate(self.holes):
+            if marker[r][c] == "*":
+                pegs |= 1 << i
+            elif marker[r][c] == "#":
+                return None
+        return pegs
+
+    def solve(self, pegs, budget=None, dead=None):
+        """
+        Return the jumps, as (start, over, end) hole indices, that reduce
+        the position with peg bitmask pegs to a single peg, None if there
+        are none, or BudgetExceeded if SearchBudget budget runs out first.
+
+        The search is depth-first and tries the jumps that leave the pegs
+        most compact first: fewest empty holes next to a peg, then fewest
+        pegs with no peg next to them. Scattered pegs are what cannot be
+        cleared, so this reaches winnable endgames early. Positions whose
+        jumps all fail are added to the set of peg bitmasks dead, which
+        later searches on the same board may share. Once a position has
+        at most max_pegs pegs the database decides it without search.
+
+        @type self: EndgameDatabase
+        @type pegs: int
+        @type budget: SearchBudget | None
+        @type dead: set[int] | None
+        @rtype: list[tuple(int, int, int)] | BudgetExceeded | None
+
+        >>> db = build_endgame_database(["...", "...", "..."], 2)
+        >>> db.solve(0b000011011)
+        [(1, 4, 7), (0, 3, 6), (6, 7, 8)]
+        >>> db.solve(0b101000101) is None
+        True
+        """
+        if dead is None:
+            dead = set()
+        if budget is not None:
+            budget.start()
+        count = bin(pegs).count("1")
+        if count <= self.max_pegs or pegs in dead:
+            if budget is not None:
+                budget.finish()
+            return self._finish(pegs) if self.is_winnable(pegs) else None
+
+        # the current path, one (position, its jumps left) per level;
+        # moves[i] leads from the position of frame i to that of i + 1
+        frames, moves = [(pegs, self._jumps_from(pegs))], []
+        while len(frames) > 0:
+            current, jumps = frames[-1]
+            step = next(jumps, None)
+            if step is None:
+                # every jump failed
+                dead.add(current)
+                frames.pop()
+                if len(moves) > 0:
+                    moves.pop()
+                continue
+            child, jump = step
+            if child in dead:
+                continue
+
+            if budget is not None:
+                reason = budget.charge(len(frames), len(dead))
+                if reason is not None:
+                    return BudgetExceeded(reason, budget.stats)
+
+            if count - len(frames) <= self.max_pegs:
+                if self.is_winnable(child):
+                    if budget is not None:
+                        budget.finish()
+                    return moves + [jump] + self._finish(child)
+                continue
+            frames.append((child, self._jumps_from(child)))
+            moves.append(jump)
+
+        if budget is not None:
+            budget.finish()
+        return None
+
+    def _jumps_from(self, pegs):
+        # iterator over (position after, jump) for every legal jump, most
+        # compact positions first
+        children = []
+        for start, over, end, jump in self._jumps:
+            if pegs & start and pegs & over and not pegs & end:
+                child = pegs ^ start ^ over ^ end
+                children.append((self._scatter(child), len(children),
+                                 child, jump))
+        children.sort()
+        return iter([(child, jump) for _, _, child, jump in children])
+
+    def _scatter(self, pegs):
+        # (empty holes next to a peg, pegs with no peg next to them)
+        boundary, isolated, rest = 0, 0, pegs
+        while rest:
+            low = rest & -rest
+            neighbours = self._neighbours[low.bit_length() - 1]
+            boundary += bin(neighbours & ~pegs).count("1")
+            if not neighbours & pegs:
+                isolated += 1
+            rest ^= low
+        return boundary, isolated
+
+    def _finish(self, pegs):
+        # the jumps from winnable position pegs to a single peg, following
+        # winnable entries of the database
+        jumps = []
+        while pegs & (pegs - 1):
+            for start, over, end, jump in self._jumps:
+                if pegs & start and pegs & over and not pegs & end and \
+                        self.is_winnable(pegs ^ start ^ over ^ end):
+                    pegs ^= start ^ over ^ end
+                    jumps.append(jump)
+                    break
+        return jumps
+
+    def save(self, path):
+        """
+        Write EndgameDatabase self to path.
+
+        @type self: EndgameDatabase
+        @type path: str
+        @rtype: None
+        """
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, _VERSION, len(self.shape),
+                                 len(self.shape[0]), self.max_pegs))
+            f.write("".join(self.shape).encode("ascii"))
+            for bitset in self._bitsets:
+                f.write(bitset)
+
+    @staticmethod
+    def load(path):
+        """
+        Return the EndgameDatabase saved at path, memory-mapped.
+
+        @type path: str
+        @rtype: EndgameDatabase
+
+        >>> import os, tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), "board.peg")
+        >>> build_endgame_database([".....", "#...#"], 3).save(path)
+        >>> db = EndgameDatabase.load(path)
+        >>> db.shape, db.max_pegs
+        (['.....', '#...#'], 3)
+        >>> db.lookup([["*", "*", ".", ".", "."], ["#", ".", ".", ".", "#"]])
+        True
+        """
+        with open(path, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, rows, cols, max_pegs = _HEADER.unpack_from(data, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError("{} is not an endgame database".format(path))
+        offset = _HEADER.size + rows * cols
+        cells = data[_HEADER.size:offset].decode("ascii")
+        shape = [cells[r * cols:(r + 1) * cols] for r in range(rows)]
+        holes = rows * cols - cells.count("#")
+        view, bitsets = memoryview(data), []
+        for k in range(1, max_pegs + 1):
+            size = (comb(holes, k) + 7) // 8
+            bitsets.append(view[offset:offset + size])
+            offset += size
+        return EndgameDatabase(shape, max_pegs, bitsets)
+
+
+def board_jumps(shape):
+    """
+    Return every jump on the board shape as a triple (start, over, end)
+    of hole indices in row-major order.
+
+    @type shape: list[str]
+    @rtype: list[tuple(int, int, int)]
+
+    >>> board_jumps(["...", "#.#"])
+    [(0, 1, 2), (2, 1, 0)]
+    """
+    rows, cols = len(shape), len(shape[0])
+    holes = {}
+    for r in range(rows):
+        for c in range(cols):
+            if shape[r][c] != "#":
+                holes[(r, c)] = len(holes)
+    jumps = []
+    for (r, c), start in holes.items():
+        for dr, dc in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            over, end = (r + dr, c + dc), (r + 2 * dr, c + 2 * dc)
+            if over in holes and end in holes:
+                jumps.append((start, holes[over], holes[end]))
+    return sorted(jumps)
+
+
+def build_endgame_database(shape, max_pegs=8):
+    """
+    Return the EndgameDatabase of all winnable positions with at most
+    max_pegs pegs on the board shape, a list of strings with "#" for
+    unused cells and any other character for holes.
+
+    @type shape: list[str]
+    @type max_pegs: int
+    @rtype: EndgameDatabase
+    """
+    shape = ["".join(["#" if x == "#" else "." for x in row])
+             for row in shape]
+    jumps = [(1 << a, 1 << b, 1 << c) for a, b, c in board_jumps(shape)]
+    holes = sum([row.count(".") for row in shape])
+
+    level = set([1 << i for i in range(holes)])
+    levels = [level]
+    for _ in range(1, max_pegs):
+        # undo a jump: the peg on end goes back to start, over is restored
+        previous = set()
+        for pegs in level:
+            for start, over, end in jumps:
+                if pegs & end and not pegs & (start | over):
+                    previous.add(pegs ^ end | start | over)
+        level = previous
+        levels.append(level)
+
+    db = EndgameDatabase(shape, max_pegs, [])
+    for k, level in enumerate(levels, 1):
+        bitset = bytearray((comb(holes, k) + 7) // 8)
+        for pegs in level:
+            index = db.rank(pegs)
+            bitset[index >> 3] |= 1 << (index & 7)
+        db._bitsets.append(bitset)
+    return db
+
+
+if __name__ == "__main__":
+    import sys
+    from time import time
+
+    # the 33-hole English board
+    english = ["##...##", "##...##", ".......", ".......", ".......",
+               "##...##", "##...##"]
+    max_pegs = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    path = sys.argv[2] if len(sys.argv) > 2 else "english.peg"
+    start = time()
+    db = build_endgame_database(english, max_pegs)
+    db.save(path)
+    print("Built {} with up to {} pegs in {} seconds".format(
+        path, max_pegs, time() - start))
+
+    # every hole but the centre one holds a peg
+    start = time()
+    jumps = db.solve(((1 << len(db.holes)) - 1) ^ 1 << len(db.holes) // 2)
+    print("Solved the board in {} jumps in {} seconds".format(
+        len(jumps), time() - start))
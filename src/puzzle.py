@@ -4,6 +4,13 @@ class Puzzle:
     or even unsolvable.
     """
 
+    # no per-instance dict, so that subclasses may use __slots__
+    __slots__ = ()
+
+    # True if no sequence of extensions can lead back to an earlier
+    # configuration, so that every path of extensions is finite
+    ACYCLIC = False
+
     def fail_fast(self):
         """
         Return True if Puzzle self can never be extended to a solution.
@@ -39,3 +46,99 @@ class Puzzle:
         @rtype: generator[Puzzle]
         """
         raise NotImplementedError
+
+    def heuristic(self):
+        """
+        Return an estimate of the number of moves from Puzzle self to a
+        solution, used to guide informed searches.
+
+        Override this in a subclass with an estimate that never exceeds
+        the true number of moves, so that searches relying on it stay
+        optimal.
+
+        @type self: Puzzle
+        @rtype: int
+        """
+        return 0
+
+    def move_cost(self, move):
+        """
+        Return the cost of making move, as described by move_to, from
+        Puzzle self. Searches for the cheapest solution add these up.
+
+        Override this in a subclass where moves do not all cost the same.
+
+        @type self: Puzzle
+        @type move: str | tuple
+        @rtype: int | float
+        """
+        return 1
+
+    def canonical_key(self):
+        """
+        Return a hashable key for Puzzle self that is shared by every
+        configuration known to have the same outcome, such as mirror
+        images of a symmetric board, for tables of proven dead ends.
+
+        Override this in a subclass whose configurations have symmetries.
+
+        @type self: Puzzle
+        @rtype: Hashable
+        """
+        return self
+
+    def size(self):
+        """
+        Return the size of Puzzle self that matters to the choice of a
+        search strategy for it, such as its side length or its number of
+        cells, or 0 if the type has none.
+
+        Override this in a subclass whose puzzles come in many sizes.
+
+        @type self: Puzzle
+        @rtype: int
+        """
+        return 0
+
+    def successors(self, history=()):
+        """
+        Return the legal extensions of Puzzle self as (move, extension)
+        pairs, given the sequence of moves history that led to self.
+
+        Override this in a subclass that can skip moves that only undo or
+        repeat the effect of earlier ones, so that searches keeping no
+        table of visited configurations waste less time on cycles.
+
+        @type self: Puzzle
+        @type history: Sequence[str | tuple]
+        @rtype: list[tuple(str | tuple, Puzzle)]
+        """
+        return [(self.move_to(ext), ext) for ext in self.extensions()]
+
+    def move_to(self, other):
+        """
+        Return a compact description of the move that turns Puzzle self
+        into other, one of its extensions.
+
+        Override this in a subclass to support move-list output of
+        solutions.
+
+        @type self: Puzzle
+        @type other: Puzzle
+        @rtype: str | tuple
+        """
+        raise NotImplementedError
+
+    def apply_move(self, move):
+        """
+        Return the extension of Puzzle self reached by move, as described
+        by move_to.
+
+        Override this in a subclass to support replaying solutions
+        stored as move lists.
+
+        @type self: Puzzle
+        @type move: str | tuple
+        @rtype: Puzzle
+        """
+        raise NotImplementedError
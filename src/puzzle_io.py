@@ -0,0 +1,345 @@
+"""
+Line-oriented reading of puzzles and JSON-lines output of results.
+
+Each non-blank input line holds one puzzle:
+
+    sudoku       the n * n cells row by row, "." "0" or "*" for empty
+                 cells, e.g. an 81-character line for a 9x9 sudoku
+    mn           the start and target grids separated by a space, rows
+                 separated by "/", e.g. "*23/145 123/45*"
+    peg          the board, rows separated by "/", e.g. "#**#/**.*/#**#"
+    word_ladder  the start and target words, e.g. "same cost"
+    edit_ladder  the start and target words, of any lengths, e.g.
+                 "cat horse"
+
+Lines are parsed one at a time as they are read and every result is
+written as soon as it is found, so memory use does not grow with the
+size of the input.
+"""
+import json
+from time import monotonic
+
+from .budget import SearchBudget
+from .footprint import traced_peak
+from .registry import puzzle_class
+from .solution import Solution
+from .strategies import STRATEGIES
+from .sudoku_generator import DEFAULT_SYMBOLS
+from .word_dictionary import load_dictionary
+
+# characters standing for an empty sudoku cell
+SUDOKU_EMPTY = ".0*"
+
+
+def parse_sudoku(line):
+    """
+    Return the SudokuPuzzle in line.
+
+    @type line: str
+    @rtype: SudokuPuzzle
+
+    >>> print(parse_sudoku("12..34..2..14..2"))
+    12|**
+    34|**
+    -----
+    2*|*1
+    4*|*2
+    """
+    n = round(len(line) ** (1 / 2))
+    if n * n != len(line) or round(n ** (1 / 2)) ** 2 != n:
+        raise ValueError("not a sudoku of square size: {!r}".format(line))
+    symbols = set(line) - set(SUDOKU_EMPTY)
+    if symbols <= set(DEFAULT_SYMBOLS[:n]):
+        symbols = set(DEFAULT_SYMBOLS[:n])
+    if len(symbols) != n:
+        raise ValueError("cannot tell the {} symbols of {!r}".format(
+            n, line))
+    return puzzle_class("sudoku")(
+        n, ["*" if c in SUDOKU_EMPTY else c for c in line], symbols)
+
+
+def parse_mn(line):
+    """
+    Return the MNPuzzle in line.
+
+    @type line: str
+    @rtype: MNPuzzle
+
+    >>> parse_mn("*23/145 123/45*").to_grid
+    (('1', '2', '3'), ('4', '5', '*'))
+    """
+    grids = line.split()
+    if len(grids) != 2:
+        raise ValueError("expected start and target grids: {!r}".format(
+            line))
+    start, target = [tuple([tuple(row) for row in grid.split("/")])
+                     for grid in grids]
+    return puzzle_class("mn")(start, target)
+
+
+def parse_peg(line):
+    """
+    Return the GridPegSolitairePuzzle in line.
+
+    @type line: str
+    @rtype: GridPegSolitairePuzzle
+
+    >>> print(parse_peg("#**#/**.*/#**#"))
+    #**#
+    **.*
+    #**#
+    """
+    marker = [list(row) for row in line.split("/")]
+    return puzzle_class("peg")(marker, {"*", ".", "#"})
+
+
+def parse_word_ladder(line, words=None):
+    """
+    Return the WordLadderPuzzle in line, using the word set words or the
+    default dictionary.
+
+    @type line: str
+    @type words: set[str] | None
+    @rtype: WordLadderPuzzle
+
+    >>> print(parse_word_ladder("same cost", {"same", "cost"}))
+    same -> cost
+    """
+    pair = line.split()
+    if len(pair) != 2:
+        raise ValueError("expected two words: {!r}".format(line))
+    if words is None:
+        words = load_dictionary(len(pair[0]))
+    return puzzle_class("word_ladder")(pair[0], pair[1], words)
+
+
+def parse_edit_ladder(line, words=None):
+    """
+    Return the EditLadderPuzzle in line, stepping through the word set
+    words or the default dictionary of words of every length.
+
+    @type line: str
+    @type words: set[str] | None
+    @rtype: EditLadderPuzzle
+
+    >>> print(parse_edit_ladder("cat cart", {"cat", "cart"}))
+    cat -> cart
+    """
+    pair = line.split()
+    if len(pair) != 2:
+        raise ValueError("expected two words: {!r}".format(line))
+    if words is None:
+        words = load_dictionary()
+    return puzzle_class("edit_ladder")(pair[0], pair[1], words)
+
+
+# puzzle type name -> function parsing a line
+PARSERS = {"sudoku": parse_sudoku, "mn": parse_mn, "peg": parse_peg,
+           "word_ladder": parse_word_ladder,
+           "edit_ladder": parse_edit_ladder}
+
+
+def parse_line(kind, line, words=None):
+    """
+    Return the puzzle of type kind on line, a stripped non-blank line,
+    over the word set words for word ladders. Raise ValueError if line
+    holds no such puzzle.
+
+    @type kind: str
+    @type line: str
+    @type words: set[str] | None
+    @rtype: Puzzle
+
+    >>> parse_line("mn", "*2/13")
+    Traceback (most recent call last):
+    ...
+    ValueError: expected start and target grids: '*2/13'
+    """
+    try:
+        if kind in ("word_ladder", "edit_ladder"):
+            # without words, the dictionary for each word length is
+            # loaded once and shared by all puzzles
+            return PARSERS[kind](line, words)
+        return PARSERS[kind](line)
+    except (ValueError, AssertionError) as error:
+        raise ValueError(str(error) or "invalid puzzle: {!r}".format(line))
+
+
+def read_puzzles(lines, kind, words=None):
+    """
+    Yield (line number, puzzle or ValueError) for every non-blank line of
+    lines, parsed as puzzle type kind, as the lines are read. Lines that
+    cannot be parsed give the ValueError instead of stopping the reader.
+
+    @type lines: Iterable[str]
+    @type kind: str
+    @type words: set[str] | None
+    @rtype: generator[tuple(int, Puzzle | ValueError)]
+
+    >>> for number, item in read_puzzles(["*2/13 12/3*", "", "12"], "mn"):
+    ...     print(number, item)
+    1 *2
+    13
+    3 expected start and target grids: '12'
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if len(line) == 0:
+            continue
+        try:
+            yield number, parse_line(kind, line, words)
+        except ValueError as error:
+            yield number, error
+
+
+def result_record(number, puzzle, result, elapsed):
+    """
+    Return the result record of the puzzle on line number: its solution,
+    or its start and whether the search stopped early, and the elapsed
+    seconds of the search that gave result.
+
+    @type number: int
+    @type puzzle: Puzzle
+    @type result: Solution | BudgetExceeded | None
+    @type elapsed: float
+    @rtype: dict
+
+    >>> from .budget import BudgetExceeded, SearchStats
+    >>> puzzle = parse_mn("*2/13 12/3*")
+    >>> record = result_record(1, puzzle, Solution(puzzle, "DR"), 0.5)
+    >>> record["moves"], record["solved"], record["elapsed"]
+    (['D', 'R'], True, 0.5)
+    >>> result = BudgetExceeded("deadline", SearchStats())
+    >>> result_record(2, puzzle, result, 0.25)["reason"]
+    'deadline'
+    """
+    record = {"line": number}
+    if isinstance(result, Solution):
+        record.update(result.to_dict())
+        record["solved"] = True
+    else:
+        record.update({"start": str(puzzle), "solved": False})
+        if result is not None:
+            record["reason"] = result.reason
+    record["elapsed"] = round(elapsed, 6)
+    return record
+
+
+def write_result(out, record):
+    """
+    Write record to out as one line of JSON and flush it.
+
+    @type out: io.TextIOBase
+    @type record: dict
+    @rtype: None
+    """
+    out.write(json.dumps(record) + "\n")
+    out.flush()
+
+
+def solve_puzzle(number, puzzle, strategy, limits, trace_memory=False):
+    """
+    Return the result record of puzzle, from line number, solved with
+    strategy, a name in strategies.STRATEGIES, under a SearchBudget with
+    limits, with the nodes expanded and the peak frontier of the search.
+    If trace_memory is true, the record includes the peak memory of the
+    search in bytes, traced with tracemalloc. A strategy that cannot
+    search puzzles of this type gives an error record.
+
+    @type number: int
+    @type puzzle: Puzzle
+    @type strategy: str
+    @type limits: dict
+    @type trace_memory: bool
+    @rtype: dict
+
+    >>> puzzle = parse_mn("*2/13 12/3*")
+    >>> record = solve_puzzle(1, puzzle, "ida", {})
+    >>> record["moves"], record["solved"], record["expanded"]
+    (['D', 'R'], True, 2)
+    >>> solve_puzzle(2, puzzle, "bfs", {}, True)["peak_memory"] > 0
+    True
+    >>> solve_puzzle(3, puzzle, "memo", {})["error"]
+    'memoized depth-first search needs an acyclic puzzle, not MNPuzzle'
+    """
+    budget = SearchBudget(**limits)
+    started = monotonic()
+    try:
+        if trace_memory:
+            result, peak = traced_peak(STRATEGIES[strategy], puzzle, budget)
+        else:
+            result = STRATEGIES[strategy](puzzle, budget)
+    except ValueError as error:
+        # the strategy cannot search this type of puzzle, e.g. memo on a
+        # puzzle with cycles
+        return {"line": number, "error": str(error)}
+    record = result_record(number, puzzle, result, monotonic() - started)
+    record["expanded"] = budget.stats.expanded
+    record["peak_frontier"] = budget.stats.peak_frontier
+    if trace_memory:
+        record["peak_memory"] = peak
+    return record
+
+
+def solve_line(kind, strategy, limits, number, line, trace_memory=False,
+               words=None):
+    """
+    Return the result record of the puzzle of type kind on line number,
+    as given by solve_puzzle, or an error record if line holds no such
+    puzzle.
+
+    @type kind: str
+    @type strategy: str
+    @type limits: dict
+    @type number: int
+    @type line: str
+    @type trace_memory: bool
+    @type words: set[str] | None
+    @rtype: dict
+
+    >>> solve_line("peg", "bfs", {}, 1, "*.*")["solved"]
+    False
+    >>> solve_line("mn", "bfs", {}, 2, "*2/13")["error"]
+    "expected start and target grids: '*2/13'"
+    """
+    try:
+        puzzle = parse_line(kind, line, words)
+    except ValueError as error:
+        return {"line": number, "error": str(error)}
+    return solve_puzzle(number, puzzle, strategy, limits, trace_memory)
+
+
+def solve_stream(lines, out, kind, strategy="bfs", words=None, **limits):
+    """
+    Solve every puzzle of type kind in lines with strategy, a name in
+    strategies.STRATEGIES, and write its record from solve_puzzle to out
+    as one JSON line as soon as it is done. Each search gets its own
+    SearchBudget with limits (deadline, max_nodes, max_memory). Return
+    the number of puzzles solved.
+
+    @type lines: Iterable[str]
+    @type out: io.TextIOBase
+    @type kind: str
+    @type strategy: str
+    @type words: set[str] | None
+    @rtype: int
+
+    >>> import io, sys
+    >>> lines = io.StringIO("*2/13 12/3*\\n12/3* 12/3*\\nbad\\n")
+    >>> solve_stream(lines, sys.stdout, "mn", max_nodes=1000)
+    ... # doctest: +ELLIPSIS
+    {"line": 1, "start": "*2\\n13", "moves": ["D", "R"], "solved": true, ...}
+    {"line": 2, "start": "12\\n3*", "moves": [], "solved": true, ...}
+    {"line": 3, "error": "expected start and target grids: 'bad'"}
+    2
+    """
+    solved = 0
+    for number, puzzle in read_puzzles(lines, kind, words):
+        if isinstance(puzzle, ValueError):
+            write_result(out, {"line": number, "error": str(puzzle)})
+            continue
+        record = solve_puzzle(number, puzzle, strategy, limits)
+        if record.get("solved"):
+            solved += 1
+        write_result(out, record)
+    return solved
@@ -2,32 +2,25 @@
 Some functions for working with puzzles
 """
 from .puzzle import Puzzle
-from collections import deque
+from .budget import BudgetExceeded
+from .frontier import FifoFrontier, HeapFrontier, StackFrontier
+from .registry import puzzle_class
+from .solution import Solution
 
-from .sudoku_puzzle import SudokuPuzzle
-from .mn_puzzle import MNPuzzle
-from .grid_peg_solitaire_puzzle import GridPegSolitairePuzzle
-from .word_ladder_puzzle import WordLadderPuzzle
 
-# set higher recursion limit
-# which is needed in PuzzleNode.__str__
-# you may uncomment the next lines on a unix system such as CDF
-# import resource
-# resource.setrlimit(resource.RLIMIT_STACK, (2**29, -1))
-import sys
-sys.setrecursionlimit(10**6)
-
-
-def depth_first_solve(puzzle):
+def depth_first_solve(puzzle, budget=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child containing an extension of the puzzle
-    in its parent.  Return None if this is not possible.
+    in its parent.  Return None if this is not possible, or BudgetExceeded
+    if the search is stopped by SearchBudget budget first.
 
     @type puzzle: Puzzle
-    @rtype: PuzzleNode
+    @type budget: SearchBudget | None
+    @rtype: PuzzleNode | BudgetExceeded | None
 
     Test when initial configuration is a solution
+    >>> SudokuPuzzle = puzzle_class("sudoku")
     >>> sgrid = ["A", "B", "C", "D"]
     >>> sgrid += ["C", "D", "A", "B"]
     >>> sgrid += ["B", "A", "D", "C"]
@@ -52,45 +45,92 @@ def depth_first_solve(puzzle):
 
     Test no solution for peg solitaire(no consecutive pegs)
     fail_fast() not implemented
+    >>> GridPegSolitairePuzzle = puzzle_class("peg")
     >>> gps_grid = [[".", "*", ".", "*", "#"]]
     >>> gps = GridPegSolitairePuzzle(gps_grid, {"*", ".", "#"})
     >>> pngps = depth_first_solve(gps)
     >>> pngps is None
     True
+
+    Test search stopped by its budget
+    >>> from .budget import SearchBudget
+    >>> gps_grid = [["*", "*", "*", "*", "*"] for _ in range(4)]
+    >>> gps_grid.append(["*", "*", ".", "*", "*"])
+    >>> gps = GridPegSolitairePuzzle(gps_grid, {"*", ".", "#"})
+    >>> result = depth_first_solve(gps, SearchBudget(max_nodes=50))
+    >>> result.reason, result.stats.expanded
+    ('max_nodes', 50)
     """
 
     root = PuzzleNode(puzzle, None, None)
 
-    solution = dfs(root)
-    if solution is not None:
+    solution = dfs(root, budget)
+    if solution:
         reconstruct_path(solution)
         return root
     else:
-        return None
+        return solution
 
 
-def dfs(start_node):
+def dfs(start_node, budget=None):
     """
-    Return PuzzleNode(puzzle) if puzzle is solved otherwise return None.
+    Return PuzzleNode(puzzle) if puzzle is solved otherwise return None,
+    or BudgetExceeded if SearchBudget budget runs out first.
 
     @type start_node: PuzzleNode
-    @rtype: PuzzleNode
+    @type budget: SearchBudget | None
+    @rtype: PuzzleNode | BudgetExceeded | None
 
     Test that leaf node contains solution
+    >>> MNPuzzle = puzzle_class("mn")
     >>> start_grid = (("1", "2", "3"), ("4", "*", "5"))
     >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
-    >>> mn_root_node = PuzzleNode(MNPuzzle(start_grid, target_grid), None, None)
+    >>> mn_root_node = PuzzleNode(MNPuzzle(start_grid, target_grid),
+    ...                           None, None)
     >>> sol = dfs(mn_root_node)
     >>> sol is None
     False
     >>> sol.puzzle == MNPuzzle(target_grid, target_grid)
     True
     """
+    return frontier_search(start_node, StackFrontier(), budget)
+
+
+def frontier_search(start_node, frontier, budget=None, priority=None):
+    """
+    Return the first PuzzleNode containing a solution reached from
+    PuzzleNode start_node, expanding nodes in the order they come out of
+    Frontier frontier, or None if there is none, or BudgetExceeded if
+    SearchBudget budget runs out first.
+
+    Nodes are pushed with priority(node), or 0 without a priority
+    function. Each configuration is expanded at most once.
+
+    @type start_node: PuzzleNode
+    @type frontier: Frontier
+    @type budget: SearchBudget | None
+    @type priority: (PuzzleNode) -> int | float | tuple | None
+    @rtype: PuzzleNode | BudgetExceeded | None
+
+    >>> from .frontier import BucketFrontier
+    >>> MNPuzzle = puzzle_class("mn")
+    >>> start_grid = (("1", "3", "4"), ("2", "5", "*"))
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> frontier = BucketFrontier()
+    >>> leaf = frontier_search(PuzzleNode(MNPuzzle(start_grid, target_grid)),
+    ...                        frontier,
+    ...                        priority=lambda node: node.puzzle.heuristic())
+    >>> leaf.puzzle.is_solved(), frontier.peak > 0
+    (True, True)
+    """
     visited = set()
-    stack = [start_node]
+    frontier.push(start_node,
+                  0 if priority is None else priority(start_node))
+    if budget is not None:
+        budget.start()
 
-    while len(stack) > 0:
-        puzzle_node = stack.pop()
+    while len(frontier) > 0:
+        puzzle_node = frontier.pop()
 
         curr_puzzle = puzzle_node.puzzle
 
@@ -100,7 +140,13 @@ def dfs(start_node):
 
         visited.add(curr_puzzle_str)
 
+        if budget is not None:
+            reason = budget.charge(len(frontier), len(visited))
+            if reason is not None:
+                return BudgetExceeded(reason, budget.stats)
+
         if curr_puzzle.is_solved():
+            _finish(budget)
             return puzzle_node
 
         if curr_puzzle.fail_fast():
@@ -109,11 +155,19 @@ def dfs(start_node):
         for ext in curr_puzzle.extensions():
             ext_node = PuzzleNode(ext, None, puzzle_node)
             if str(ext) not in visited:
-                stack.append(ext_node)
+                frontier.push(ext_node, 0 if priority is None
+                              else priority(ext_node))
 
+    _finish(budget)
     return None
 
 
+def _finish(budget):
+    # record the final elapsed time of a search that ran to completion
+    if budget is not None:
+        budget.finish()
+
+
 def reconstruct_path(node):
     """
     Make double linked list. Currently this linked list points
@@ -126,17 +180,20 @@ def reconstruct_path(node):
         node = node.parent
 
 
-def breadth_first_solve(puzzle):
+def breadth_first_solve(puzzle, budget=None):
     """
     Return a path from PuzzleNode(puzzle) to a PuzzleNode containing
     a solution, with each child PuzzleNode containing an extension
-    of the puzzle in its parent.  Return None if this is not possible.
+    of the puzzle in its parent.  Return None if this is not possible,
+    or BudgetExceeded if the search is stopped by SearchBudget budget first.
 
     @type puzzle: Puzzle
-    @rtype: PuzzleNode
+    @type budget: SearchBudget | None
+    @rtype: PuzzleNode | BudgetExceeded | None
 
     Test when initial configuration is a solution
-     >>> dictionary = {"same", "some", "hello"}
+    >>> WordLadderPuzzle = puzzle_class("word_ladder")
+    >>> dictionary = {"same", "some", "hello"}
     >>> wlp = WordLadderPuzzle("same", "same", dictionary )
     >>> pn = breadth_first_solve(wlp)
     >>> pn is None
@@ -145,6 +202,7 @@ def breadth_first_solve(puzzle):
     True
 
     Test no solution for peg solitaire(no consecutive pegs)
+    >>> GridPegSolitairePuzzle = puzzle_class("peg")
     >>> gps_grid = [[".", "*", ".", "*", "#"]]
     >>> gps = GridPegSolitairePuzzle(gps_grid, {"*", ".", "#"})
     >>> pngps = breadth_first_solve(gps)
@@ -154,60 +212,707 @@ def breadth_first_solve(puzzle):
 
     root = PuzzleNode(puzzle, None, None)
 
-    solution = bfs(root)
+    solution = bfs(root, budget)
 
-    if solution is not None:
+    if solution:
         reconstruct_path(solution)
         return root
     else:
-        return None
+        return solution
 
 
-def bfs(start_node):
+def bfs(start_node, budget=None):
     """
-    Return PuzzleNode(puzzle) if puzzle is solved otherwise return None.
+    Return PuzzleNode(puzzle) if puzzle is solved otherwise return None,
+    or BudgetExceeded if SearchBudget budget runs out first.
 
     @type start_node: PuzzleNode
-    @rtype: PuzzleNode
+    @type budget: SearchBudget | None
+    @rtype: PuzzleNode | BudgetExceeded | None
 
     Test that leaf node contains solution
+    >>> MNPuzzle = puzzle_class("mn")
     >>> start_grid = (("*", "2", "3"), ("1", "4", "5"))
     >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
-    >>> mn_root_node = PuzzleNode(MNPuzzle(start_grid, target_grid), None, None)
+    >>> mn_root_node = PuzzleNode(MNPuzzle(start_grid, target_grid),
+    ...                           None, None)
     >>> sol = dfs(mn_root_node)
     >>> sol is None
     False
     >>> sol.puzzle == MNPuzzle(target_grid, target_grid)
     True
     """
-    visited = set()
-    queue = deque([start_node])
+    return frontier_search(start_node, FifoFrontier(), budget)
 
-    while len(queue) > 0:
-        puzzle_node = queue.pop()
 
-        curr_puzzle = puzzle_node.puzzle
+def depth_first_solution(puzzle, budget=None):
+    """
+    Return the Solution found by depth-first search from puzzle, as a
+    start state and a list of moves, or None if there is none, or
+    BudgetExceeded if SearchBudget budget runs out first.
 
-        curr_puzzle_str = str(curr_puzzle)
-        if curr_puzzle_str in visited:
+    @type puzzle: Puzzle
+    @type budget: SearchBudget | None
+    @rtype: Solution | BudgetExceeded | None
+
+    >>> GridPegSolitairePuzzle = puzzle_class("peg")
+    >>> gps = GridPegSolitairePuzzle([["*", "*", ".", "*"]], {"*", ".", "#"})
+    >>> depth_first_solution(gps).moves
+    (((0, 0), (0, 1), (0, 2)), ((0, 3), (0, 2), (0, 1)))
+    """
+    leaf = dfs(PuzzleNode(puzzle, None, None), budget)
+    return (Solution.from_leaf(leaf) if isinstance(leaf, PuzzleNode)
+            else leaf)
+
+
+def breadth_first_solution(puzzle, budget=None):
+    """
+    Return the Solution found by breadth-first search from puzzle, as a
+    start state and a list of moves, or None if there is none, or
+    BudgetExceeded if SearchBudget budget runs out first.
+
+    @type puzzle: Puzzle
+    @type budget: SearchBudget | None
+    @rtype: Solution | BudgetExceeded | None
+
+    >>> WordLadderPuzzle = puzzle_class("word_ladder")
+    >>> ws = {"same", "some", "come", "cost"}
+    >>> print(breadth_first_solution(WordLadderPuzzle("same", "come", ws)))
+    same -> come
+    <BLANKLINE>
+    1,o 0,c
+    """
+    leaf = bfs(PuzzleNode(puzzle, None, None), budget)
+    return (Solution.from_leaf(leaf) if isinstance(leaf, PuzzleNode)
+            else leaf)
+
+
+def memoized_depth_first_solution(puzzle, budget=None, dead=None):
+    """
+    Return the Solution found by depth-first search from puzzle, None if
+    there is none, or BudgetExceeded if SearchBudget budget runs out first.
+
+    Only the current path is kept. A configuration whose extensions have
+    all been searched without success is proven dead, and its
+    Puzzle.canonical_key is added to the transposition table dead, so it
+    is never searched again however it is reached. The same table may be
+    passed to later searches of the same puzzle type, which then skip
+    every configuration already proven dead. The search is only correct
+    for puzzles whose extensions never lead back to an earlier
+    configuration (Puzzle.ACYCLIC).
+
+    @type puzzle: Puzzle
+    @type budget: SearchBudget | None
+    @type dead: set | None
+    @rtype: Solution | BudgetExceeded | None
+
+    >>> from .budget import SearchBudget
+    >>> GridPegSolitairePuzzle = puzzle_class("peg")
+    >>> grid = [["*", "*", "*", "*"], ["*", "*", "*", "*"],
+    ...         ["*", "*", ".", "*"], ["*", "*", "*", "*"]]
+    >>> gps = GridPegSolitairePuzzle(grid, {"*", ".", "#"})
+    >>> dead, budget, plain = set(), SearchBudget(), SearchBudget()
+    >>> memoized_depth_first_solution(gps, budget, dead) is None
+    True
+    >>> depth_first_solution(gps, plain) is None
+    True
+    >>> budget.stats.expanded < plain.stats.expanded
+    True
+    >>> budget = SearchBudget()
+    >>> memoized_depth_first_solution(gps, budget, dead) is None
+    True
+    >>> budget.stats.expanded
+    0
+    >>> solution = memoized_depth_first_solution(
+    ...     GridPegSolitairePuzzle([["*", "*", ".", "*"]], {"*", ".", "#"}))
+    >>> solution.moves
+    (((0, 0), (0, 1), (0, 2)), ((0, 3), (0, 2), (0, 1)))
+    """
+    if not puzzle.ACYCLIC:
+        raise ValueError("memoized depth-first search needs an acyclic "
+                         "puzzle, not {}".format(type(puzzle).__name__))
+    if dead is None:
+        dead = set()
+    if budget is not None:
+        budget.start()
+    if puzzle.is_solved():
+        _finish(budget)
+        return Solution(puzzle)
+    if puzzle.canonical_key() in dead or puzzle.fail_fast():
+        _finish(budget)
+        return None
+
+    # the current path, one (configuration, extensions left) per level
+    path = [(puzzle, iter(puzzle.extensions()))]
+    while len(path) > 0:
+        current, extensions = path[-1]
+        ext = next(extensions, None)
+        if ext is None:
+            # every extension failed
+            dead.add(current.canonical_key())
+            path.pop()
+            continue
+        key = ext.canonical_key()
+        if key in dead:
             continue
 
-        visited.add(curr_puzzle_str)
+        if budget is not None:
+            reason = budget.charge(len(path), len(dead))
+            if reason is not None:
+                return BudgetExceeded(reason, budget.stats)
 
-        if curr_puzzle.is_solved():
-            return puzzle_node
+        if ext.is_solved():
+            _finish(budget)
+            puzzles = [p for p, _ in path] + [ext]
+            return Solution(puzzle, [a.move_to(b) for a, b
+                                     in zip(puzzles, puzzles[1:])])
+        if ext.fail_fast():
+            dead.add(key)
+            continue
+        path.append((ext, iter(ext.extensions())))
 
-        if curr_puzzle.fail_fast():
+    _finish(budget)
+    return None
+
+
+def uniform_cost_solution(puzzle, budget=None, heuristic=None):
+    """
+    Return the Solution with the lowest total Puzzle.move_cost from
+    puzzle, None if there is none, or BudgetExceeded if SearchBudget
+    budget runs out first.
+
+    Configurations come out of a HeapFrontier by cost so far, plus
+    heuristic(configuration) if given (A*), which must never overestimate
+    the cost left and must not drop by more than the cost of a move.
+    Instead of updating queued entries when a cheaper path to their
+    configuration is found, a new entry is pushed and the stale one is
+    skipped when it comes out.
+
+    @type puzzle: Puzzle
+    @type budget: SearchBudget | None
+    @type heuristic: (Puzzle) -> int | float | None
+    @rtype: Solution | BudgetExceeded | None
+
+    >>> MultiBlankMNPuzzle = puzzle_class("mn_multi")
+    >>> start_grid = (("2", "1", "*"), ("3", "*", "4"))
+    >>> target_grid = (("1", "2", "*"), ("3", "4", "*"))
+    >>> puzzle = MultiBlankMNPuzzle(start_grid, target_grid, {"1": 10})
+    >>> solution = uniform_cost_solution(puzzle)
+    >>> solution.cost(), solution.final().is_solved()
+    (20, True)
+    >>> astar_solution(puzzle).cost()
+    20
+    """
+    if budget is not None:
+        budget.start()
+    if heuristic is None:
+        heuristic = _no_cost
+    # entries are (configuration, parent entry, move from the parent)
+    frontier = HeapFrontier()
+    frontier.push((puzzle, None, None), heuristic(puzzle))
+    # configuration -> lowest cost it was reached with
+    best_cost = {puzzle: 0}
+    closed = set()
+
+    while len(frontier) > 0:
+        entry = frontier.pop()
+        current = entry[0]
+        if current in closed:
+            # a stale entry, superseded by a cheaper one
             continue
+        closed.add(current)
 
-        for ext in curr_puzzle.extensions():
-            ext_node = PuzzleNode(ext, None, puzzle_node)
-            if str(ext) not in visited:
-                queue.appendleft(ext_node)
+        if budget is not None:
+            reason = budget.charge(len(frontier), len(best_cost))
+            if reason is not None:
+                return BudgetExceeded(reason, budget.stats)
+
+        if current.is_solved():
+            _finish(budget)
+            moves = []
+            while entry[1] is not None:
+                moves.append(entry[2])
+                entry = entry[1]
+            moves.reverse()
+            return Solution(puzzle, moves)
+        if current.fail_fast():
+            continue
+
+        cost = best_cost[current]
+        for move, ext in current.successors():
+            ext_cost = cost + current.move_cost(move)
+            if (ext not in closed and
+                    ext_cost < best_cost.get(ext, ext_cost + 1)):
+                best_cost[ext] = ext_cost
+                frontier.push((ext, entry, move), ext_cost + heuristic(ext))
+
+    _finish(budget)
+    return None
+
+
+def astar_solution(puzzle, budget=None):
+    """
+    Return the Solution with the lowest total Puzzle.move_cost from
+    puzzle found by A* guided by Puzzle.heuristic, as for
+    uniform_cost_solution.
+
+    @type puzzle: Puzzle
+    @type budget: SearchBudget | None
+    @rtype: Solution | BudgetExceeded | None
+    """
+    return uniform_cost_solution(puzzle, budget, _puzzle_heuristic)
+
+
+def _no_cost(puzzle):
+    # uniform-cost search: no estimate of the cost left
+    return 0
+
+
+def iterative_deepening_solve(puzzle, heuristic=None, max_depth=None,
+                              budget=None):
+    """
+    Return a shortest path from PuzzleNode(puzzle) to a PuzzleNode
+    containing a solution, found by iterative deepening (IDA* when
+    heuristic is given), or None if there is none within max_depth moves,
+    or BudgetExceeded if SearchBudget budget runs out first.
+
+    Only the current path is kept, not a table of visited configurations:
+    moves come from Puzzle.successors, which may prune moves that undo
+    earlier ones. heuristic(puzzle) must never overestimate the number of
+    moves left; without one every depth is searched in turn. Without
+    max_depth, a puzzle with no solution and cycles not pruned by
+    successors is searched forever.
+
+    @type puzzle: Puzzle
+    @type heuristic: (Puzzle) -> int | None
+    @type max_depth: int | None
+    @type budget: SearchBudget | None
+    @rtype: PuzzleNode | BudgetExceeded | None
+
+    >>> MNPuzzle = puzzle_class("mn")
+    >>> start_grid = (("1", "3", "4"), ("2", "5", "*"))
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> puzzle = MNPuzzle(start_grid, target_grid)
+    >>> root = iterative_deepening_solve(puzzle)
+    >>> moves = list(iter_moves(root))
+    >>> len(moves), len(breadth_first_solution(puzzle).moves)
+    (16, 16)
+    >>> iterative_deepening_solve(puzzle, max_depth=len(moves) - 1) is None
+    True
+    """
+    if heuristic is None:
+        heuristic = _no_heuristic
+    if budget is not None:
+        budget.start()
+
+    bound = heuristic(puzzle)
+    while max_depth is None or bound <= max_depth:
+        # each frame is (puzzle, iterator over its successors); moves[i]
+        # leads from the puzzle of frame i to that of frame i + 1
+        frames, moves = [(puzzle, None)], []
+        next_bound = None
+        while len(frames) > 0:
+            curr_puzzle, successors = frames[-1]
+            if successors is None:
+                cost = len(moves) + heuristic(curr_puzzle)
+                if cost > bound:
+                    if next_bound is None or cost < next_bound:
+                        next_bound = cost
+                elif curr_puzzle.is_solved():
+                    _finish(budget)
+                    return _path_nodes([p for p, _ in frames])
+                elif not curr_puzzle.fail_fast():
+                    successors = iter(curr_puzzle.successors(moves))
+                    frames[-1] = (curr_puzzle, successors)
+                    if budget is not None:
+                        reason = budget.charge(len(frames), 0)
+                        if reason is not None:
+                            return BudgetExceeded(reason, budget.stats)
+            step = None if successors is None else next(successors, None)
+            if step is None:
+                frames.pop()
+                if len(moves) > 0 and len(frames) > 0:
+                    moves.pop()
+            else:
+                moves.append(step[0])
+                frames.append((step[1], None))
+        if next_bound is None:
+            # nothing was cut off: the whole tree was searched
+            break
+        bound = next_bound
 
+    _finish(budget)
     return None
 
 
+def _no_heuristic(puzzle):
+    # plain iterative deepening: every configuration may be one move away
+    return 0
+
+
+def _puzzle_heuristic(puzzle):
+    return puzzle.heuristic()
+
+
+def _path_nodes(puzzles):
+    # PuzzleNodes linked both ways along puzzles, returning the first
+    root = node = PuzzleNode(puzzles[0], None, None)
+    for curr_puzzle in puzzles[1:]:
+        child = PuzzleNode(curr_puzzle, None, node)
+        node.children, node = [child], child
+    return root
+
+
+def count_solutions(puzzle, limit=None, shortest=None, budget=None):
+    """
+    Return the number of solutions from puzzle, counting no further
+    than limit, or BudgetExceeded if SearchBudget budget runs out first.
+
+    For puzzles whose extensions never cycle (Puzzle.ACYCLIC) every path
+    from puzzle to a solved configuration counts, and the count below
+    each configuration is memoized so that subtrees reached by several
+    move orders are counted once. Otherwise, or if shortest is True,
+    only shortest solutions are counted, layer by layer. Only the current
+    path is kept on an explicit stack, so deep puzzles do not need a
+    raised recursion limit.
+
+    @type puzzle: Puzzle
+    @type limit: int | None
+    @type shortest: bool | None
+    @type budget: SearchBudget | None
+    @rtype: int | BudgetExceeded
+
+    >>> from .budget import SearchBudget
+    >>> SudokuPuzzle = puzzle_class("sudoku")
+    >>> empty = SudokuPuzzle(4, ["*"] * 16, {"A", "B", "C", "D"})
+    >>> count_solutions(empty), count_solutions(empty, limit=2)
+    (288, 2)
+    >>> count_solutions(empty, budget=SearchBudget(max_nodes=10)).reason
+    'max_nodes'
+    >>> GridPegSolitairePuzzle = puzzle_class("peg")
+    >>> gps_grid = [["*", "*", "*"], ["*", "*", "*"], ["*", ".", "*"]]
+    >>> count_solutions(GridPegSolitairePuzzle(gps_grid, {"*", ".", "#"}))
+    0
+    >>> gps_grid = [["*", "*", "."], ["*", "*", "."], [".", ".", "."]]
+    >>> count_solutions(GridPegSolitairePuzzle(gps_grid, {"*", ".", "#"}))
+    4
+    >>> WordLadderPuzzle = puzzle_class("word_ladder")
+    >>> ws = {"cat", "cot", "cog", "dog", "cag", "dot"}
+    >>> count_solutions(WordLadderPuzzle("cat", "dog", ws))
+    3
+    """
+    if shortest is None:
+        shortest = not puzzle.ACYCLIC
+    if budget is not None:
+        budget.start()
+    if shortest:
+        return _count_shortest_solutions(puzzle, limit, budget)
+
+    # configuration string -> solutions below it, capped at limit
+    memo = {}
+    total = _known_count(puzzle, memo)
+    if total is not None:
+        _finish(budget)
+        return total
+    # the current path, one [configuration string, extensions left,
+    # solutions found so far] per level
+    stack = []
+    ext = puzzle
+    while True:
+        if ext is not None:
+            if budget is not None:
+                reason = budget.charge(len(stack), len(memo))
+                if reason is not None:
+                    return BudgetExceeded(reason, budget.stats)
+            stack.append([str(ext), iter(ext.extensions()), 0])
+        frame = stack[-1]
+        ext = (None if limit is not None and frame[2] >= limit
+               else next(frame[1], None))
+        if ext is None:
+            stack.pop()
+            total = frame[2] if limit is None else min(frame[2], limit)
+            memo[frame[0]] = total
+            if len(stack) == 0:
+                _finish(budget)
+                return total
+            stack[-1][2] += total
+            continue
+        known = _known_count(ext, memo)
+        if known is not None:
+            frame[2] += known
+            ext = None
+
+
+def _known_count(puzzle, memo):
+    # solutions from puzzle if known without searching it, else None
+    if puzzle.is_solved():
+        return 1
+    if puzzle.fail_fast():
+        return 0
+    return memo.get(str(puzzle))
+
+
+def _count_shortest_solutions(puzzle, limit, budget):
+    # number of shortest paths into each configuration of a layer
+    layer, counts = {str(puzzle): puzzle}, {str(puzzle): 1}
+    seen = set(layer)
+    while len(layer) > 0:
+        solved = [key for key in layer if layer[key].is_solved()]
+        if len(solved) > 0:
+            _finish(budget)
+            total = sum([counts[key] for key in solved])
+            return total if limit is None else min(total, limit)
+        next_layer, next_counts = {}, {}
+        for key, curr_puzzle in layer.items():
+            if budget is not None:
+                reason = budget.charge(len(layer), len(seen))
+                if reason is not None:
+                    return BudgetExceeded(reason, budget.stats)
+            if curr_puzzle.fail_fast():
+                continue
+            for ext in curr_puzzle.extensions():
+                ext_key = str(ext)
+                if ext_key in seen:
+                    continue
+                if ext_key not in next_layer:
+                    next_layer[ext_key], next_counts[ext_key] = ext, 0
+                next_counts[ext_key] += counts[key]
+        seen.update(next_layer)
+        layer, counts = next_layer, next_counts
+    _finish(budget)
+    return 0
+
+
+def iter_solutions(puzzle, shortest=None, budget=None):
+    """
+    Yield every solution from puzzle as a Solution, one at a time and
+    without retaining the ones already yielded. If SearchBudget budget
+    runs out first, the last item yielded is BudgetExceeded.
+
+    For puzzles whose extensions never cycle (Puzzle.ACYCLIC), every path
+    from puzzle to a solved configuration is a solution; configurations
+    found to have no solution below them are remembered and skipped.
+    Otherwise, or if shortest is True, only the shortest solutions are
+    generated, from a breadth-first search that keeps every parent of
+    each configuration. Both keep their paths on explicit stacks.
+
+    @type puzzle: Puzzle
+    @type shortest: bool | None
+    @type budget: SearchBudget | None
+    @rtype: generator[Solution | BudgetExceeded]
+
+    >>> from .budget import SearchBudget
+    >>> GridPegSolitairePuzzle = puzzle_class("peg")
+    >>> gps_grid = [["*", "*", "."], ["*", "*", "."], [".", ".", "."]]
+    >>> gps = GridPegSolitairePuzzle(gps_grid, {"*", ".", "#"})
+    >>> [len(s) for s in iter_solutions(gps)]
+    [3, 3, 3, 3]
+    >>> [str(s) for s in iter_solutions(gps, budget=SearchBudget(
+    ...     max_nodes=1))] # doctest: +ELLIPSIS
+    ['budget exceeded (max_nodes): ...']
+    >>> WordLadderPuzzle = puzzle_class("word_ladder")
+    >>> ws = {"cat", "cot", "cog", "dog", "cag", "dot"}
+    >>> ladders = iter_solutions(WordLadderPuzzle("cat", "dog", ws))
+    >>> sorted([" ".join([format_move(m) for m in s.moves]) for s in ladders])
+    ['1,o 0,d 2,g', '1,o 2,g 0,d', '2,g 1,o 0,d']
+    """
+    if shortest is None:
+        shortest = not puzzle.ACYCLIC
+    if shortest:
+        return _iter_shortest_solutions(puzzle, budget)
+    return _iter_all_solutions(puzzle, budget)
+
+
+def _iter_all_solutions(puzzle, budget):
+    # depth-first over all paths, keeping only the current one; each
+    # frame is [puzzle, iterator over its extensions, solution found]
+    if budget is not None:
+        budget.start()
+    dead, moves = set(), []
+    stack = [[puzzle, None, False]]
+
+    def leave(found):
+        frame = stack.pop()
+        if not found:
+            dead.add(str(frame[0]))
+        if len(stack) > 0:
+            stack[-1][2] = stack[-1][2] or found
+            moves.pop()
+
+    while len(stack) > 0:
+        frame = stack[-1]
+        curr_puzzle = frame[0]
+        if frame[1] is None:
+            if curr_puzzle.is_solved():
+                yield Solution(puzzle, moves)
+                leave(True)
+                continue
+            if curr_puzzle.fail_fast() or str(curr_puzzle) in dead:
+                leave(False)
+                continue
+            if budget is not None:
+                reason = budget.charge(len(stack), len(dead))
+                if reason is not None:
+                    yield BudgetExceeded(reason, budget.stats)
+                    return
+            frame[1] = iter(curr_puzzle.extensions())
+        ext = next(frame[1], None)
+        if ext is None:
+            leave(frame[2])
+        else:
+            moves.append(curr_puzzle.move_to(ext))
+            stack.append([ext, None, False])
+    _finish(budget)
+
+
+def _iter_shortest_solutions(puzzle, budget):
+    # breadth-first layers, recording every (parent, move) of each
+    # configuration, then all paths back from the solved ones
+    if budget is not None:
+        budget.start()
+    parents = {str(puzzle): []}
+    layer, solved = [puzzle], []
+    while len(layer) > 0:
+        solved = [p for p in layer if p.is_solved()]
+        if len(solved) > 0:
+            break
+        next_layer, next_parents = [], {}
+        for curr_puzzle in layer:
+            if budget is not None:
+                reason = budget.charge(len(layer), len(parents))
+                if reason is not None:
+                    yield BudgetExceeded(reason, budget.stats)
+                    return
+            if curr_puzzle.fail_fast():
+                continue
+            key = str(curr_puzzle)
+            for ext in curr_puzzle.extensions():
+                ext_key = str(ext)
+                if ext_key in parents:
+                    continue
+                if ext_key not in next_parents:
+                    next_parents[ext_key] = []
+                    next_layer.append(ext)
+                next_parents[ext_key].append((key, curr_puzzle.move_to(ext)))
+        parents.update(next_parents)
+        layer = next_layer
+    _finish(budget)
+
+    for goal in solved:
+        stack = [(str(goal), ())]
+        while len(stack) > 0:
+            key, tail = stack.pop()
+            if len(parents[key]) == 0:
+                yield Solution(puzzle, tail)
+            for parent_key, move in parents[key]:
+                stack.append((parent_key, (move,) + tail))
+
+
+def iter_path(node):
+    """
+    Yield the puzzles on the path starting at PuzzleNode node, following
+    the first child of each node, without building intermediate strings.
+
+    @type node: PuzzleNode
+    @rtype: generator[Puzzle]
+
+    >>> MNPuzzle = puzzle_class("mn")
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start_grid = (("1", "2", "3"), ("*", "4", "5"))
+    >>> root = breadth_first_solve(MNPuzzle(start_grid, target_grid))
+    >>> len(list(iter_path(root)))
+    3
+    """
+    while node is not None:
+        yield node.puzzle
+        node = node.children[0] if len(node.children) > 0 else None
+
+
+def iter_moves(node):
+    """
+    Yield the moves along the path starting at PuzzleNode node, as
+    described by Puzzle.move_to.
+
+    @type node: PuzzleNode
+    @rtype: generator[str | tuple]
+
+    >>> MNPuzzle = puzzle_class("mn")
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start_grid = (("1", "2", "3"), ("*", "4", "5"))
+    >>> root = breadth_first_solve(MNPuzzle(start_grid, target_grid))
+    >>> list(iter_moves(root))
+    ['R', 'R']
+    """
+    previous = None
+    for puzzle in iter_path(node):
+        if previous is not None:
+            yield previous.move_to(puzzle)
+        previous = puzzle
+
+
+def format_move(move):
+    """
+    Return move as a compact token without spaces: directions are kept
+    as they are and the numbers and symbols of tuple moves are joined
+    with commas.
+
+    @type move: str | tuple
+    @rtype: str
+
+    >>> format_move("U")
+    'U'
+    >>> format_move((15, "A"))
+    '15,A'
+    >>> format_move(((0, 2), (0, 1), (0, 0)))
+    '0,2,0,1,0,0'
+    """
+    if isinstance(move, tuple):
+        return ",".join([format_move(part) for part in move])
+    return str(move)
+
+
+def write_path(node, out, moves=False):
+    """
+    Write the path starting at PuzzleNode node to the file object out,
+    one step at a time.
+
+    By default every state is written, separated by blank lines as in
+    str(node). With moves=True only the start state is written, followed
+    by a single line of space-separated moves.
+
+    @type node: PuzzleNode
+    @type out: io.TextIOBase
+    @type moves: bool
+    @rtype: None
+
+    >>> import io
+    >>> MNPuzzle = puzzle_class("mn")
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> start_grid = (("1", "2", "3"), ("*", "4", "5"))
+    >>> root = breadth_first_solve(MNPuzzle(start_grid, target_grid))
+    >>> out = io.StringIO()
+    >>> write_path(root, out, moves=True)
+    >>> print(out.getvalue())
+    123
+    *45
+    <BLANKLINE>
+    R R
+    <BLANKLINE>
+    """
+    if moves:
+        out.write("{}\n\n".format(node.puzzle))
+        first = True
+        for move in iter_moves(node):
+            if not first:
+                out.write(" ")
+            out.write(format_move(move))
+            first = False
+        out.write("\n")
+    else:
+        for puzzle in iter_path(node):
+            out.write("{}\n\n".format(puzzle))
+
+
 # Class PuzzleNode helps build trees of PuzzleNodes that have
 # an arbitrary number of children, and a parent.
 class PuzzleNode:
@@ -234,13 +939,20 @@ class PuzzleNode:
 
     def __eq__(self, other):
         """
-        Return whether Puzzle self is equivalent to other
+        Return whether Puzzle self is equivalent to other: both hold equal
+        puzzles and their children, in any order, are equivalent in pairs.
+
+        Every subtree of both trees is numbered by its puzzle and the
+        numbers of its children, equivalent subtrees getting the same
+        number, so children are matched as whole subtrees rather than by
+        their puzzles alone. The trees are walked iteratively, so
+        arbitrarily long paths do not need a raised recursion limit.
 
         @type self: PuzzleNode
         @type other: PuzzleNode | Any
         @rtype: bool
 
-        >>> from word_ladder_puzzle import WordLadderPuzzle
+        >>> WordLadderPuzzle = puzzle_class("word_ladder")
         >>> pn1 = PuzzleNode(WordLadderPuzzle("on", "no", {"on", "no", "oo"}))
         >>> pn2 = PuzzleNode(WordLadderPuzzle("on", "no", {"on", "oo", "no"}))
         >>> pn3 = PuzzleNode(WordLadderPuzzle("no", "on", {"on", "no", "oo"}))
@@ -248,17 +960,76 @@ class PuzzleNode:
         True
         >>> pn1.__eq__(pn3)
         False
+        >>> pn1.children = [pn3, PuzzleNode(pn2.puzzle)]
+        >>> pn2.children = [PuzzleNode(pn1.puzzle), pn3]
+        >>> pn1.__eq__(pn2)
+        True
+
+        Children with equal puzzles are told apart by their subtrees:
+
+        >>> leaf = PuzzleNode(pn3.puzzle)
+        >>> a = PuzzleNode(pn1.puzzle, [PuzzleNode(pn1.puzzle),
+        ...                             PuzzleNode(pn1.puzzle, [leaf])])
+        >>> b = PuzzleNode(pn1.puzzle, [PuzzleNode(pn1.puzzle, [leaf]),
+        ...                             PuzzleNode(pn1.puzzle)])
+        >>> a.__eq__(b), a.__eq__(PuzzleNode(pn1.puzzle, [
+        ...     PuzzleNode(pn1.puzzle, [leaf]), PuzzleNode(pn3.puzzle)]))
+        (True, False)
         """
-        return (type(self) == type(other) and
-                self.puzzle == other.puzzle and
-                all([x in self.children for x in other.children]) and
-                all([x in other.children for x in self.children]))
+        if type(other) != type(self):
+            return False
+        # (puzzle, sorted numbers of the children) -> number of the subtree
+        numbers = {}
+        return self._number(numbers) == other._number(numbers)
+
+    def _number(self, numbers):
+        # the number of the subtree at self in numbers, numbering its
+        # subtrees first; children are numbered before their parents
+        stack, numbered = [(self, False)], {}
+        while len(stack) > 0:
+            node, expanded = stack.pop()
+            if not expanded:
+                stack.append((node, True))
+                stack.extend([(child, False) for child in node.children])
+                continue
+            key = (node.puzzle, tuple(sorted(
+                [numbered[id(child)] for child in node.children])))
+            numbered[id(node)] = numbers.setdefault(key, len(numbers))
+        return numbered[id(self)]
 
     def __str__(self):
         """
         Return a human-readable string representing PuzzleNode self.
 
-        # doctest not feasible.
+        The tree is rendered iteratively, so arbitrarily long paths do not
+        need a raised recursion limit.
+
+        @type self: PuzzleNode
+        @rtype: str
+
+        >>> WordLadderPuzzle = puzzle_class("word_ladder")
+        >>> ws = {"on", "oo", "no"}
+        >>> root = PuzzleNode(WordLadderPuzzle("on", "no", ws))
+        >>> leaf = PuzzleNode(WordLadderPuzzle("oo", "no", ws), None, root)
+        >>> root.children = [leaf]
+        >>> print(root)
+        on -> no
+        <BLANKLINE>
+        oo -> no
+        <BLANKLINE>
+        <BLANKLINE>
         """
-        return "{}\n\n{}".format(self.puzzle,
-                                 "\n".join([str(x) for x in self.children]))
+        parts = []
+        # pending nodes and separators, in reverse order of output
+        stack = [self]
+        while len(stack) > 0:
+            item = stack.pop()
+            if isinstance(item, str):
+                parts.append(item)
+                continue
+            parts.append("{}\n\n".format(item.puzzle))
+            for i in range(len(item.children) - 1, -1, -1):
+                stack.append(item.children[i])
+                if i > 0:
+                    stack.append("\n")
+        return "".join(parts)
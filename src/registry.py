@@ -0,0 +1,68 @@
+"""
+Registry of the available puzzle types.
+
+Puzzle classes are recorded by module and class name and only imported
+the first time they are requested, so that the solver core can be used
+without loading every puzzle type.
+"""
+from importlib import import_module
+
+# puzzle type name -> (module, class name)
+PUZZLE_TYPES = {
+    "sudoku": (__package__ + ".sudoku_puzzle", "SudokuPuzzle"),
+    "compact_sudoku": (__package__ + ".compact_sudoku",
+                       "CompactSudokuPuzzle"),
+    "mn": (__package__ + ".mn_puzzle", "MNPuzzle"),
+    "mn_multi": (__package__ + ".mn_puzzle", "MultiBlankMNPuzzle"),
+    "peg": (__package__ + ".grid_peg_solitaire_puzzle",
+            "GridPegSolitairePuzzle"),
+    "word_ladder": (__package__ + ".word_ladder_puzzle", "WordLadderPuzzle"),
+    "edit_ladder": (__package__ + ".edit_ladder", "EditLadderPuzzle"),
+}
+
+
+def register_puzzle(name, module, class_name):
+    """
+    Register the puzzle class class_name of module under name, without
+    importing it.
+
+    @type name: str
+    @type module: str
+    @type class_name: str
+    @rtype: None
+    """
+    PUZZLE_TYPES[name] = (module, class_name)
+
+
+def puzzle_class(name):
+    """
+    Return the puzzle class registered under name, importing its module
+    if necessary.
+
+    @type name: str
+    @rtype: type
+
+    >>> puzzle_class("mn").__name__
+    'MNPuzzle'
+    >>> puzzle_class("chess")
+    Traceback (most recent call last):
+    ...
+    KeyError: 'unknown puzzle type: chess'
+    """
+    if name not in PUZZLE_TYPES:
+        raise KeyError("unknown puzzle type: {}".format(name))
+    module, class_name = PUZZLE_TYPES[name]
+    return getattr(import_module(module), class_name)
+
+
+def puzzle_names():
+    """
+    Return the sorted names of all registered puzzle types.
+
+    @rtype: list[str]
+
+    >>> puzzle_names()  # doctest: +NORMALIZE_WHITESPACE
+    ['compact_sudoku', 'edit_ladder', 'mn', 'mn_multi', 'peg', 'sudoku',
+     'word_ladder']
+    """
+    return sorted(PUZZLE_TYPES)
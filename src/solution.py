@@ -0,0 +1,213 @@
+"""
+Compact representation of puzzle solutions as a start state plus moves.
+"""
+
+
+class Solution:
+    """
+    A solution path stored as its start Puzzle and the sequence of moves
+    (as described by Puzzle.move_to) leading to the solved Puzzle.
+    Intermediate states are only built when replayed.
+    """
+
+    __slots__ = ("start", "moves")
+
+    def __init__(self, start, moves=()):
+        """
+        Create a new Solution self from Puzzle start and moves.
+
+        @type self: Solution
+        @type start: Puzzle
+        @type moves: iterable[str | tuple]
+        @rtype: None
+        """
+        self.start, self.moves = start, tuple(moves)
+
+    @classmethod
+    def from_leaf(cls, node):
+        """
+        Return the Solution for the path from the root of PuzzleNode node
+        down to node, following parent links.
+
+        @type node: PuzzleNode
+        @rtype: Solution
+
+        >>> from .puzzle_tools import PuzzleNode, bfs
+        >>> from .registry import puzzle_class
+        >>> MNPuzzle = puzzle_class("mn")
+        >>> start_grid = (("1", "2", "3"), ("*", "4", "5"))
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> leaf = bfs(PuzzleNode(MNPuzzle(start_grid, target_grid)))
+        >>> Solution.from_leaf(leaf).moves
+        ('R', 'R')
+        """
+        moves = []
+        while node.parent is not None:
+            moves.append(node.parent.puzzle.move_to(node.puzzle))
+            node = node.parent
+        moves.reverse()
+        return cls(node.puzzle, moves)
+
+    @classmethod
+    def from_node(cls, node):
+        """
+        Return the Solution for the path starting at PuzzleNode node,
+        following the first child of each node.
+
+        @type node: PuzzleNode
+        @rtype: Solution
+        """
+        moves = []
+        start = node
+        while len(node.children) > 0:
+            moves.append(node.puzzle.move_to(node.children[0].puzzle))
+            node = node.children[0]
+        return cls(start.puzzle, moves)
+
+    def __len__(self):
+        """
+        Return the number of moves in Solution self.
+
+        @type self: Solution
+        @rtype: int
+        """
+        return len(self.moves)
+
+    def __bool__(self):
+        """
+        Return True: a Solution is found even if it has no moves, unlike
+        the None or BudgetExceeded of a failed search.
+
+        @type self: Solution
+        @rtype: bool
+
+        >>> from .registry import puzzle_class
+        >>> grid = (("1", "2"), ("3", "*"))
+        >>> bool(Solution(puzzle_class("mn")(grid, grid)))
+        True
+        """
+        return True
+
+    def __eq__(self, other):
+        """
+        Return whether Solution self is equivalent to other.
+
+        @type self: Solution
+        @type other: Solution | Any
+        @rtype: bool
+        """
+        return (type(self) == type(other) and
+                self.moves == other.moves and self.start == other.start)
+
+    def __hash__(self):
+        return hash(self.moves)
+
+    def __str__(self):
+        """
+        Return the start state of Solution self followed by its moves.
+
+        @type self: Solution
+        @rtype: str
+        """
+        from .puzzle_tools import format_move
+        return "{}\n\n{}".format(self.start, " ".join(
+            [format_move(move) for move in self.moves]))
+
+    def states(self):
+        """
+        Yield the puzzles of Solution self, replaying its moves from the
+        start state.
+
+        @type self: Solution
+        @rtype: generator[Puzzle]
+
+        >>> from .registry import puzzle_class
+        >>> MNPuzzle = puzzle_class("mn")
+        >>> start_grid = (("1", "2", "3"), ("*", "4", "5"))
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> sol = Solution(MNPuzzle(start_grid, target_grid), "RR")
+        >>> [str(p).split()[1] for p in sol.states()]
+        ['*45', '4*5', '45*']
+        """
+        puzzle = self.start
+        yield puzzle
+        for move in self.moves:
+            puzzle = puzzle.apply_move(move)
+            yield puzzle
+
+    def cost(self):
+        """
+        Return the total Puzzle.move_cost of the moves of Solution self.
+
+        @type self: Solution
+        @rtype: int | float
+
+        >>> from .registry import puzzle_class
+        >>> MNPuzzle = puzzle_class("mn")
+        >>> start_grid = (("1", "2", "3"), ("*", "4", "5"))
+        >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+        >>> Solution(MNPuzzle(start_grid, target_grid), "RR").cost()
+        2
+        """
+        total, puzzle = 0, self.start
+        for move in self.moves:
+            total += puzzle.move_cost(move)
+            puzzle = puzzle.apply_move(move)
+        return total
+
+    def final(self):
+        """
+        Return the last puzzle of Solution self.
+
+        @type self: Solution
+        @rtype: Puzzle
+        """
+        puzzle = self.start
+        for move in self.moves:
+            puzzle = puzzle.apply_move(move)
+        return puzzle
+
+    def to_node(self):
+        """
+        Return the root of the PuzzleNode path described by Solution self,
+        the shape returned by depth_first_solve and breadth_first_solve.
+
+        @type self: Solution
+        @rtype: PuzzleNode
+        """
+        from .puzzle_tools import PuzzleNode
+        root = node = None
+        for puzzle in self.states():
+            child = PuzzleNode(puzzle, None, node)
+            if node is None:
+                root = child
+            else:
+                node.children = [child]
+            node = child
+        return root
+
+    def to_dict(self):
+        """
+        Return a JSON-serializable dict with the start state of
+        Solution self, as its string, and its moves.
+
+        @type self: Solution
+        @rtype: dict
+
+        >>> from .registry import puzzle_class
+        >>> WordLadderPuzzle = puzzle_class("word_ladder")
+        >>> ws = {"same", "some", "come"}
+        >>> sol = Solution(WordLadderPuzzle("same", "come", ws),
+        ...                [(1, "o"), (0, "c")])
+        >>> sol.to_dict()
+        {'start': 'same -> come', 'moves': [[1, 'o'], [0, 'c']]}
+        """
+        return {"start": str(self.start),
+                "moves": [_json_move(move) for move in self.moves]}
+
+
+def _json_move(move):
+    # tuples become (nested) lists in JSON
+    if isinstance(move, tuple):
+        return [_json_move(part) for part in move]
+    return move
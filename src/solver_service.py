@@ -0,0 +1,280 @@
+"""
+Asyncio facade over the solvers, for use inside event-loop based services.
+
+Searches run in a managed process pool so they neither block the event
+loop nor compete for the GIL. Requests wait in a bounded queue, which
+applies backpressure to callers, and identical requests that are in flight
+at the same time share a single search.
+"""
+import asyncio
+import os
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from time import monotonic
+
+from .budget import SearchBudget
+from .solution import Solution
+from .strategies import STRATEGIES
+
+
+def _solve_job(puzzle, strategy, limits):
+    # runs in a worker process: return only the moves, the caller
+    # already holds the start puzzle
+    result = STRATEGIES[strategy](puzzle, SearchBudget(**limits))
+    if isinstance(result, Solution):
+        return result.moves
+    return result
+
+
+class SolverService:
+    """
+    Runs solve requests from asyncio code on a pool of worker processes.
+    """
+
+    def __init__(self, max_workers=None, max_queue=64, executor=None):
+        """
+        Create a new SolverService self with max_workers concurrent
+        searches and room for max_queue waiting requests.
+
+        An executor may be given instead of the default process pool,
+        e.g. a ThreadPoolExecutor in tests; it is not shut down by close.
+
+        @type self: SolverService
+        @type max_workers: int | None
+        @type max_queue: int
+        @type executor: concurrent.futures.Executor | None
+        @rtype: None
+        """
+        self._owns_executor = executor is None
+        self._executor = (ProcessPoolExecutor(max_workers)
+                          if executor is None else executor)
+        self._max_workers = max_workers or os.cpu_count() or 1
+        self._max_queue = max_queue
+        self._queue, self._workers = None, []
+        # request key -> future shared by all identical requests
+        self._in_flight = {}
+        self._completed, self._coalesced = 0, 0
+        self._total_latency, self._max_latency = 0.0, 0.0
+
+    async def solve(self, puzzle, strategy="bfs", key=None, **limits):
+        """
+        Return the Solution for puzzle found with strategy (a name in
+        STRATEGIES), None if there is none, or BudgetExceeded if the search
+        runs out of the SearchBudget described by limits (deadline,
+        max_nodes, max_memory).
+
+        Requests with the same key wait for the same search. The default
+        key is puzzle itself, so only equal puzzles share a search: word
+        ladders between the same words over different dictionaries do
+        not. If the first of the requests is cancelled while waiting for
+        room in the queue, the others are cancelled with it.
+
+        @type self: SolverService
+        @type puzzle: Puzzle
+        @type strategy: str
+        @type key: Hashable | None
+        @rtype: Solution | BudgetExceeded | None
+        """
+        if strategy not in STRATEGIES:
+            raise ValueError("unknown strategy: {}".format(strategy))
+        if key is None:
+            key = puzzle
+        key = (key, strategy, tuple(sorted(limits.items())))
+
+        if key in self._in_flight:
+            self._coalesced += 1
+            future = self._in_flight[key]
+        else:
+            self._start_workers()
+            future = asyncio.get_running_loop().create_future()
+            self._in_flight[key] = future
+            try:
+                # blocks while the queue is full
+                await self._queue.put((key, puzzle, strategy, limits,
+                                       monotonic(), future))
+            except asyncio.CancelledError:
+                # the search was never queued: the requests coalesced
+                # onto this one must not wait for it
+                self._in_flight.pop(key, None)
+                future.cancel()
+                raise
+        # a caller giving up must not cancel the search for the others
+        result = await asyncio.shield(future)
+        if isinstance(result, tuple):
+            return Solution(puzzle, result)
+        return result
+
+    def metrics(self):
+        """
+        Return the current queue depth, number of distinct searches in
+        flight, completed and coalesced request counts, and the mean and
+        maximum latency in seconds from enqueueing to completion.
+
+        @type self: SolverService
+        @rtype: dict
+        """
+        completed = self._completed
+        return {"queue_depth": 0 if self._queue is None
+                else self._queue.qsize(),
+                "in_flight": len(self._in_flight),
+                "completed": completed,
+                "coalesced": self._coalesced,
+                "mean_latency": (self._total_latency / completed
+                                 if completed > 0 else 0.0),
+                "max_latency": self._max_latency}
+
+    async def close(self):
+        """
+        Stop the workers of SolverService self, cancelling waiting
+        requests and those whose search is running, and shut down its own
+        process pool.
+
+        @type self: SolverService
+        @rtype: None
+
+        >>> from concurrent.futures import ThreadPoolExecutor
+        >>> from .registry import puzzle_class
+        >>> grid = [["*"] * 5 for _ in range(5)]
+        >>> grid[2][2] = "."
+        >>> board = puzzle_class("peg")(grid, {"*", ".", "#"})
+        >>> async def main(service):
+        ...     request = asyncio.ensure_future(
+        ...         service.solve(board, "dfs", deadline=1))
+        ...     await asyncio.sleep(0.1)
+        ...     await service.close()
+        ...     try:
+        ...         await asyncio.wait_for(request, 2)
+        ...     except asyncio.CancelledError:
+        ...         return "cancelled"
+        >>> asyncio.run(main(SolverService(1, executor=ThreadPoolExecutor(1))))
+        'cancelled'
+        """
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers, self._queue = [], None
+        for future in self._in_flight.values():
+            future.cancel()
+        self._in_flight = {}
+        if self._owns_executor:
+            self._executor.shutdown()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _start_workers(self):
+        # the queue and worker tasks belong to the running event loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(self._max_queue)
+            self._workers = [asyncio.ensure_future(self._work())
+                             for _ in range(self._max_workers)]
+
+    async def _work(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            key, puzzle, strategy, limits, queued, future = \
+                await self._queue.get()
+            try:
+                result = await loop.run_in_executor(
+                    self._executor, _solve_job, puzzle, strategy, limits)
+            except asyncio.CancelledError:
+                # closed mid-search: the future leaves _in_flight below,
+                # before close could cancel it for the waiting requests
+                future.cancel()
+                raise
+            except Exception as error:
+                if not future.done():
+                    future.set_exception(error)
+            else:
+                if not future.done():
+                    future.set_result(result)
+            finally:
+                latency = monotonic() - queued
+                self._completed += 1
+                self._total_latency += latency
+                self._max_latency = max(self._max_latency, latency)
+                self._in_flight.pop(key, None)
+                self._queue.task_done()
+
+
+# event loop -> (its default service used by solve_async, the task
+# closing that service when the loop shuts down)
+_services = weakref.WeakKeyDictionary()
+
+
+async def solve_async(puzzle, strategy="bfs", service=None, **limits):
+    """
+    Return the result of SolverService.solve for puzzle, on service or on
+    a default service created for the running event loop.
+
+    @type puzzle: Puzzle
+    @type strategy: str
+    @type service: SolverService | None
+    @rtype: Solution | BudgetExceeded | None
+
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> from .registry import puzzle_class
+    >>> MNPuzzle = puzzle_class("mn")
+    >>> target_grid = (("1", "2", "3"), ("4", "5", "*"))
+    >>> puzzle = MNPuzzle((("1", "2", "3"), ("*", "4", "5")), target_grid)
+    >>> async def main(service):
+    ...     async with service:
+    ...         results = await asyncio.gather(
+    ...             solve_async(puzzle, service=service),
+    ...             solve_async(puzzle, service=service),
+    ...             solve_async(puzzle, "dfs", service=service, max_nodes=1))
+    ...         return results, service.metrics()
+    >>> service = SolverService(2, executor=ThreadPoolExecutor(2))
+    >>> (bfs1, bfs2, dfs), metrics = asyncio.run(main(service))
+    >>> bfs1.moves, bfs2 == bfs1, dfs.reason
+    (('R', 'R'), True, 'max_nodes')
+    >>> metrics["completed"], metrics["coalesced"], metrics["queue_depth"]
+    (2, 1, 0)
+    """
+    if service is None:
+        loop = asyncio.get_running_loop()
+        if loop not in _services:
+            service = SolverService()
+            _services[loop] = (service, asyncio.ensure_future(
+                _close_on_shutdown(loop, service)))
+        service = _services[loop][0]
+    return await service.solve(puzzle, strategy, **limits)
+
+
+async def close_default_service():
+    """
+    Close the default service of the running event loop and its process
+    pool, if solve_async created one. asyncio.run does so itself when the
+    loop shuts down; other loops should await this before closing.
+
+    @rtype: None
+
+    >>> from .registry import puzzle_class
+    >>> grid = (("1", "2"), ("3", "*"))
+    >>> async def main():
+    ...     solution = await solve_async(puzzle_class("mn")(grid, grid))
+    ...     await close_default_service()
+    ...     return solution.moves, len(_services)
+    >>> asyncio.run(main())
+    ((), 0)
+    """
+    entry = _services.pop(asyncio.get_running_loop(), None)
+    if entry is not None:
+        service, closer = entry
+        closer.cancel()
+        await service.close()
+
+
+async def _close_on_shutdown(loop, service):
+    # waits until cancelled, as asyncio.run cancels the tasks left when
+    # its loop shuts down, then closes service if it is still the default
+    try:
+        await loop.create_future()
+    finally:
+        entry = _services.get(loop)
+        if entry is not None and entry[0] is service:
+            del _services[loop]
+            await service.close()
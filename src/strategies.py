@@ -0,0 +1,87 @@
+"""
+The search strategies by name, each called as strategy(puzzle, budget) and
+returning a Solution, None if the puzzle has no solution, or
+BudgetExceeded if the SearchBudget runs out first.
+"""
+from .heuristic_search import anytime_weighted_astar, beam_search
+from .puzzle_tools import (PuzzleNode, _puzzle_heuristic, astar_solution,
+                           breadth_first_solution, depth_first_solution,
+                           iterative_deepening_solve,
+                           memoized_depth_first_solution,
+                           uniform_cost_solution)
+from .solution import Solution
+
+
+class Strategy:
+    """
+    A search strategy: a function(puzzle, budget) and whether the search
+    is complete, so that a result of None proves there is no solution.
+    """
+
+    def __init__(self, solve, complete):
+        """
+        Create a new Strategy self searching with solve.
+
+        @type self: Strategy
+        @type solve: (Puzzle, SearchBudget | None) -> Solution | None
+        @type complete: bool
+        @rtype: None
+        """
+        self.solve, self.complete = solve, complete
+
+    def __call__(self, puzzle, budget=None):
+        """
+        Return the result of searching from puzzle with Strategy self.
+
+        @type self: Strategy
+        @type puzzle: Puzzle
+        @type budget: SearchBudget | None
+        @rtype: Solution | BudgetExceeded | None
+
+        >>> from .registry import puzzle_class
+        >>> grid = (("1", "2"), ("3", "*"))
+        >>> puzzle = puzzle_class("mn")((("1", "2"), ("*", "3")), grid)
+        >>> STRATEGIES["bfs"](puzzle).moves, STRATEGIES["beam"].complete
+        (('R',), False)
+        """
+        return self.solve(puzzle, budget)
+
+
+def _from_root(solve):
+    # strategy returning a Solution from one returning a PuzzleNode path
+    def strategy(puzzle, budget=None):
+        root = solve(puzzle, budget=budget)
+        return (Solution.from_node(root) if isinstance(root, PuzzleNode)
+                else root)
+    return strategy
+
+
+def _ida_solution(puzzle, budget=None):
+    # IDA* guided by Puzzle.heuristic
+    return iterative_deepening_solve(puzzle, _puzzle_heuristic,
+                                     budget=budget)
+
+
+def _endgame_solution(puzzle, budget=None):
+    # peg solitaire only: imported on first use, like the puzzle types
+    from .grid_peg_solitaire_puzzle import endgame_solution
+    return endgame_solution(puzzle, budget)
+
+
+def _batch_solution(puzzle, budget=None):
+    # single-blank sliding puzzles of up to 16 cells; needs numpy
+    from .mn_batch import batch_iterative_deepening_solve
+    return batch_iterative_deepening_solve(puzzle, budget=budget)
+
+
+# strategy name -> Strategy
+STRATEGIES = {"bfs": Strategy(breadth_first_solution, True),
+              "dfs": Strategy(depth_first_solution, True),
+              "memo": Strategy(memoized_depth_first_solution, True),
+              "endgame": Strategy(_endgame_solution, True),
+              "ucs": Strategy(uniform_cost_solution, True),
+              "astar": Strategy(astar_solution, True),
+              "ida": Strategy(_from_root(_ida_solution), True),
+              "batch": Strategy(_batch_solution, True),
+              "beam": Strategy(_from_root(beam_search), False),
+              "anytime": Strategy(_from_root(anytime_weighted_astar), False)}
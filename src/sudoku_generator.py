@@ -0,0 +1,263 @@
+"""
+Generator of SudokuPuzzles with a unique solution.
+
+A random solved grid is filled in, then clues are removed in random order
+as long as the puzzle keeps a unique solution. Uniqueness is verified by a
+bitmask backtracking counter that picks the most constrained cell first
+and stops as soon as it finds a second solution.
+"""
+import random
+from functools import lru_cache
+
+from .sudoku_puzzle import SudokuPuzzle, unit_table
+
+DEFAULT_SYMBOLS = "123456789ABCDEFGHIJKLMNOP"
+
+# difficulty -> fraction of the n * n cells left as clues
+DIFFICULTIES = {"easy": 0.5, "medium": 0.4, "hard": 0.3}
+
+# search nodes a uniqueness check may take before the clue is kept
+MAX_CHECK_NODES = 20000
+
+
+class _GiveUp(Exception):
+    pass
+
+
+@lru_cache(maxsize=None)
+def _layout(n):
+    # row, column and box of every cell, the cells of every row, column
+    # and box as (kind, index, cells), and popcounts of all masks
+    table = unit_table(n)
+    places = table[0]
+    units = tuple((kind, index, cells)
+                  for kind in range(3)
+                  for index, cells in enumerate(table[kind + 1]))
+    sizes = [0] * (1 << n) if n <= 16 else None
+    if sizes is not None:
+        for mask in range(1, 1 << n):
+            sizes[mask] = sizes[mask >> 1] + (mask & 1)
+    return places, units, sizes
+
+
+class _Grid:
+    # Cells hold 0 for empty or 1 + the index of their symbol; rows,
+    # columns and boxes hold bitmasks of the symbols already used.
+
+    def __init__(self, n, cells, max_nodes=None):
+        self.n, self.cells = n, list(cells)
+        self.nodes, self.max_nodes = 0, max_nodes
+        self.places, self.units, self.sizes = _layout(n)
+        self.full = (1 << n) - 1
+        self.rows, self.cols, self.boxes = [0] * n, [0] * n, [0] * n
+        self.empty = []
+        for i, value in enumerate(self.cells):
+            if value == 0:
+                self.empty.append(i)
+            elif not self.place(i, value):
+                # a clue repeats a symbol in its row, column or box
+                self.empty = None
+                return
+
+    def candidates(self, i):
+        row, col, box = self.places[i]
+        return self.full & ~(self.rows[row] | self.cols[col] |
+                             self.boxes[box])
+
+    def place(self, i, value):
+        bit = 1 << (value - 1)
+        row, col, box = self.places[i]
+        if (self.rows[row] | self.cols[col] | self.boxes[box]) & bit:
+            return False
+        self.rows[row] |= bit
+        self.cols[col] |= bit
+        self.boxes[box] |= bit
+        self.cells[i] = value
+        return True
+
+    def unplace(self, i):
+        bit = 1 << (self.cells[i] - 1)
+        row, col, box = self.places[i]
+        self.rows[row] &= ~bit
+        self.cols[col] &= ~bit
+        self.boxes[box] &= ~bit
+        self.cells[i] = 0
+
+    def hidden_single(self, candidates):
+        # (cell, bit) for a symbol with a single place left in some row,
+        # column or box, False if a symbol has no place left in one
+        used = (self.rows, self.cols, self.boxes)
+        for kind, index, cells in self.units:
+            once = twice = 0
+            for i in cells:
+                if i in candidates:
+                    mask = candidates[i]
+                    twice |= once & mask
+                    once |= mask
+            if once | used[kind][index] != self.full:
+                return False
+            hidden = once & ~twice
+            if hidden:
+                bit = hidden & -hidden
+                for i in cells:
+                    if candidates.get(i, 0) & bit:
+                        return i, bit
+        return None
+
+    def count(self, limit, rng=None):
+        # number of solutions, stopping at limit; with rng, candidates
+        # are tried in random order and the first solution is kept
+        if len(self.empty) == 0:
+            return 1
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise _GiveUp
+        # most constrained empty cell
+        best, best_mask, best_size = 0, 0, self.n + 1
+        rows, cols, boxes = self.rows, self.cols, self.boxes
+        places, sizes, full = self.places, self.sizes, self.full
+        candidates = {}
+        for k, i in enumerate(self.empty):
+            row, col, box = places[i]
+            mask = full & ~(rows[row] | cols[col] | boxes[box])
+            candidates[i] = mask
+            size = (sizes[mask] if sizes is not None
+                    else bin(mask).count("1"))
+            if size < best_size:
+                best, best_mask, best_size = k, mask, size
+                if size <= 1:
+                    break
+        if best_size == 0:
+            return 0
+        if best_size > 1:
+            forced = self.hidden_single(candidates)
+            if forced is False:
+                return 0
+            if forced is not None:
+                best, best_mask = self.empty.index(forced[0]), forced[1]
+        i = self.empty[best]
+        self.empty[best] = self.empty[-1]
+        self.empty.pop()
+        values = [v + 1 for v in range(self.n) if best_mask >> v & 1]
+        if rng is not None:
+            rng.shuffle(values)
+        total = 0
+        for value in values:
+            self.place(i, value)
+            total += self.count(limit - total, rng)
+            if total >= limit:
+                if rng is not None:
+                    # keep the solution in place
+                    return total
+                self.unplace(i)
+                break
+            self.unplace(i)
+        self.empty.append(i)
+        self.empty[best], self.empty[-1] = self.empty[-1], self.empty[best]
+        return total
+
+
+def count_sudoku_solutions(puzzle, limit=2):
+    """
+    Return the number of solutions of SudokuPuzzle puzzle, counting no
+    further than limit.
+
+    @type puzzle: SudokuPuzzle
+    @type limit: int
+    @rtype: int
+
+    >>> grid = ["A", "B", "C", "D"]
+    >>> grid += ["C", "D", "A", "B"]
+    >>> grid += ["B", "A", "D", "C"]
+    >>> grid += ["D", "C", "B", "*"]
+    >>> count_sudoku_solutions(SudokuPuzzle(4, grid, {"A", "B", "C", "D"}))
+    1
+    >>> empty = SudokuPuzzle(4, ["*"] * 16, {"A", "B", "C", "D"})
+    >>> count_sudoku_solutions(empty), count_sudoku_solutions(empty, None)
+    (2, 288)
+    """
+    order = sorted(puzzle._symbol_set)
+    grid = _Grid(puzzle._n, [0 if s == "*" else order.index(s) + 1
+                             for s in puzzle._symbols])
+    if grid.empty is None:
+        return 0
+    return grid.count(float("inf") if limit is None else limit)
+
+
+def random_solved_grid(n, rng=None, symbols=None):
+    """
+    Return a random solved nxn SudokuPuzzle using the first n of symbols.
+
+    @type n: int
+    @type rng: random.Random | None
+    @type symbols: str | None
+    @rtype: SudokuPuzzle
+
+    >>> random_solved_grid(9, random.Random(0)).is_solved()
+    True
+    """
+    rng = random.Random() if rng is None else rng
+    symbols = (DEFAULT_SYMBOLS if symbols is None else symbols)[:n]
+    grid = _Grid(n, [0] * (n * n))
+    grid.count(1, rng)
+    puzzle = SudokuPuzzle(n, [symbols[v - 1] for v in grid.cells],
+                          set(symbols))
+    assert puzzle.is_solved()
+    return puzzle
+
+
+def generate_sudoku(n=9, difficulty="medium", clues=None, rng=None,
+                    symbols=None):
+    """
+    Return a random nxn SudokuPuzzle with a unique solution and about
+    clues filled cells, or as many as the difficulty ("easy", "medium"
+    or "hard") calls for. More clues than requested are left if no more
+    can be removed without losing uniqueness, or if proving uniqueness
+    takes more than MAX_CHECK_NODES search nodes.
+
+    @type n: int
+    @type difficulty: str
+    @type clues: int | None
+    @type rng: random.Random | None
+    @type symbols: str | None
+    @rtype: SudokuPuzzle
+
+    >>> s = generate_sudoku(9, "hard", rng=random.Random(1))
+    >>> count_sudoku_solutions(s)
+    1
+    >>> sum([1 for c in str(s) if c not in "*|-\\n"]) <= 30
+    True
+    """
+    rng = random.Random() if rng is None else rng
+    if clues is None:
+        clues = round(DIFFICULTIES[difficulty] * n * n)
+    solved = random_solved_grid(n, rng, symbols)
+    order = sorted(solved._symbol_set)
+    grid = _Grid(n, [order.index(s) + 1 for s in solved._symbols])
+
+    cells = list(range(n * n))
+    rng.shuffle(cells)
+    filled = n * n
+    for i in cells:
+        if filled <= clues:
+            break
+        value = grid.cells[i]
+        grid.unplace(i)
+        # a cell whose only candidate is its own value is forced,
+        # otherwise removing it must keep the solution unique
+        if (grid.candidates(i) == 1 << (value - 1) or
+                _unique(grid)):
+            filled -= 1
+        else:
+            grid.place(i, value)
+
+    return SudokuPuzzle(n, [order[v - 1] if v > 0 else "*"
+                            for v in grid.cells], solved._symbol_set)
+
+
+def _unique(grid):
+    # whether grid has exactly one solution, False if that takes too long
+    try:
+        return _Grid(grid.n, grid.cells, MAX_CHECK_NODES).count(2) == 1
+    except _GiveUp:
+        return False
@@ -1,13 +1,48 @@
 from .puzzle import Puzzle
 from .puzzle_tools import depth_first_solve
+from functools import lru_cache
 from time import time
-import doctest
+
+
+@lru_cache(maxsize=None)
+def unit_table(n):
+    """
+    Return the cell indices of an nxn sudoku by unit, shared by all
+    SudokuPuzzles of that size: (places, rows, columns, subsquares), where
+    places[i] is the (row, column, subsquare) of cell i and rows[k],
+    columns[k] and subsquares[k] are the cells of the k-th unit.
+
+    @type n: int
+    @rtype: tuple(tuple, tuple, tuple, tuple)
+
+    >>> places, rows, columns, subsquares = unit_table(4)
+    >>> places[6]
+    (1, 2, 1)
+    >>> rows[1], columns[2], subsquares[1]
+    ((4, 5, 6, 7), (2, 6, 10, 14), (2, 3, 6, 7))
+    """
+    r = round(n ** (1 / 2))
+    places = tuple((i // n, i % n, (i // n // r) * r + i % n // r)
+                   for i in range(n * n))
+    units = [tuple(tuple(i for i in range(n * n) if places[i][kind] == k)
+                   for k in range(n)) for kind in range(3)]
+    return (places,) + tuple(units)
+
+
+@lru_cache(maxsize=None)
+def _symbol_bits(symbol_set):
+    # symbol -> its bit in masks of symbols, for a frozenset of symbols
+    return {s: 1 << i for i, s in enumerate(sorted(symbol_set))}
+
 
 class SudokuPuzzle(Puzzle):
     """
     A sudoku puzzle that may be solved, unsolved, or even unsolvable.
     """
 
+    # every extension fills in one more cell
+    ACYCLIC = True
+
     def __init__(self, n, symbols, symbol_set):
         """
         Create a new nxn SudokuPuzzle self with symbols
@@ -55,7 +90,11 @@ class SudokuPuzzle(Puzzle):
         """
         return (type(other) == type(self) and
                 self._n == other._n and self._symbols == other._symbols and
-                self._symbol_set == other._symbol_set)
+                (self._symbol_set is other._symbol_set or
+                 self._symbol_set == other._symbol_set))
+
+    def __hash__(self):
+        return hash(tuple(self._symbols))
 
     def __str__(self):
         """
@@ -132,14 +171,20 @@ class SudokuPuzzle(Puzzle):
         >>> s.is_solved()
         False
         """
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # no "*" left and all rows, column, subsquares have correct symbols
-        return ("*" not in symbols and
-                all([(self._row_set(i) == self._symbol_set and
-                      self._column_set(i) == self._symbol_set and
-                      self._subsquare_set(i) ==
-                      self._symbol_set) for i in range(n ** 2)]))
+        symbols = self._symbols
+        if "*" in symbols:
+            return False
+        bits = _symbol_bits(frozenset(self._symbol_set))
+        full = (1 << self._n) - 1
+        # every row, column and subsquare must hold every symbol once
+        for units in unit_table(self._n)[1:]:
+            for unit in units:
+                mask = 0
+                for i in unit:
+                    mask |= bits[symbols[i]]
+                if mask != full:
+                    return False
+        return True
 
     def extensions(self):
         """
@@ -216,19 +261,85 @@ class SudokuPuzzle(Puzzle):
         >>> s.fail_fast()
         True
         """
+        n, symbols = self._n, self._symbols
+        bits = _symbol_bits(frozenset(self._symbol_set))
+        places = unit_table(n)[0]
+        # masks of the symbols used in each row, column and subsquare
+        rows, columns, subsquares = [0] * n, [0] * n, [0] * n
+        empty = []
+        for i, symbol in enumerate(symbols):
+            if symbol == "*":
+                empty.append(i)
+            else:
+                bit = bits[symbol]
+                row, column, subsquare = places[i]
+                rows[row] |= bit
+                columns[column] |= bit
+                subsquares[subsquare] |= bit
+
+        full = (1 << n) - 1
+        for i in empty:
+            row, column, subsquare = places[i]
+            if rows[row] | columns[column] | subsquares[subsquare] == full:
+                return True
+        return False
+
+    def size(self):
+        """
+        Return n for SudokuPuzzle self of n rows and n columns.
 
-        # return indices for each star in self._symbols
-        indices = [i for i, x in enumerate(self._symbols) if x == "*"]
+        @type self: SudokuPuzzle
+        @rtype: int
 
-        for i in indices:
-            allowed_symbols = (self._symbol_set -
-                               (self._row_set(i) |
-                                self._column_set(i) |
-                                self._subsquare_set(i)))
-            if len(allowed_symbols) == 0:
-                return True
+        >>> symbols = ["A", "B", "C", "D"] * 4
+        >>> SudokuPuzzle(4, symbols, {"A", "B", "C", "D"}).size()
+        4
+        """
+        return self._n
 
-        return False
+    def move_to(self, other):
+        """
+        Return (position, symbol) for the cell filled in to turn
+        SudokuPuzzle self into its extension other.
+
+        @type self: SudokuPuzzle
+        @type other: SudokuPuzzle
+        @rtype: tuple(int, str)
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["C", "D", "A", "B"]
+        >>> grid += ["B", "A", "D", "C"]
+        >>> grid += ["D", "C", "B", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> s.move_to(s.extensions()[0])
+        (15, 'A')
+        """
+        for i in range(len(self._symbols)):
+            if self._symbols[i] != other._symbols[i]:
+                return i, other._symbols[i]
+        return None
+
+    def apply_move(self, move):
+        """
+        Return the extension of SudokuPuzzle self with symbol move[1]
+        at position move[0].
+
+        @type self: SudokuPuzzle
+        @type move: tuple(int, str)
+        @rtype: SudokuPuzzle
+
+        >>> grid = ["A", "B", "C", "D"]
+        >>> grid += ["C", "D", "A", "B"]
+        >>> grid += ["B", "A", "D", "C"]
+        >>> grid += ["D", "C", "B", "*"]
+        >>> s = SudokuPuzzle(4, grid, {"A", "B", "C", "D"})
+        >>> s.apply_move((15, "A")).is_solved()
+        True
+        """
+        i, symbol = move
+        return SudokuPuzzle(self._n,
+                            self._symbols[:i] + [symbol] +
+                            self._symbols[i + 1:], self._symbol_set)
 
     # some helper methods
     def _row_set(self, m):
@@ -239,12 +350,8 @@ class SudokuPuzzle(Puzzle):
         # @type self: SudokuPuzzle
         # @type m: int
         assert 0 <= m < self._n ** 2
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # first position in m's row
-        r = (m // n) * n
-        # set of elements from symbols[r] .. symbols[r+n-1]
-        return set([symbols[r + i] for i in range(n)])
+        places, rows = unit_table(self._n)[:2]
+        return set([self._symbols[i] for i in rows[places[m][0]]])
 
     def _column_set(self, m):
         # Return set of symbols in column of SudokuPuzzle self's symbols
@@ -252,14 +359,9 @@ class SudokuPuzzle(Puzzle):
         #
         # @type self: SudokuPuzzle
         # @type m: int
-        assert 0 <= m <= self._n ** 2
-        # convenient names
-        symbols, n = self._symbols, self._n
-        # first position in m's column
-        c = m % n
-        # set of elements from symbols[c], symbols[c + n],
-        # ... symbols[c + (n * (n-1))]
-        return set([symbols[c + (i * n)] for i in range(n)])
+        assert 0 <= m < self._n ** 2
+        places, _, columns, _ = unit_table(self._n)
+        return set([self._symbols[i] for i in columns[places[m][1]]])
 
     def _subsquare_set(self, m):
         # Return set of symbols in subsquare of SudokuPuzzle self's symbols
@@ -268,21 +370,13 @@ class SudokuPuzzle(Puzzle):
         # @type self: SudokuPuzzle
         # @type m: int
         assert 0 <= m < self._n ** 2
-        # convenient names
-        n, symbols = self._n, self._symbols
-        # row, column where m occur
-        row, col = m // n, m % n
-        # length of subsquares
-        ss = round(n ** (1 / 2))
-        # upper-left position of m's subsquare
-        ul = (((row // ss) * ss) * n) + ((col // ss) * ss)
-        # return set of symbols from subsquare starting at ul
-        return set(
-            [symbols[ul + i + n * j] for i in range(ss) for j in range(ss)])
+        places, _, _, subsquares = unit_table(self._n)
+        return set([self._symbols[i] for i in subsquares[places[m][2]]])
 
 
 if __name__ == "__main__":
 
+    import doctest
     doctest.testmod()
 
     # s = SudokuPuzzle(16,
@@ -0,0 +1,299 @@
+"""
+Loading of word dictionaries for word-ladder puzzles.
+
+Dictionaries can be read from a plain text file with one word per line, or
+from a prebuilt compact binary index. The index stores the words sorted and
+bucketed by length in fixed-width records, and is memory-mapped so that
+several solver processes share the same pages and start without parsing.
+"""
+import mmap
+import os
+import struct
+
+# environment variable that overrides the location of the datasets directory
+DATASET_ENVIRONMENT_VARIABLE = "PUZZLE_SOLVER_DATASETS"
+DATASET_DIRECTORY = os.environ.get(
+    DATASET_ENVIRONMENT_VARIABLE,
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                 "datasets"))
+WORD_FILE_NAME = "words.txt"
+INDEX_FILE_NAME = "words.idx"
+
+# file header: magic, format version, number of length buckets
+_HEADER = struct.Struct("<4sHH")
+# one entry per bucket: word length, record width, word count, data offset
+_BUCKET = struct.Struct("<HHIQ")
+_MAGIC = b"WIDX"
+_VERSION = 1
+
+
+def dataset_path(file_name=WORD_FILE_NAME):
+    """
+    Return the path of file_name inside the datasets directory.
+
+    @type file_name: str
+    @rtype: str
+
+    >>> os.path.basename(dataset_path())
+    'words.txt'
+    """
+    return os.path.join(DATASET_DIRECTORY, file_name)
+
+
+def load_words(path=None, length=None):
+    """
+    Return the set of words in the text file at path, one word per line.
+    If length is given, only words of exactly that length are kept.
+
+    @type path: str | None
+    @type length: int | None
+    @rtype: set[str]
+
+    >>> words = load_words(length=4)
+    >>> "cost" in words
+    True
+    >>> all([len(w) == 4 for w in words])
+    True
+    """
+    if path is None:
+        path = dataset_path()
+    words = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            word = line.strip()
+            if word and (length is None or len(word) == length):
+                words.add(word)
+    return words
+
+
+def build_word_index(words, path):
+    """
+    Write words to a compact binary index at path.
+
+    Words are grouped by length; each group is sorted and stored as
+    fixed-width, NUL-padded UTF-8 records so that it can be searched
+    in place once memory-mapped.
+
+    @type words: iterable[str]
+    @type path: str
+    @rtype: None
+    """
+    buckets = {}
+    for word in words:
+        buckets.setdefault(len(word), set()).add(word.encode("utf-8"))
+
+    lengths = sorted(buckets)
+    offset = _HEADER.size + _BUCKET.size * len(lengths)
+    table, data = [], []
+    for length in lengths:
+        records = sorted(buckets[length])
+        width = max([len(r) for r in records])
+        table.append(_BUCKET.pack(length, width, len(records), offset))
+        data.append(b"".join([r.ljust(width, b"\0") for r in records]))
+        offset += width * len(records)
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, len(lengths)))
+        f.write(b"".join(table))
+        for chunk in data:
+            f.write(chunk)
+
+
+class WordIndex:
+    """
+    A memory-mapped word index written by build_word_index.
+    """
+
+    def __init__(self, path):
+        """
+        Open the word index at path.
+
+        @type self: WordIndex
+        @type path: str
+        @rtype: None
+        """
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self._map.close()
+            raise ValueError("{} is not a word index".format(path))
+        self._buckets = {}
+        for i in range(count):
+            length, width, size, offset = _BUCKET.unpack_from(
+                self._map, _HEADER.size + i * _BUCKET.size)
+            self._buckets[length] = WordBucket(self._map, width, size, offset)
+
+    def lengths(self):
+        """
+        Return the sorted word lengths present in WordIndex self.
+
+        @type self: WordIndex
+        @rtype: list[int]
+        """
+        return sorted(self._buckets)
+
+    def words(self, length):
+        """
+        Return the words of the given length as a set-like WordBucket.
+
+        @type self: WordIndex
+        @type length: int
+        @rtype: WordBucket
+
+        >>> import tempfile
+        >>> path = os.path.join(tempfile.mkdtemp(), INDEX_FILE_NAME)
+        >>> build_word_index(["cost", "most", "same", "on", "Atatürk"], path)
+        >>> index = WordIndex(path)
+        >>> index.lengths()
+        [2, 4, 7]
+        >>> bucket = index.words(4)
+        >>> len(bucket), "most" in bucket, "mist" in bucket
+        (3, True, False)
+        >>> list(bucket)
+        ['cost', 'most', 'same']
+        >>> "Atatürk" in index.words(7)
+        True
+        >>> len(index.words(5))
+        0
+        >>> index.close()
+        """
+        if length in self._buckets:
+            return self._buckets[length]
+        return WordBucket(self._map, 1, 0, 0)
+
+    def close(self):
+        """
+        Release the memory map of WordIndex self.
+
+        @type self: WordIndex
+        @rtype: None
+        """
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class WordBucket:
+    """
+    Read-only, set-like view of the words of one length in a WordIndex.
+    Membership is a binary search over the mapped records.
+    """
+
+    def __init__(self, buffer, width, size, offset):
+        """
+        Create a view over size records of width bytes at offset in buffer.
+
+        @type self: WordBucket
+        @type buffer: mmap.mmap
+        @type width: int
+        @type size: int
+        @type offset: int
+        @rtype: None
+        """
+        self._buffer, self._width = buffer, width
+        self._size, self._offset = size, offset
+
+    def _record(self, i):
+        start = self._offset + i * self._width
+        return self._buffer[start:start + self._width]
+
+    def __contains__(self, word):
+        if not isinstance(word, str):
+            return False
+        key = word.encode("utf-8")
+        if len(key) > self._width:
+            return False
+        key = key.ljust(self._width, b"\0")
+        low, high = 0, self._size
+        while low < high:
+            mid = (low + high) // 2
+            record = self._record(mid)
+            if record < key:
+                low = mid + 1
+            elif record > key:
+                high = mid
+            else:
+                return True
+        return False
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self._record(i).rstrip(b"\0").decode("utf-8")
+
+    def __len__(self):
+        return self._size
+
+    def __eq__(self, other):
+        """
+        Return whether WordBucket self holds the same words as other.
+
+        Buckets over the same records are compared without reading them.
+
+        @type self: WordBucket
+        @type other: WordBucket | set[str] | Any
+        @rtype: bool
+        """
+        if isinstance(other, WordBucket):
+            if (self._buffer is other._buffer and
+                    self._offset == other._offset):
+                return self._size == other._size
+            return (self._size == other._size and
+                    all([a == b for a, b in zip(self, other)]))
+        if isinstance(other, (set, frozenset)):
+            return len(other) == self._size and all(
+                [word in other for word in self])
+        return NotImplemented
+
+    def __hash__(self):
+        return hash((self._width, self._size))
+
+
+# (length, path) -> dictionary loaded by load_dictionary
+_dictionaries = {}
+
+
+def load_dictionary(length=None, path=None):
+    """
+    Return the dictionary at path restricted to words of the given length.
+
+    A path ending in ".idx" (or, when path is None, a words.idx file
+    present in the datasets directory) is opened as a memory-mapped
+    WordIndex; otherwise the text file is read with load_words.
+
+    Every call with the same arguments returns the same object, so that
+    puzzles built from it share their dictionary and compare it by
+    identity. It must not be modified.
+
+    @type length: int | None
+    @type path: str | None
+    @rtype: set[str] | WordBucket
+
+    >>> load_dictionary(4) is load_dictionary(4)
+    True
+    """
+    if path is None:
+        index_path = dataset_path(INDEX_FILE_NAME)
+        path = index_path if os.path.exists(index_path) else dataset_path()
+    key = (length, path)
+    if key not in _dictionaries:
+        if path.endswith(".idx") and length is not None:
+            words = WordIndex(path).words(length)
+        elif path.endswith(".idx"):
+            with WordIndex(path) as index:
+                words = set([w for n in index.lengths()
+                             for w in index.words(n)])
+        else:
+            words = load_words(path, length)
+        _dictionaries[key] = words
+    return _dictionaries[key]
+
+
+if __name__ == "__main__":
+    # build the binary index next to the text dictionary
+    build_word_index(load_words(), dataset_path(INDEX_FILE_NAME))
+    print("Wrote {}".format(dataset_path(INDEX_FILE_NAME)))
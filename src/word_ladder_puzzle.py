@@ -1,7 +1,7 @@
 from .puzzle import Puzzle
 from .puzzle_tools import breadth_first_solve, depth_first_solve
+from .word_dictionary import DATASET_DIRECTORY, WORD_FILE_NAME, load_dictionary
 from time import time
-import doctest
 
 
 class WordLadderPuzzle(Puzzle):
@@ -9,8 +9,8 @@ class WordLadderPuzzle(Puzzle):
     A word-ladder puzzle that may be solved, unsolved, or even unsolvable.
     """
 
-    DATASET_DIRECTORY = "/Users/sashaobucina/github/PuzzleSolver/datasets/"
-    WORD_FILE_NAME = "words.txt"
+    DATASET_DIRECTORY = DATASET_DIRECTORY
+    WORD_FILE_NAME = WORD_FILE_NAME
 
     def __init__(self, from_word, to_word, ws):
         """
@@ -32,6 +32,11 @@ class WordLadderPuzzle(Puzzle):
         """
         Return whether WordLadderPuzzle self is equivalent to other.
 
+        This takes time independent of the dictionary only when both
+        puzzles hold the same word set object, as a puzzle and its
+        extensions do, or puzzles built from one load_dictionary result;
+        otherwise the two word sets are compared word by word.
+
         @type self: WordLadderPuzzle
         @type other: WordLadderPuzzle | Any
         @rtype: bool
@@ -50,10 +55,16 @@ class WordLadderPuzzle(Puzzle):
         >>> wlp1.__eq__(wlp5)
         False
         """
+        # extensions share their word set, so only puzzles built from
+        # separate dictionaries need the word-by-word comparison
         return (type(other) == type(self) and
                 self._from_word == other._from_word and
                 self._to_word == other._to_word and
-                self._word_set == other._word_set)
+                (self._word_set is other._word_set or
+                 self._word_set == other._word_set))
+
+    def __hash__(self):
+        return hash((self._from_word, self._to_word))
 
     def __str__(self):
         """
@@ -117,12 +128,73 @@ class WordLadderPuzzle(Puzzle):
         """
         return self._from_word == self._to_word
 
+    def heuristic(self):
+        """
+        Return the number of letters of from_word that differ from
+        to_word, a lower bound of the number of steps left.
+
+        @type self: WordLadderPuzzle
+        @rtype: int
+
+        >>> WordLadderPuzzle("same", "come", set()).heuristic()
+        2
+        """
+        return (sum([a != b for a, b in zip(self._from_word, self._to_word)])
+                + abs(len(self._from_word) - len(self._to_word)))
+
+    def size(self):
+        """
+        Return the length of from_word of WordLadderPuzzle self.
+
+        @type self: WordLadderPuzzle
+        @rtype: int
+        """
+        return len(self._from_word)
+
+    def move_to(self, other):
+        """
+        Return (position, letter) for the letter changed to turn
+        WordLadderPuzzle self into its extension other.
+
+        @type self: WordLadderPuzzle
+        @type other: WordLadderPuzzle
+        @rtype: tuple(int, str)
+
+        >>> dictionary = {"same", "some", "cost"}
+        >>> wlp = WordLadderPuzzle("same", "cost", dictionary)
+        >>> wlp.move_to(WordLadderPuzzle("some", "cost", dictionary))
+        (1, 'o')
+        """
+        for i in range(len(self._from_word)):
+            if self._from_word[i] != other._from_word[i]:
+                return i, other._from_word[i]
+        return None
+
+    def apply_move(self, move):
+        """
+        Return the extension of WordLadderPuzzle self with letter move[1]
+        at position move[0] of from_word.
+
+        @type self: WordLadderPuzzle
+        @type move: tuple(int, str)
+        @rtype: WordLadderPuzzle
+
+        >>> dictionary = {"same", "some", "cost"}
+        >>> wlp = WordLadderPuzzle("same", "cost", dictionary)
+        >>> print(wlp.apply_move((1, "o")))
+        some -> cost
+        """
+        i, letter = move
+        word = self._from_word[:i] + letter + self._from_word[i + 1:]
+        return WordLadderPuzzle(word, self._to_word, self._word_set)
+
 
 if __name__ == '__main__':
+    import doctest
     doctest.testmod()
 
-    with open(WordLadderPuzzle.DATASET_DIRECTORY + WordLadderPuzzle.WORD_FILE_NAME, "r") as words:
-        word_set = set(words.read().split())
+    # only words of the same length can appear in a ladder
+    word_set = load_dictionary(len("amer"))
     w = WordLadderPuzzle("amer", "cost", word_set)
     start = time()
     sol = breadth_first_solve(w)